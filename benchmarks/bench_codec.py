@@ -0,0 +1,47 @@
+"""Parse/serialize times for the big data files: stdlib json vs orjson.
+
+Run from the repository root:  python -m benchmarks.bench_codec [repeats]
+"""
+import json
+import sys
+import timeit
+from constants import BESTIARY_FILE, ITEM_FILE
+from utils import codec
+from utils import packs
+
+FILES = (("bestiary", BESTIARY_FILE), ("items", ITEM_FILE))
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    print(f"Active codec backend: {codec.BACKEND}")
+    print(f"{'file':<10} {'codec':<16} {'parse ms':>10} {'serialize ms':>13}")
+    for kind, filepath in FILES:
+        if packs.is_packed(filepath):
+            # The whole collection as one document, as it was before the pack split
+            data = packs.read_all(filepath)
+            raw = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        else:
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            data = json.loads(raw)
+
+        rows = [(
+            "json (stdlib)",
+            _best_ms(lambda: json.loads(raw), repeats),
+            _best_ms(lambda: json.dumps(data, indent=2), repeats),
+        )]
+        if codec.orjson is not None:
+            orjson = codec.orjson
+            rows.append((
+                "orjson",
+                _best_ms(lambda: orjson.loads(raw), repeats),
+                _best_ms(lambda: orjson.dumps(data, option=orjson.OPT_INDENT_2), repeats),
+            ))
+
+        for name, parse_ms, dump_ms in rows:
+            print(f"{kind:<10} {name:<16} {parse_ms:>10.2f} {dump_ms:>13.2f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
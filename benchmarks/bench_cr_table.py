@@ -0,0 +1,50 @@
+"""Combat Rating of a whole bestiary: per-creature scalar calls vs one CRTable pass.
+
+The bestiary is replicated up to 10,000 creatures. "scalar" rates every creature
+with calculate_cr (both AP modes) and get_creature_role, as the tabs used to do on
+each rerun; "table" gathers the inputs each Creature model keeps (computed when its
+record is loaded) and rates them in one pass; "recompute" is a formula change on an
+existing table. NumPy is used when installed.
+
+Run from the repository root:  python -m benchmarks.bench_cr_table [repeats]
+"""
+import sys
+import timeit
+from constants import BESTIARY_FILE
+from utils import cr_table, packs
+from utils.codec import load_file
+from utils.cr_table import CR_FORMULA, CRTable, calculate_cr, get_creature_role
+from utils.creatures import Creature
+
+SIZES = (399, 10000)
+
+def _creatures(size: int):
+    data = packs.read_all(BESTIARY_FILE) if packs.is_packed(BESTIARY_FILE) else load_file(BESTIARY_FILE)
+    records = list(data.items())
+    creatures = []
+    for i in range(size):
+        key, record = records[i % len(records)]
+        creatures.append(Creature(key if i < len(records) else f"{key} #{i}", record, rated=False))
+    return creatures
+
+def _scalar(creatures):
+    return [(calculate_cr(c.data), calculate_cr(c.data, use_ap_multiplier=True), get_creature_role(c.data))
+            for c in creatures]
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    print(f"backend: {'numpy' if cr_table.np is not None else 'python (numpy not installed)'}")
+    print(f"{'creatures':>9} {'scalar ms':>10} {'table ms':>9} {'recompute ms':>13}")
+    for size in SIZES:
+        creatures = _creatures(size)
+        table = CRTable.from_creatures(creatures)
+        assert list(zip(*table.as_lists())) == _scalar(creatures)
+        scalar_ms = _best_ms(lambda: _scalar(creatures), repeats)
+        table_ms = _best_ms(lambda: CRTable.from_creatures(creatures), repeats)
+        recompute_ms = _best_ms(lambda: table.recompute(CR_FORMULA._replace(level=6.0)), repeats)
+        print(f"{size:>9} {scalar_ms:>10.2f} {table_ms:>9.2f} {recompute_ms:>13.2f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
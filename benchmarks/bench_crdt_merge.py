@@ -0,0 +1,68 @@
+"""Observe/merge/materialize times for characters edited on two devices at once.
+
+Each run starts from one character with a large inventory, edits it concurrently on
+two replicas (damage vs healing, quantity changes, items added and removed) and
+checks that both merge orders converge and that the HP changes add up.
+
+Run from the repository root:  python -m benchmarks.bench_crdt_merge [repeats]
+"""
+import copy
+import sys
+import timeit
+from utils import crdt
+
+SIZES = (100, 1000, 5000)
+BASE_HP = 40
+
+def _character(items: int):
+    return {
+        "id": "char-1", "name": "Vault Dweller", "hp_current": BASE_HP, "hp_max": 40,
+        "stats": {"strength": 6, "perception": 5, "endurance": 7},
+        "inventory": [
+            {"id": f"item-{i}", "name": f"Item {i}", "quantity": 1 + i % 5, "equipped": False}
+            for i in range(items)
+        ],
+    }
+
+def _edit_a(char):
+    char["hp_current"] -= 12  # damage
+    for item in char["inventory"][::10]:
+        item["quantity"] += 1
+    char["inventory"] = char["inventory"][5:]
+    char["inventory"].append({"id": "loot-a", "name": "Stimpak", "quantity": 2})
+
+def _edit_b(char):
+    char["hp_current"] += 5  # healing
+    for item in char["inventory"][::7]:
+        item["quantity"] -= 1
+    char["inventory"][0]["equipped"] = True
+    char["inventory"].append({"id": "loot-b", "name": "RadAway", "quantity": 1})
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 5) -> None:
+    print(f"{'items':>6} {'observe ms':>11} {'merge ms':>9} {'materialize ms':>15}  converged")
+    for size in SIZES:
+        base = [_character(size)]
+        state = crdt.observe(None, base, "a", [1, "a", 0])
+
+        local, remote = copy.deepcopy(base), copy.deepcopy(base)
+        _edit_a(local[0])
+        _edit_b(remote[0])
+        state_a = crdt.observe(state, local, "a", [2, "a", 0])
+        state_b = crdt.observe(state, remote, "b", [3, "b", 0])
+
+        merged = crdt.merge(state_a, state_b)
+        result = crdt.materialize(merged, like=local)[0]
+        ok = (merged == crdt.merge(state_b, state_a)
+              and result["hp_current"] == BASE_HP - 12 + 5
+              and {"loot-a", "loot-b"} <= {i["id"] for i in result["inventory"]})
+
+        observe_ms = _best_ms(lambda: crdt.observe(state, local, "a", [2, "a", 0]), repeats)
+        merge_ms = _best_ms(lambda: crdt.merge(state_a, state_b), repeats)
+        materialize_ms = _best_ms(lambda: crdt.materialize(merged, like=local), repeats)
+        print(f"{size:>6} {observe_ms:>11.2f} {merge_ms:>9.2f} {materialize_ms:>15.2f}  {'yes' if ok else 'NO'}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,76 @@
+"""Memory per creature and filter latency: plain bestiary dicts vs Creature models.
+
+The bestiary is replicated up to 10,000 entries to show how filtering scales. The
+filter is the Scanner's: name search, level range, type and biome/faction tags.
+
+Run from the repository root:  python -m benchmarks.bench_creatures [repeats]
+"""
+import sys
+import timeit
+import tracemalloc
+from constants import BESTIARY_FILE
+from utils import packs
+from utils.codec import load_file
+from utils.creatures import Creature
+from utils.statblock import calculate_cr
+
+SIZES = (399, 10000)
+
+def _bestiary():
+    if packs.is_packed(BESTIARY_FILE):
+        return packs.read_all(BESTIARY_FILE)
+    return load_file(BESTIARY_FILE)
+
+def _scaled(data, size):
+    records = list(data.items())
+    scaled = {}
+    for i in range(size):
+        key, record = records[i % len(records)]
+        scaled[key if i < len(records) else f"{key} #{i}"] = record
+    return scaled
+
+def _filter_dicts(data):
+    result = []
+    for name, stats in data.items():
+        if not isinstance(stats, dict):
+            continue
+        if "a" in name.lower() and 2 <= stats.get("level", 0) <= 20 and stats.get("type") in ("Human", "Creature"):
+            if set(stats.get("factions", [])).intersection(["Raiders"]) or not stats.get("factions"):
+                result.append((name, calculate_cr(stats, use_ap_multiplier=True)))
+    return result
+
+def _filter_models(models):
+    result = []
+    for name, c in models.items():
+        if "a" in name.lower() and 2 <= c.level <= 20 and c.type in ("Human", "Creature"):
+            if "Raiders" in c.factions or not c.factions:
+                result.append((name, c.cr_ap))
+    return result
+
+def _model_bytes(data) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    models = {k: Creature(k, v) for k, v in data.items()}
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del models
+    return used / len(data)
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    data = _bestiary()
+    print(f"Model overhead per creature (on top of the shared record): {_model_bytes(data):,.0f} bytes")
+    print(f"{'creatures':>9} {'dict filter ms':>15} {'model filter ms':>16} {'build ms':>9}")
+    for size in SIZES:
+        scaled = _scaled(data, size)
+        models = {k: Creature(k, v) for k, v in scaled.items()}
+        assert _filter_dicts(scaled) == _filter_models(models)
+        dict_ms = _best_ms(lambda: _filter_dicts(scaled), repeats)
+        model_ms = _best_ms(lambda: _filter_models(models), repeats)
+        build_ms = _best_ms(lambda: {k: Creature(k, v) for k, v in scaled.items()}, max(1, repeats // 5))
+        print(f"{size:>9} {dict_ms:>15.2f} {model_ms:>16.2f} {build_ms:>9.1f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,60 @@
+"""Batch encounter generation: throughput by worker count.
+
+The bundled bestiary tags only a few creatures with biomes and sites, so the batch is
+synthetic: 120 biome/site pairs of 60 random bestiary creatures each, at the four
+difficulties against a party CR of 400 (480 encounters, nothing saved), with random
+and exact fill. Each worker count runs the same seeded batch; "same" checks that
+every encounter matches the single-process run.
+
+Run from the repository root:  python -m benchmarks.bench_encounter_batch [repeats]
+"""
+import os
+import random
+import sys
+import time
+from constants import BESTIARY_FILE
+from utils import packs
+from utils.codec import load_file
+from utils.creatures import Creature
+from utils.encounter_batch import BatchJob, BatchSettings, build_pool, run_batch
+from utils.encounter_generator import DIFFICULTY_MULTIPLIERS
+from utils.rng import derive_seed
+
+PAIRS = 120
+PER_PAIR = 60
+PARTY_CR = 400
+
+def _jobs(names, batch_seed: int = 1):
+    rng = random.Random(batch_seed)
+    jobs = []
+    for pair in range(PAIRS):
+        biome, site = f"Biome {pair // 10}", f"Site {pair % 10}"
+        candidates = tuple(sorted(rng.sample(names, min(PER_PAIR, len(names)))))
+        for difficulty, multiplier in DIFFICULTY_MULTIPLIERS.items():
+            jobs.append(BatchJob(biome, site, difficulty, int(PARTY_CR * multiplier),
+                                 derive_seed(batch_seed, biome, site, difficulty), candidates))
+    return jobs
+
+def _run(jobs, pool, settings, workers: int):
+    start = time.perf_counter()
+    entries = {p.entry["seed"]: p.entry["threats"] for p in run_batch(jobs, pool, settings, workers=workers, filepath=None)}
+    return time.perf_counter() - start, entries
+
+def run(repeats: int = 3) -> None:
+    data = packs.read_all(BESTIARY_FILE) if packs.is_packed(BESTIARY_FILE) else load_file(BESTIARY_FILE)
+    pool = build_pool(Creature(key, record) for key, record in data.items())
+    jobs = _jobs(sorted(pool))
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"{len(jobs)} encounters, {os.cpu_count()} cores")
+    print(f"{'mode':>6} {'workers':>7} {'seconds':>8} {'per second':>11} {'same':>5}")
+    for mode, settings in (("random", BatchSettings()), ("exact", BatchSettings(exact_fill=True))):
+        baseline = None
+        for workers in counts:
+            results = [_run(jobs, pool, settings, workers) for _ in range(repeats)]
+            seconds = min(r[0] for r in results)
+            if baseline is None:
+                baseline = results[0][1]
+            print(f"{mode:>6} {workers:>7} {seconds:>8.2f} {len(jobs) / seconds:>11.0f} {str(results[0][1] == baseline):>5}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,97 @@
+"""Budget encounter generation: the old inline Scanner loop vs EncounterGenerator.
+
+Candidates are the bestiary's (name, CR, role) replicated to 400 and 10,000 entries,
+with weight bias, group multiplier and role synergy tax all on. Each run generates
+one encounter for a typical budget (600) and a large one (5,000), overflow 15%.
+"engine" includes building the generator from the pool; the mean fill ratio of
+both versions is printed as a sanity check that they behave alike.
+
+Run from the repository root:  python -m benchmarks.bench_encounter_generator [repeats]
+"""
+import random
+import sys
+import timeit
+from constants import BESTIARY_FILE
+from utils import packs
+from utils.codec import load_file
+from utils.creatures import Creature
+from utils.encounter_generator import EncounterGenerator
+
+SIZES = (400, 10000)
+BUDGETS = (600, 5000)
+
+def _pool(size: int):
+    data = packs.read_all(BESTIARY_FILE) if packs.is_packed(BESTIARY_FILE) else load_file(BESTIARY_FILE)
+    creatures = [Creature(key, record) for key, record in data.items()]
+    return [{"name": f"{c.key} #{i}", "cr": c.cr, "role": c.role}
+            for i, c in ((i, creatures[i % len(creatures)]) for i in range(size))]
+
+def _legacy(pool, actual_budget, overflow_allowance):
+    # The loop render_scanner ran inline before EncounterGenerator
+    best_generated = []
+    best_remaining = actual_budget
+    for _ in range(10):
+        current_budget = actual_budget
+        generated = []
+        attempts = 0
+        while current_budget > 0 and attempts < 50:
+            affordable = [x for x in pool if x["cr"] <= (current_budget + overflow_allowance)]
+            if not affordable:
+                break
+            pick = random.choices(affordable, weights=[item["cr"] for item in affordable], k=1)[0]
+            final_cost = pick["cr"]
+            total_enemies_so_far = sum(item["count"] for item in generated)
+            if total_enemies_so_far > 0:
+                final_cost *= (1.0 + (total_enemies_so_far * 0.08))
+            roles_present = set()
+            for gen_item in generated:
+                p_data = next((p for p in pool if p["name"] == gen_item["name"]), None)
+                if p_data: roles_present.add(p_data["role"])
+            if (pick["role"] == "Striker" and "Tank" in roles_present) or \
+               (pick["role"] == "Tank" and "Striker" in roles_present):
+                final_cost *= 1.15
+            if final_cost > (current_budget + overflow_allowance):
+                attempts += 1
+                continue
+            existing = next((x for x in generated if x["name"] == pick["name"]), None)
+            if existing:
+                existing["count"] += 1
+            else:
+                generated.append({"name": pick["name"], "count": 1})
+            current_budget -= int(final_cost)
+            attempts += 1
+        filled = actual_budget - current_budget
+        if filled > (actual_budget - best_remaining):
+            best_generated = generated
+            best_remaining = current_budget
+        if filled / actual_budget >= 0.70:
+            break
+    return best_generated, best_remaining
+
+def _engine(pool, budget):
+    generator = EncounterGenerator((p["name"], p["cr"], p["role"]) for p in pool)
+    return generator.generate(budget, int(budget * 0.15))
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def _mean_fill(func, budget: int, runs: int) -> float:
+    return sum(budget - func()[1] for _ in range(runs)) / runs / budget
+
+def run(repeats: int = 20) -> None:
+    random.seed(1)
+    print(f"{'candidates':>10} {'budget':>7} {'legacy ms':>10} {'engine ms':>10} {'legacy fill':>12} {'engine fill':>12}")
+    for size in SIZES:
+        pool = _pool(size)
+        for budget in BUDGETS:
+            overflow = int(budget * 0.15)
+            legacy = lambda: _legacy(pool, budget, overflow)
+            engine = lambda: _engine(pool, budget)
+            legacy_ms = _best_ms(legacy, max(1, repeats // 4))
+            engine_ms = _best_ms(engine, repeats)
+            runs = 100 if size < 1000 else 10
+            print(f"{size:>10} {budget:>7} {legacy_ms:>10.2f} {engine_ms:>10.2f} "
+                  f"{_mean_fill(legacy, budget, runs):>12.1%} {_mean_fill(engine, budget, runs):>12.1%}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
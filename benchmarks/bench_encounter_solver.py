@@ -0,0 +1,66 @@
+"""Exact-fill budget solver: time per encounter and how close it lands to the budget.
+
+Candidates are the whole bestiary (CR, role, factions). Each run solves one encounter
+with the group multiplier on, plain, with faction coherence and with the role synergy
+tax, at the default limits (8 creatures, 3 species) and at the largest ones the
+Scanner offers. "cold ms" builds the count tables from scratch; "warm ms" reuses them,
+as when generating again with the same filters. The random fill (EncounterGenerator)
+is timed on the same pool for reference; "miss" is the mean distance from the
+budget, as a share of it.
+
+Run from the repository root:  python -m benchmarks.bench_encounter_solver [repeats]
+"""
+import random
+import sys
+import timeit
+from constants import BESTIARY_FILE
+from utils import encounter_solver, packs
+from utils.codec import load_file
+from utils.creatures import Creature
+from utils.encounter_generator import EncounterGenerator
+from utils.encounter_solver import (MAX_CREATURES, MAX_CREATURES_LIMIT, MAX_SPECIES, MAX_SPECIES_LIMIT,
+                                    SolverCandidate, solve_budget)
+
+BUDGETS = (300, 1000, 3000)
+LIMITS = ((MAX_CREATURES, MAX_SPECIES), (MAX_CREATURES_LIMIT, MAX_SPECIES_LIMIT))
+MODES = {
+    "plain": {},
+    "faction": {"faction_coherence": True},
+    "synergy": {"role_synergy_tax": True},
+}
+
+def _pool():
+    data = packs.read_all(BESTIARY_FILE) if packs.is_packed(BESTIARY_FILE) else load_file(BESTIARY_FILE)
+    creatures = [Creature(key, record) for key, record in data.items()]
+    return [SolverCandidate(c.key, c.cr, c.role, c.factions) for c in creatures]
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def _mean_miss(func, budget: int, runs: int) -> float:
+    return sum(abs(func()[1]) for _ in range(runs)) / runs / budget
+
+def _cold(func):
+    def run():
+        encounter_solver._TABLES.clear()
+        return func()
+    return run
+
+def run(repeats: int = 10) -> None:
+    random.seed(1)
+    pool = _pool()
+    print(f"{len(pool)} candidates")
+    print(f"{'budget':>7} {'limits':>7} {'mode':>8} {'cold ms':>8} {'warm ms':>8} {'solver miss':>12} {'random ms':>10} {'random miss':>12}")
+    for budget in BUDGETS:
+        generator = lambda: EncounterGenerator((c.name, c.cr, c.role) for c in pool).generate(budget, int(budget * 0.15))
+        random_ms = _best_ms(generator, repeats)
+        random_miss = _mean_miss(generator, budget, 20)
+        for creatures, species in LIMITS:
+            for mode, options in MODES.items():
+                solver = lambda: solve_budget(pool, budget, max_creatures=creatures, max_species=species, **options)
+                print(f"{budget:>7} {f'{creatures}/{species}':>7} {mode:>8} {_best_ms(_cold(solver), repeats):>8.2f} "
+                      f"{_best_ms(solver, repeats):>8.2f} {_mean_miss(solver, budget, 20):>12.1%} "
+                      f"{random_ms:>10.2f} {random_miss:>12.1%}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
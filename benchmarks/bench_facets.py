@@ -0,0 +1,79 @@
+"""Bestiary filter latency at scale: linear scan vs the bitset facet index.
+
+The real bestiary is replicated up to 10,000 creatures and given synthetic biome,
+site and faction tags so that tag filters have something to match. The query is a
+Bestiary tab search: two types, two biomes, one faction and a level range, plus
+the per-option counts shown next to every biome.
+
+Run from the repository root:  python -m benchmarks.bench_facets [repeats]
+"""
+import random
+import sys
+import timeit
+from constants import BESTIARY_FILE
+from utils import packs
+from utils.codec import load_file
+from utils.creatures import Creature
+from utils.facets import FacetIndex
+
+SIZES = (399, 10000)
+BIOMES = ["Desert", "Forest", "Swamp", "Urban Ruins", "Mountains", "Coast", "Glowing Sea", "Vault"]
+SITES = ["Cave", "Factory", "Bunker", "Settlement", "Highway"]
+FACTIONS = ["Raiders", "Brotherhood", "Enclave", "Gunners", "Super Mutants", "Institute"]
+FILTERS = {"type": ["Human", "Creature"], "biome": ["Desert", "Urban Ruins"], "faction": ["Raiders"]}
+LEVEL = (2, 30)
+
+def _creatures(size: int):
+    data = packs.read_all(BESTIARY_FILE) if packs.is_packed(BESTIARY_FILE) else load_file(BESTIARY_FILE)
+    records = list(data.items())
+    rng = random.Random(7)
+    creatures = {}
+    for i in range(size):
+        key, record = records[i % len(records)]
+        record = dict(record)
+        record["biomes"] = rng.sample(BIOMES, rng.randint(1, 3))
+        record["sites"] = rng.sample(SITES, rng.randint(0, 2))
+        record["factions"] = rng.sample(FACTIONS, rng.randint(0, 1))
+        key = key if i < len(records) else f"{key} #{i}"
+        creatures[key] = Creature(key, record)
+    return creatures
+
+def _scan(creatures):
+    names = []
+    for name, c in creatures.items():
+        if c.type not in FILTERS["type"] or not LEVEL[0] <= c.level <= LEVEL[1]:
+            continue
+        if not set(c.biomes).intersection(FILTERS["biome"]) or not set(c.factions).intersection(FILTERS["faction"]):
+            continue
+        names.append(name)
+    names.sort()
+    counts = {}
+    for b in BIOMES:
+        counts[b] = sum(1 for c in creatures.values()
+                        if b in c.biomes and c.type in FILTERS["type"] and LEVEL[0] <= c.level <= LEVEL[1]
+                        and set(c.factions).intersection(FILTERS["faction"]))
+    return names, counts
+
+def _indexed(index):
+    names = index.names(index.query(FILTERS, LEVEL))
+    counts = index.counts("biome", index.query(FILTERS, LEVEL, exclude="biome"))
+    return names, counts
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    print(f"{'creatures':>9} {'matches':>8} {'scan ms':>8} {'bitset ms':>10} {'query only ms':>14} {'build ms':>9}")
+    for size in SIZES:
+        creatures = _creatures(size)
+        index = FacetIndex(creatures)
+        names, counts = _indexed(index)
+        assert (names, counts) == _scan(creatures)
+        scan_ms = _best_ms(lambda: _scan(creatures), repeats)
+        bitset_ms = _best_ms(lambda: _indexed(index), repeats)
+        query_ms = _best_ms(lambda: index.query(FILTERS, LEVEL), repeats)
+        build_ms = _best_ms(lambda: FacetIndex(creatures), max(1, repeats // 5))
+        print(f"{size:>9} {len(names):>8} {scan_ms:>8.2f} {bitset_ms:>10.3f} {query_ms:>14.4f} {build_ms:>9.1f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
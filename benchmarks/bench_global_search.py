@@ -0,0 +1,50 @@
+"""Global search: first build, query latency and the cost of a save.
+
+Indexes every data file once, then times typical sidebar queries and the refresh
+after saving one item (with its id, and as a whole-file save that has to be diffed).
+Saves are written to a temporary copy of the data directory.
+
+Run from the repository root:  python -m benchmarks.bench_global_search [repeats]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+QUERIES = ("deathclw", "10mm", "stimpak", "plasma rifl", "manual scan", "acid")
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    workdir = tempfile.mkdtemp()
+    shutil.copytree("data", os.path.join(workdir, "data"))
+    os.chdir(workdir)
+    try:
+        from constants import ITEM_FILE
+        from utils import global_search
+        from utils.data_manager import load_data, save_data, flush_saves
+
+        start = time.perf_counter()
+        global_search.search("x")
+        print(f"first build: {(time.perf_counter() - start) * 1000:.0f} ms, {len(global_search._INDEX)} records")
+        for query in QUERIES:
+            hits = global_search.search(query)
+            ms = _best_ms(lambda: global_search.search(query), repeats)
+            print(f"  {query!r:<16} {len(hits):>4} hits {ms:>7.2f} ms")
+
+        items = load_data(ITEM_FILE)
+        for label, keys in (("save with id", [items[0]["id"]]), ("whole-file save", None)):
+            items[0]["description"] = f"edited by {label}"
+            save_data(ITEM_FILE, items, keys)
+            start = time.perf_counter()
+            global_search.search("edited")
+            print(f"refresh after {label}: {(time.perf_counter() - start) * 1000:.2f} ms")
+        flush_saves()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
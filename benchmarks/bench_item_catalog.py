@@ -0,0 +1,42 @@
+"""Loot name resolution: the old next(...) scans vs the cached item catalog.
+
+Resolves the loot of a generated encounter (decay and dice notes, plurals and a
+name that is not in the database) the way the DM screen's "Give" buttons do.
+
+Run from the repository root:  python -m benchmarks.bench_item_catalog [repeats]
+"""
+import sys
+import timeit
+from constants import ITEM_FILE
+from utils import packs
+from utils.codec import load_file
+from utils.item_catalog import ItemCatalog
+
+LOOT = ["cloth armor (Decay: 7) [1d6+2 levels of decay]", "10mm pistol (Decay: 4) [1d4+2 levels of decay]",
+        "10mm rounds [2d8]", "frag grenade [1]", "Stimpaks", "Energy Cell", "caps [2d8]"]
+
+def _scan(db, name):
+    # The lookup _render_loot_list used to run on every click
+    clean = name.split(" (Decay")[0].strip()
+    found = next((x for x in db if x.get("name") == clean), None)
+    if not found:
+        found = next((x for x in db if x.get("name", "").lower() == clean.lower()), None)
+    if not found and clean.lower().endswith("s"):
+        found = next((x for x in db if x.get("name", "").lower() == clean[:-1].lower()), None)
+    return found
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    db = packs.read_all(ITEM_FILE) if packs.is_packed(ITEM_FILE) else load_file(ITEM_FILE)
+    catalog = ItemCatalog(db)
+    scanned = sum(_scan(db, name) is not None for name in LOOT)
+    found, missing = catalog.resolve(LOOT)
+    print(f"{len(db)} items, {len(LOOT)} loot names")
+    print(f"  scans:   {scanned} resolved, {_best_ms(lambda: [_scan(db, n) for n in LOOT], repeats):.3f} ms")
+    print(f"  catalog: {len(found)} resolved, {_best_ms(lambda: catalog.resolve(LOOT), repeats):.3f} ms"
+          f" (build {_best_ms(lambda: ItemCatalog(db), repeats):.2f} ms), unresolved: {missing}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
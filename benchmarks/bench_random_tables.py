@@ -0,0 +1,58 @@
+"""Weighted random tables: alias draws against random.choices and a cumulative scan.
+
+Each table has N rows with random integer weights (1-100). "alias" is
+AliasTable.draw (compiled once), "choices" is random.choices with precomputed
+cumulative weights (a bisect per draw), and "scan" walks the cumulative weights
+linearly, as a hand-rolled table roller would. Times are for 10000 draws; "build" is
+the one-off compile of the alias table. The bundled biome tables are then rolled
+with TableSet.roll.
+
+Run from the repository root:  python -m benchmarks.bench_random_tables [repeats]
+"""
+import itertools
+import os
+import random
+import sys
+import timeit
+from constants import ENCOUNTER_TABLES_FILE, LOOT_TABLES_FILE
+from utils.random_tables import AliasTable, get_tables
+from utils.rng import Stream
+
+SIZES = (6, 50, 500, 5000)
+DRAWS = 10000
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def _scan(cum, total, rng) -> int:
+    x = rng.random() * total
+    for i, c in enumerate(cum):
+        if x < c:
+            return i
+    return len(cum) - 1
+
+def run(repeats: int = 5) -> None:
+    rng = random.Random(1)
+    print(f"{'rows':>6} {'build ms':>9} {'alias ms':>9} {'choices ms':>11} {'scan ms':>8}")
+    for size in SIZES:
+        weights = [rng.randint(1, 100) for _ in range(size)]
+        cum = list(itertools.accumulate(weights))
+        population = range(size)
+        build = _best_ms(lambda: AliasTable(weights), repeats)
+        table = AliasTable(weights)
+        alias = _best_ms(lambda: [table.draw(rng) for _ in range(DRAWS)], repeats)
+        choices = _best_ms(lambda: [random.choices(population, cum_weights=cum)[0] for _ in range(DRAWS)], repeats)
+        scan = _best_ms(lambda: [_scan(cum, cum[-1], rng) for _ in range(DRAWS)], repeats)
+        print(f"{size:>6} {build:>9.3f} {alias:>9.2f} {choices:>11.2f} {scan:>8.2f}")
+
+    print()
+    print(f"{'file':>12} {'table':>16} {'roll x10 ms':>12}")
+    for path in (ENCOUNTER_TABLES_FILE, LOOT_TABLES_FILE):
+        tables = get_tables(path)
+        for name in tables.names():
+            stream = Stream(1, "bench")
+            ms = _best_ms(lambda: tables.roll(name, 10, stream), repeats)
+            print(f"{os.path.basename(path):>12} {name:>16} {ms:>12.3f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
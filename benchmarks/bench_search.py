@@ -0,0 +1,57 @@
+"""Fuzzy bestiary search: index build, query latency and single-creature updates.
+
+The bestiary is replicated up to 10,000 creatures. Queries include typos and
+partial words the way they arrive from a search-as-you-type box; the name
+substring scan the tabs used before is timed for comparison.
+
+Run from the repository root:  python -m benchmarks.bench_search [repeats]
+"""
+import sys
+import timeit
+from constants import BESTIARY_FILE
+from utils import packs
+from utils.codec import load_file
+from utils.creatures import Creature
+from utils.search import SearchIndex, creature_fields
+
+SIZES = (399, 10000)
+QUERIES = ("d", "dea", "deathclw", "plasma", "mirelurk qeen", "supr mutant")
+
+def _creatures(size: int):
+    data = packs.read_all(BESTIARY_FILE) if packs.is_packed(BESTIARY_FILE) else load_file(BESTIARY_FILE)
+    records = list(data.items())
+    creatures = {}
+    for i in range(size):
+        key, record = records[i % len(records)]
+        key = key if i < len(records) else f"{key} #{i}"
+        creatures[key] = Creature(key, record)
+    return creatures
+
+def _build(creatures) -> SearchIndex:
+    index = SearchIndex()
+    for key, creature in creatures.items():
+        index.add(key, creature_fields(creature), creature.name)
+    return index
+
+def _best_ms(func, repeats: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+def run(repeats: int = 20) -> None:
+    for size in SIZES:
+        creatures = _creatures(size)
+        index = _build(creatures)
+        build_ms = _best_ms(lambda: _build(creatures), max(1, repeats // 10))
+        key, creature = next(iter(creatures.items()))
+        update_ms = _best_ms(lambda: index.add(key, creature_fields(creature), creature.name), repeats)
+        print(f"\n{size} creatures: build {build_ms:.0f} ms, re-index one creature {update_ms:.3f} ms")
+        print(f"  {'query':<16} {'hits':>5} {'fuzzy ms':>9} {'substring ms':>13}  top hit")
+        lower = [k.lower() for k in creatures]
+        for query in QUERIES:
+            hits = index.search(query)
+            fuzzy_ms = _best_ms(lambda: index.search(query), repeats)
+            scan_ms = _best_ms(lambda: [k for k in lower if query in k], repeats)
+            top = hits[0][0] if hits else "-"
+            print(f"  {query!r:<16} {len(hits):>5} {fuzzy_ms:>9.2f} {scan_ms:>13.2f}  {top}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -7,4 +7,56 @@ CHARACTERS_FILE = os.path.join(DATA_DIR, "characters.json")
 ITEM_FILE = os.path.join(DATA_DIR, "items.json")
 PERKS_FILE = os.path.join(DATA_DIR, "perks.json")
 RECIPES_FILE = os.path.join(DATA_DIR, "recipes.json")
-DM_SCREEN_FILE = os.path.join(DATA_DIR, "dm_screen.json")
\ No newline at end of file
+DM_SCREEN_FILE = os.path.join(DATA_DIR, "dm_screen.json")
+ENCOUNTER_TABLES_FILE = os.path.join(DATA_DIR, "encounters.json")
+LOOT_TABLES_FILE = os.path.join(DATA_DIR, "loot.json")
+
+# --- STORAGE BACKEND ---
+# "json" keeps the flat files in DATA_DIR as the source of truth.
+# "sqlite" stores one row per record in DB_FILE (see utils/storage.py).
+STORAGE_BACKEND = os.environ.get("WASTELAND_STORAGE", "json").lower()
+DB_FILE = os.path.join(DATA_DIR, "wasteland.db")
+
+# --- CACHE BUS ---
+# Append-only log shared by every server process on this host. A save in one
+# worker is picked up by the others' poll threads, which bump only that file's
+# cache version (see utils/cache_bus.py).
+CACHE_BUS_FILE = os.path.join(DATA_DIR, "cache_bus.log")
+CACHE_BUS_POLL_SECONDS = float(os.environ.get("WASTELAND_CACHE_BUS_POLL", "0.05"))
+CACHE_BUS_MAX_BYTES = 256 * 1024
+
+# --- SAVE QUEUE ---
+# Saves to the same JSON file within this window are coalesced into one write by a
+# background writer thread (see utils/save_queue.py). 0 writes synchronously.
+SAVE_DEBOUNCE_SECONDS = float(os.environ.get("WASTELAND_SAVE_DEBOUNCE", "0.25"))
+# Number of server processes sharing DATA_DIR. With more than one, revision-checked
+# character writes are flushed to disk before their file lock is released.
+SERVER_WORKERS = int(os.environ.get("WASTELAND_WORKERS", "1"))
+
+# --- CHARACTER JOURNAL ---
+# Field-level patches (HP, SP, rads...) are appended here instead of rewriting
+# characters.json; reads replay them and a background compaction folds them back.
+CHARACTERS_JOURNAL_FILE = os.path.join(DATA_DIR, "characters.journal.jsonl")
+JOURNAL_COMPACT_BYTES = 64 * 1024
+
+# --- CONTENT PACKS ---
+# The bestiary and the item list are split into one file per creature source / item
+# category under PACKS_DIR; only the enabled packs are loaded (see utils/packs.py).
+PACKS_DIR = os.path.join(DATA_DIR, "packs")
+PACKS_MANIFEST_FILE = os.path.join(PACKS_DIR, "manifest.json")
+
+# --- CLOUD SYNC ---
+# Where Push/Pull sync to: a directory (shared folder, local stand-in) or the URL of
+# a sync server started with `python -m utils.cloud_sync serve <dir>`.
+CLOUD_SYNC_URL = os.environ.get("WASTELAND_SYNC_URL", "")
+# Objects downloaded by an unfinished pull, reused when it is retried
+SYNC_CACHE_DIR = os.path.join(DATA_DIR, "sync_cache")
+# Root this copy last synced with, per remote: the common base of the next push/pull
+SYNC_BASE_FILE = os.path.join(DATA_DIR, "sync_base.json")
+
+# --- MERGEABLE CHARACTERS ---
+# Cloud sync exchanges characters as CRDT state (see utils/crdt.py) so edits made on
+# several devices between syncs merge field by field instead of overwriting.
+CHARACTERS_CRDT_FILE = os.path.join(DATA_DIR, "characters.crdt.json")
+# Identifies this installation in the CRDT state
+REPLICA_ID_FILE = os.path.join(DATA_DIR, "replica_id")
@@ -1,9 +1,11 @@
 import streamlit as st
 from tabs import utilities, encounters, bestiary, charactersheet, database_editor, dm_screen
-from utils.data_manager import load_data, save_data, push_to_cloud, pull_from_cloud
-from utils.statblock import render_statblock
-from utils.character_components import render_character_statblock
-from constants import BESTIARY_FILE, CHARACTERS_FILE
+from utils.data_manager import load_record, invalidate_cache, get_cache_stats
+from utils.cloud_sync import push_to_cloud, pull_from_cloud, describe_stats
+from utils.statblock import render_statblock, view_statblock_dialog
+from utils.global_search import search as global_search, get_hit_record
+from utils.character_components import render_character_statblock, get_live_character
+from constants import BESTIARY_FILE
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="Wasteland Assistant", page_icon="☢️", layout="wide")
@@ -101,18 +103,18 @@ if "popout" in st.query_params:
             """, unsafe_allow_html=True)
         target_id = st.query_params.get("id")
         if target_id:
-            data = load_data(BESTIARY_FILE)
-            if target_id in data:
-                render_statblock(target_id, data[target_id])
+            # Reads just this creature, not the whole bestiary
+            creature = load_record(BESTIARY_FILE, target_id)
+            if creature is not None:
+                render_statblock(target_id, creature)
             else:
                 # Fallback to characters
                 @st.fragment(run_every=2)
                 def render_player_popout(target_name):
-                    chars = load_data(CHARACTERS_FILE)
-                    char_idx = next((i for i, c in enumerate(chars) if c.get("name") == target_name), -1)
+                    # Re-read only when this character changed
+                    char_data, _ = get_live_character(f"popout_char_{target_name}", name=target_name)
                     
-                    if char_idx != -1:
-                        char_data = chars[char_idx]
+                    if char_data is not None:
                         render_statblock(target_name, char_data)
                     else:
                         st.error(f"Entity '{target_name}' not found.")
@@ -123,6 +125,23 @@ if "popout" in st.query_params:
 def navigate_to(page):
     st.session_state["navigation"] = page
 
+@st.dialog("Search Result")
+def search_hit_dialog(hit):
+    record = get_hit_record(hit)
+    if record is None:
+        st.warning(f"**{hit.label}** is no longer in the database.")
+        return
+    st.markdown(f"### {hit.icon} {hit.label}")
+    st.caption(hit.detail)
+    if hit.kind == "encounter":
+        st.markdown("**Threats:** " + ", ".join(f"{n}x {name}" for name, n in (record.get("threats") or {}).items()))
+        st.markdown("**Loot:** " + ", ".join(f"{n}x {name}" for name, n in (record.get("loot") or {}).items()))
+        st.caption(f"Cost: {record.get('cost', 0)}")
+    elif record.get("description"):
+        st.markdown(record["description"])
+    with st.expander("Raw Data"):
+        st.json(record)
+
 # --- SIDEBAR NAVIGATION ---
 with st.sidebar:
     st.title("Pip-Boy 3000")
@@ -135,6 +154,20 @@ with st.sidebar:
         st.session_state.theme_mode = "Dark"
     st.radio("Mode", ["Dark", "Light"], horizontal=True, key="theme_mode")
     st.divider()
+
+    # --- GLOBAL SEARCH ---
+    search_query = st.text_input("🔎 Search", placeholder="Creatures, items, perks, logs...", key="global_search")
+    if search_query:
+        hits = global_search(search_query, limit=8)
+        if not hits:
+            st.caption("No matches.")
+        for hit in hits:
+            if st.button(f"{hit.icon} {hit.label}", help=hit.detail, key=f"gs_{hit.filepath}_{hit.key}"):
+                if hit.kind == "creature":
+                    view_statblock_dialog(hit.key, get_hit_record(hit))
+                else:
+                    search_hit_dialog(hit)
+    st.divider()
     
     # --- CLOUD SYNC ---
     st.markdown("### ☁️ Database")
@@ -142,11 +175,15 @@ with st.sidebar:
     if c_pull.button("⬇️ Pull", help="Overwrite local data with cloud data"):
         if pull_from_cloud():
             st.cache_data.clear()
+            invalidate_cache()
             st.rerun()
             
     if c_push.button("⬆️ Push", help="Save local data to cloud"):
         push_to_cloud()
 
+    if "cloud_sync_stats" in st.session_state:
+        st.caption(describe_stats(st.session_state["cloud_sync_stats"]))
+
 # Global Back Button
 if app_mode != "🏠 Home" and app_mode != "🖥️ DM Screen (WIP)":
     c_back, c_title = st.columns([1, 5], vertical_alignment="center")
@@ -206,8 +243,16 @@ if app_mode == "🏠 Home":
     
     if st.button("🔄 Clear Cache & Reload Data", use_container_width=True):
         st.cache_data.clear()
+        invalidate_cache()
         st.rerun()
 
+    with st.expander("📊 Data Cache"):
+        cache_stats = get_cache_stats()
+        if cache_stats:
+            st.dataframe(cache_stats, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No data files loaded yet.")
+
 elif app_mode == "☢️ Scanner":
     encounters.render()
 elif app_mode == "📖 Bestiary":
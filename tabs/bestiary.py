@@ -1,5 +1,8 @@
 import streamlit as st
-from utils.data_manager import load_data
+from utils.data_manager import load_static
+from utils.creatures import load_creatures
+from utils.facets import get_facet_index, with_counts
+from utils.search import search_creatures
 from utils.statblock import render_statblock, view_statblock_dialog
 from constants import BESTIARY_FILE
 
@@ -7,23 +10,36 @@ from constants import BESTIARY_FILE
 def render_bestiary() -> None:
     # The main function to render the Bestiary tab.
     
-    bestiary_data = load_data(BESTIARY_FILE)
+    bestiary_data = load_static(BESTIARY_FILE)
     
     if not bestiary_data:
-        st.error("Bestiary data (`bestiary.json`) not found in `data` folder!")
+        st.error("Bestiary data not found in `data` folder (or every bestiary pack is switched off)!")
         return
         
     if not isinstance(bestiary_data, dict):
         st.error("⚠️ Error: Bestiary data is formatted as a List, but must be a Dictionary. If you pasted new creatures, ensure they are inside the main `{}` object and keyed by name.")
         return
 
+    creatures = load_creatures(BESTIARY_FILE)
+    index = get_facet_index(BESTIARY_FILE)
+
     # --- PREPARE FILTER DATA ---
-    all_sources = sorted({item.get("source", "Unknown") for item in bestiary_data.values() if isinstance(item, dict)})
-    all_types = sorted({item.get("type", "Unknown") for item in bestiary_data.values() if isinstance(item, dict)})
-    all_sizes = sorted({item.get("size", "Unknown") for item in bestiary_data.values() if isinstance(item, dict) if "size" in item})
-    all_biomes = sorted({b for item in bestiary_data.values() if isinstance(item, dict) for b in item.get("biomes", [])})
-    all_sites = sorted({s for item in bestiary_data.values() if isinstance(item, dict) for s in item.get("sites", [])})
-    all_factions = sorted({f for item in bestiary_data.values() if isinstance(item, dict) for f in item.get("factions", [])})
+    # Selections from the last rerun, so each filter can show how many creatures
+    # every option would leave given the other filters
+    facet_keys = {
+        "source": "bestiary_filter_source", "size": "bestiary_filter_size", "type": "bestiary_filter_type",
+        "biome": "bestiary_filter_biome", "site": "bestiary_filter_site", "faction": "bestiary_filter_faction",
+        "subtype": "bestiary_filter_subtype",
+    }
+    selected = {facet: st.session_state.get(key, []) for facet, key in facet_keys.items()}
+    level_range = st.session_state.get("bestiary_filter_level", (0, 100))
+    search_state = st.session_state.get("bestiary_search", "")
+    search_mask = index.keys_mask(search_creatures(search_state)) if search_state else None
+
+    def facet_filter(label, facet, options=None, **kwargs):
+        counts = index.counts(facet, index.query(selected, level_range, search_mask, exclude=facet))
+        return st.multiselect(label, options=index.values(facet) if options is None else options,
+                              format_func=with_counts(counts), key=facet_keys[facet], **kwargs)
 
     # --- LAYOUT & SEARCH ---
     left_col, right_col = st.columns([1, 2])
@@ -33,65 +49,32 @@ def render_bestiary() -> None:
         search_term = st.text_input("Search Creatures...", key="bestiary_search")
         
         with st.expander("Filters", expanded=False):
-            filter_source = st.multiselect("Source", options=all_sources, key="bestiary_filter_source")
-            filter_size = st.multiselect("Size", options=all_sizes, key="bestiary_filter_size")
-            filter_type = st.multiselect("Type", options=all_types, key="bestiary_filter_type")
-            filter_biome = st.multiselect("Biome", options=all_biomes, key="bestiary_filter_biome")
-            filter_site = st.multiselect("Site", options=all_sites, key="bestiary_filter_site")
-            filter_faction = st.multiselect("Faction", options=all_factions, key="bestiary_filter_faction")
+            filter_source = facet_filter("Source", "source")
+            filter_size = facet_filter("Size", "size")
+            filter_type = facet_filter("Type", "type")
+            filter_biome = facet_filter("Biome", "biome")
+            filter_site = facet_filter("Site", "site")
+            filter_faction = facet_filter("Faction", "faction")
             
             # Dynamic Subtypes based on Type selection
             if filter_type:
-                relevant_subtypes = {
-                    item.get("subtype") 
-                    for item in bestiary_data.values() 
-                    if isinstance(item, dict) and item.get("type", "Unknown") in filter_type and item.get("subtype")
-                }
-                all_subtypes = sorted(relevant_subtypes)
+                type_counts = index.counts("subtype", index.mask("type", filter_type))
+                all_subtypes = sorted(v for v, n in type_counts.items() if n)
             else:
                 all_subtypes = []
             
-            filter_subtype = st.multiselect("Subtype", options=all_subtypes, key="bestiary_filter_subtype", disabled=(not all_subtypes))
+            filter_subtype = facet_filter("Subtype", "subtype", options=all_subtypes, disabled=(not all_subtypes))
             filter_level = st.slider("Level Range", 0, 100, (0, 100), key="bestiary_filter_level")
 
-        # Filter Logic
-        filtered_creatures = {}
-        for name, data in bestiary_data.items():
-            # Text Search
-            if search_term and search_term.lower() not in name.lower():
-                continue
-            # Source Filter
-            if filter_source and data.get("source", "Unknown") not in filter_source:
-                continue
-            # Size Filter
-            if filter_size and data.get("size", "Unknown") not in filter_size:
-                continue
-            # Type Filter
-            if filter_type and data.get("type", "Unknown") not in filter_type:
-                continue
-            # Biome Filter
-            if filter_biome:
-                if not set(data.get("biomes", [])).intersection(filter_biome):
-                    continue
-            # Site Filter
-            if filter_site:
-                if not set(data.get("sites", [])).intersection(filter_site):
-                    continue
-            # Faction Filter
-            if filter_faction:
-                if not set(data.get("factions", [])).intersection(filter_faction):
-                    continue
-            # Subtype Filter
-            if filter_subtype and data.get("subtype") not in filter_subtype:
-                continue
-            # Level Filter
-            level = data.get("level", 0)
-            if not (filter_level[0] <= level <= filter_level[1]):
-                continue
-            
-            filtered_creatures[name] = data
-        
-        sorted_creatures = sorted(filtered_creatures.keys())
+        # Filter Logic (bitwise, see utils/facets.py)
+        filters = {
+            "source": filter_source, "size": filter_size, "type": filter_type, "biome": filter_biome,
+            "site": filter_site, "faction": filter_faction, "subtype": filter_subtype,
+        }
+        # With a search, best matches first (fuzzy, see utils/search.py); otherwise by name
+        ranked = search_creatures(search_term) if search_term else None
+        within = index.keys_mask(ranked) if ranked is not None else None
+        sorted_creatures = index.names(index.query(filters, filter_level, within), ranked)
         
         # --- CREATURE LIST ---
         # Use radio buttons for selection
@@ -113,11 +96,11 @@ def render_bestiary() -> None:
     # --- RIGHT COLUMN: STATBLOCK DISPLAY ---
     with right_col:
         selected_key = st.session_state.get("selected_creature")
-        if selected_key and selected_key in bestiary_data:
-            selected_data = bestiary_data[selected_key]
+        if selected_key and selected_key in creatures:
+            selected_data = creatures[selected_key].data
             
             with st.container():
-                render_statblock(selected_key, selected_data)
+                render_statblock(selected_key, selected_data, creature=creatures[selected_key])
         elif sorted_creatures:
             # If selection is somehow lost, default to the first in the filtered list
             st.session_state.selected_creature = sorted_creatures[0]
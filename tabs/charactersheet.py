@@ -3,8 +3,8 @@ import re
 import json
 import copy
 import base64
-from utils.data_manager import load_data, save_data
-from constants import CHARACTERS_FILE, ITEM_FILE, PERKS_FILE
+from utils.character_store import load_characters, save_character, update_character, add_character, delete_character, CharacterConflictError
+from constants import ITEM_FILE, PERKS_FILE
 from utils.character_logic import get_default_character, sync_char_widgets, calculate_stats, roll_skill, migrate_character, SKILL_MAP, duplicate_character
 from utils.character_components import render_css, render_bars, render_database_manager, render_inventory_management, render_character_statblock, caps_manager_dialog, crafting_manager_dialog, add_db_item_dialog, render_live_inventory, level_up_dialog
 
@@ -16,11 +16,19 @@ def delete_char_dialog(index, saved_chars):
     st.warning(f"Are you sure you want to delete **{char.get('name', 'Unnamed')}**?")
     st.caption("This action cannot be undone.")
     if st.button("Yes, Delete", type="primary", use_container_width=True):
-        saved_chars.pop(index)
-        save_data(CHARACTERS_FILE, saved_chars)
+        delete_character(char.get("id"), index=index)
         st.session_state.char_sheet_mode = "SELECT"
         st.rerun()
 
+def save_active_character() -> bool:
+    """Saves the character being edited; concurrent changes from the DM or other tabs are merged in."""
+    try:
+        save_character(st.session_state.char_sheet, index=st.session_state.active_char_idx)
+        return True
+    except CharacterConflictError as e:
+        st.error(str(e))
+        return False
+
 def check_rads_overflow():
     """Callback to handle Rads overflow into Radiation Level."""
     if "c_rads" in st.session_state:
@@ -56,9 +64,7 @@ def update_skills_callback():
 def render_character_sheet() -> None:
 
     # --- DATA LOADING ---
-    saved_chars = load_data(CHARACTERS_FILE)
-    if not isinstance(saved_chars, list):
-        saved_chars = []
+    saved_chars = load_characters()
 
     # --- STATE MANAGEMENT ---
     if "char_sheet_mode" not in st.session_state:
@@ -88,13 +94,12 @@ def render_character_sheet() -> None:
         col_new, col_space = st.columns([1, 2])
         if col_new.button("➕ Create New Character", use_container_width=True):
             new_char = get_default_character()
-            saved_chars.append(new_char)
-            save_data(CHARACTERS_FILE, saved_chars)
+            new_index = add_character(new_char)
             
             # Switch to Edit Mode
             st.session_state.char_sheet = new_char
             sync_char_widgets()
-            st.session_state.active_char_idx = len(saved_chars) - 1
+            st.session_state.active_char_idx = new_index
             st.session_state.char_sheet_mode = "EDIT"
             st.session_state.char_sheet_view = "Edit"
             st.rerun()
@@ -121,9 +126,7 @@ def render_character_sheet() -> None:
                             st.session_state.char_sheet_view = "Statblock"
                             st.rerun()
                         if c_dup.button("📋", key=f"dup_char_{index}", help="Duplicate Character", use_container_width=True):
-                            new_char = duplicate_character(char_entry)
-                            saved_chars.append(new_char)
-                            save_data(CHARACTERS_FILE, saved_chars)
+                            add_character(duplicate_character(char_entry))
                             st.rerun()
                 st.markdown("---")
 
@@ -138,8 +141,7 @@ def render_character_sheet() -> None:
         if st.session_state.active_char_idx is not None and 0 <= st.session_state.active_char_idx < len(saved_chars):
             disk_char = saved_chars[st.session_state.active_char_idx]
             if char.get("id") and not disk_char.get("id"):
-                saved_chars[st.session_state.active_char_idx] = char
-                save_data(CHARACTERS_FILE, saved_chars)
+                save_active_character()
 
         # --- STATBLOCK VIEW ---
         if st.session_state.char_sheet_view == "Statblock":
@@ -152,7 +154,7 @@ def render_character_sheet() -> None:
                 # Reload latest data from disk to capture DM updates (items, HP, etc.)
                 if st.session_state.active_char_idx is not None:
                     try:
-                        latest_data = load_data(CHARACTERS_FILE)
+                        latest_data = load_characters()
                         if latest_data and len(latest_data) > st.session_state.active_char_idx:
                             # Verify ID match to be safe
                             disk_char = latest_data[st.session_state.active_char_idx]
@@ -167,11 +169,8 @@ def render_character_sheet() -> None:
 
             def auto_save():
                 if st.session_state.active_char_idx is not None:
-                    # Load fresh DB to avoid overwrites
-                    current_db = load_data(CHARACTERS_FILE)
-                    if current_db and len(current_db) > st.session_state.active_char_idx:
-                        current_db[st.session_state.active_char_idx] = st.session_state.char_sheet
-                        save_data(CHARACTERS_FILE, current_db)
+                    # Revision-checked save; DM changes made meanwhile are merged, not overwritten
+                    save_active_character()
 
             render_character_statblock(st.session_state.char_sheet, save_callback=auto_save, char_index=st.session_state.active_char_idx, char_id=st.session_state.char_sheet.get("id"))
             # --- SPACER TO PREVENT CONTENT JUMPING ---
@@ -187,18 +186,16 @@ def render_character_sheet() -> None:
             
         if col_view.button("📝 Save & View Statblock", use_container_width=True):
             if st.session_state.active_char_idx is not None and 0 <= st.session_state.active_char_idx < len(saved_chars):
-                saved_chars[st.session_state.active_char_idx] = st.session_state.char_sheet
-                save_data(CHARACTERS_FILE, saved_chars)
-                st.toast("Character Saved!")
+                if save_active_character():
+                    st.toast("Character Saved!")
             
             st.session_state.char_sheet_view = "Statblock"
             st.rerun()
         
         if col_save.button("💾 Save Changes", type="primary", use_container_width=True):
             if st.session_state.active_char_idx is not None and 0 <= st.session_state.active_char_idx < len(saved_chars):
-                saved_chars[st.session_state.active_char_idx] = st.session_state.char_sheet
-                save_data(CHARACTERS_FILE, saved_chars)
-                st.toast("Character Saved!")
+                if save_active_character():
+                    st.toast("Character Saved!")
             else:
                 st.error("Error saving character.")
         
@@ -216,12 +213,21 @@ def render_character_sheet() -> None:
                     if st.button("Load & Overwrite", type="primary", use_container_width=True):
                         try:
                             imported_char = json.load(uploaded_file)
-                            st.session_state.char_sheet = imported_char
-                            sync_char_widgets()
                             
                             if st.session_state.active_char_idx is not None and 0 <= st.session_state.active_char_idx < len(saved_chars):
-                                saved_chars[st.session_state.active_char_idx] = imported_char
-                                save_data(CHARACTERS_FILE, saved_chars)
+                                # Overwrite the stored record in place, keeping its id
+                                def overwrite(disk_char):
+                                    char_id = disk_char.get("id")
+                                    disk_char.clear()
+                                    disk_char.update(imported_char)
+                                    if char_id:
+                                        disk_char["id"] = char_id
+                                saved = update_character(overwrite, char_id=char.get("id"), index=st.session_state.active_char_idx)
+                                if saved:
+                                    imported_char = copy.deepcopy(saved)
+                            
+                            st.session_state.char_sheet = imported_char
+                            sync_char_widgets()
                             
                             st.toast("Character Imported Successfully!")
                             st.rerun()
@@ -268,7 +274,7 @@ def render_character_sheet() -> None:
             last_lvl = char.get("last_processed_level", 1)
             if new_level > last_lvl:
                 if col_level.button(f"🔼 Lvl {new_level}", help="Click to Level Up"):
-                    level_up_dialog(char, new_level, save_callback=lambda: save_data(CHARACTERS_FILE, saved_chars))
+                    level_up_dialog(char, new_level, save_callback=save_active_character)
             else:
                 col_level.text_input("Level", value=str(char.get("level", 1)), disabled=True, help="Derived from XP (1000 XP per level)")
             char["xp"] = col_experience.number_input("XP", min_value=0, key="c_xp")
@@ -486,7 +492,7 @@ def render_character_sheet() -> None:
                 c_inv_head, c_craft_btn = st.columns([3, 1])
                 c_inv_head.caption("Manage your equipment and items.")
                 if c_craft_btn.button("🛠️ Crafting", use_container_width=True):
-                    crafting_manager_dialog(char, save_callback=lambda: save_data(CHARACTERS_FILE, saved_chars))
+                    crafting_manager_dialog(char, save_callback=save_active_character)
 
                 # Use the live inventory fragment to see DM updates
                 render_live_inventory(
@@ -3,8 +3,13 @@ import json
 import pandas as pd
 from utils.data_manager import load_data, save_data
 from utils.statblock import calculate_cr
+from utils.creatures import load_creatures
+from utils.facets import get_facet_index, with_counts
 from constants import BESTIARY_FILE
 
+# Bulk Tagging category -> facet of utils.facets
+TAG_FACETS = {"biomes": "biome", "sites": "site", "factions": "faction"}
+
 @st.dialog("Delete Creature")
 def delete_creature_dialog(key, data):
     st.warning(f"Are you sure you want to delete **{key}**?")
@@ -56,38 +61,33 @@ def render() -> None:
     with st.expander("🏷️ Bulk Tagging"):
         st.markdown("Apply tags (Biomes, Sites, Factions) to multiple creatures at once.")
         
+        # Filters run on the shared facet index of the saved bestiary (same data as `data`)
+        creatures = load_creatures(BESTIARY_FILE)
+        index = get_facet_index(BESTIARY_FILE)
+        facet_keys = {"source": "bt_filter_source", "type": "bt_filter_type", "biome": "bt_filter_biome", "faction": "bt_filter_faction"}
+        selected = {facet: st.session_state.get(key, []) for facet, key in facet_keys.items()}
+
+        def facet_filter(label, facet):
+            search_mask = index.name_mask(st.session_state.get("bt_filter_search", ""))
+            within = index.query(selected, within=search_mask, exclude=facet)
+            return st.multiselect(label, index.values(facet), format_func=with_counts(index.counts(facet, within)),
+                                  key=facet_keys[facet])
+
         # --- FILTERS ---
         with st.expander("🔍 Filter Selection", expanded=False):
-            # Gather unique values for filters
-            all_sources = sorted({item.get("source", "Unknown") for item in data.values() if isinstance(item, dict)})
-            all_types = sorted({item.get("type", "Unknown") for item in data.values() if isinstance(item, dict)})
-            all_biomes = sorted({b for item in data.values() if isinstance(item, dict) for b in item.get("biomes", [])})
-            all_factions = sorted({f for item in data.values() if isinstance(item, dict) for f in item.get("factions", [])})
-            
             col_f1, col_f2 = st.columns(2)
             with col_f1:
-                filter_source = st.multiselect("Source", all_sources, key="bt_filter_source")
-                filter_type = st.multiselect("Type", all_types, key="bt_filter_type")
+                filter_source = facet_filter("Source", "source")
+                filter_type = facet_filter("Type", "type")
             with col_f2:
-                filter_biome = st.multiselect("Biome", all_biomes, key="bt_filter_biome")
-                filter_faction = st.multiselect("Faction", all_factions, key="bt_filter_faction")
+                filter_biome = facet_filter("Biome", "biome")
+                filter_faction = facet_filter("Faction", "faction")
             
             filter_search = st.text_input("Search Name", key="bt_filter_search")
 
         # Apply Filters
-        filtered_creatures = []
-        for name, item in data.items():
-            if not isinstance(item, dict): continue
-            
-            if filter_search and filter_search.lower() not in name.lower(): continue
-            if filter_source and item.get("source", "Unknown") not in filter_source: continue
-            if filter_type and item.get("type", "Unknown") not in filter_type: continue
-            if filter_biome and not set(item.get("biomes", [])).intersection(filter_biome): continue
-            if filter_faction and not set(item.get("factions", [])).intersection(filter_faction): continue
-                
-            filtered_creatures.append(name)
-        
-        filtered_creatures.sort()
+        filters = {"source": filter_source, "type": filter_type, "biome": filter_biome, "faction": filter_faction}
+        filtered_creatures = [n for n in index.names(index.query(filters, within=index.name_mask(filter_search))) if n in data]
         
         # --- SELECTION LIST ---
         # Manage selection state manually to support the data editor
@@ -114,8 +114,8 @@ def render() -> None:
         df_data = {
             "Selected": [name in current_selection_set for name in filtered_creatures],
             "Creature": filtered_creatures,
-            "Type": [data.get(name, {}).get("type", "Unknown") for name in filtered_creatures],
-            "CR": [calculate_cr(data.get(name, {})) for name in filtered_creatures]
+            "Type": [creatures[name].type for name in filtered_creatures],
+            "CR": [creatures[name].cr for name in filtered_creatures]
         }
         df = pd.DataFrame(df_data)
             
@@ -161,7 +161,7 @@ def render() -> None:
             tag_action = st.radio("Action", ["Add", "Remove"], horizontal=True, key="bulk_tag_action")
             
         # Get existing tags for suggestions
-        existing_tags = sorted({t for item in data.values() if isinstance(item, dict) for t in item.get(tag_category, [])})
+        existing_tags = index.values(TAG_FACETS[tag_category])
         
         selected_tags = st.multiselect("Select Existing Tags", existing_tags, key="bulk_tag_select")
         new_tags_input = st.text_input("Or type new tags (comma separated)", key="bulk_tag_new")
@@ -1,14 +1,11 @@
 import streamlit as st
 import json
-from utils.data_manager import load_data, save_data
-from constants import CHARACTERS_FILE
+from utils.character_store import load_characters, save_character, delete_character, CharacterConflictError
 
 def render() -> None:
     st.subheader("👥 Player Character Database")
     
-    data = load_data(CHARACTERS_FILE)
-    if not isinstance(data, list):
-        data = []
+    data = load_characters()
 
     if not data:
         st.info("No saved characters found.")
@@ -40,17 +37,17 @@ def render() -> None:
                     if st.button("💾 Save Changes", use_container_width=True, key=f"save_char_{index}"):
                         try:
                             new_data = json.loads(new_json_str)
-                            data[index] = new_data
-                            save_data(CHARACTERS_FILE, data)
+                            save_character(new_data, index=index)
                             st.success("Saved!")
                             st.rerun()
                         except json.JSONDecodeError as e:
                             st.error(f"Invalid JSON: {e}")
+                        except CharacterConflictError as e:
+                            st.error(str(e))
                 
                 with c_del:
                     if st.button("🗑️ Delete Character", type="primary", use_container_width=True, key=f"del_char_{index}"):
-                        data.pop(index)
-                        save_data(CHARACTERS_FILE, data)
+                        delete_character(char_data.get("id"), index=index)
                         st.rerun()
         except (ValueError, IndexError):
             st.error("Error selecting character.")
\ No newline at end of file
@@ -0,0 +1,31 @@
+import streamlit as st
+from utils.data_manager import load_static, set_pack_enabled
+from utils import packs
+from constants import BESTIARY_FILE, ITEM_FILE
+
+PACK_FILES = {
+    "📖 Bestiary (by source)": BESTIARY_FILE,
+    "🎒 Equipment (by category)": ITEM_FILE,
+}
+
+def render() -> None:
+    st.subheader("📦 Content Packs")
+    st.caption("Switched-off packs are not loaded by the Scanner, the Bestiary or the editors.")
+
+    for label, filepath in PACK_FILES.items():
+        st.markdown(f"#### {label}")
+        if not packs.is_packed(filepath):
+            st.info(f"{filepath} is not split into packs yet. Run `python -m utils.packs` to split it.")
+            continue
+
+        for pack in packs.list_packs(filepath):
+            c_toggle, c_info = st.columns([3, 2], vertical_alignment="center")
+            with c_toggle:
+                enabled = st.toggle(pack["name"], value=pack["enabled"], key=f"pack_{filepath}_{pack['id']}")
+            with c_info:
+                # Only enabled packs are counted, so a switched-off pack is never read
+                count = f"{len(load_static(pack['path']))} records" if pack["enabled"] else "off"
+                st.caption(f"`{pack['id']}` · v{pack['version']} · {count}")
+            if enabled != pack["enabled"]:
+                set_pack_enabled(filepath, pack["id"], enabled)
+                st.rerun()
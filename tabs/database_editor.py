@@ -1,12 +1,12 @@
 import streamlit as st
-from tabs.database import items, bestiary, characters
+from tabs.database import items, bestiary, characters, packs
 
 def render() -> None:
     
     # Navigation for the Database Editor
     db_mode = st.radio(
         "Select Database:", 
-        ["📖 Bestiary (Creatures)", "🎒 Items (Equip/Perks)", "👥 Players"],
+        ["📖 Bestiary (Creatures)", "🎒 Items (Equip/Perks)", "👥 Players", "📦 Packs"],
         horizontal=True,
         label_visibility="collapsed"
     )
@@ -17,4 +17,6 @@ def render() -> None:
     elif "Items" in db_mode:
         items.render()
     elif "Players" in db_mode:
-        characters.render()
\ No newline at end of file
+        characters.render()
+    elif "Packs" in db_mode:
+        packs.render()
\ No newline at end of file
@@ -1,14 +1,18 @@
 import streamlit as st
 from .scanner import render_scanner
 from .logs import render_saved
+from .batch import render_batch
 
 def render():
     
     # Using tabs within the scanner page for better organization
-    tab_scan, tab_saved = st.tabs(["Scan", "Saved Logs"])
+    tab_scan, tab_saved, tab_batch = st.tabs(["Scan", "Saved Logs", "Batch Prep"])
     
     with tab_scan:
         render_scanner()
         
     with tab_saved:
-        render_saved()
\ No newline at end of file
+        render_saved()
+
+    with tab_batch:
+        render_batch()
@@ -0,0 +1,91 @@
+import os
+import streamlit as st
+from utils.data_manager import load_data
+from utils.creatures import load_creatures
+from utils.encounter_batch import MAX_WORKERS, BatchSettings, build_pool, plan_batch, run_batch
+from utils.encounter_generator import DIFFICULTY_MULTIPLIERS, calculate_party_cr
+from utils.rng import session_rng
+from constants import BESTIARY_FILE, CHARACTERS_FILE, SAVED_FILE
+
+# --- UI: BATCH PREP ---
+def render_batch() -> None:
+    # --- Pre-rolls encounters for every biome/site pair and difficulty into the log ---
+    st.header("🗂️ Batch Prep")
+
+    bestiary = load_creatures(BESTIARY_FILE)
+    if not bestiary:
+        st.error("Bestiary data not found.")
+        return
+
+    all_biomes = sorted({b for c in bestiary.values() for b in c.biomes})
+    all_sites = sorted({s for c in bestiary.values() for s in c.sites})
+    if not all_biomes or not all_sites:
+        st.info("No creatures have both a biome and a site. Tag them in the Database Editor to batch-generate encounters.")
+        return
+
+    c1, c2 = st.columns(2)
+    with c1:
+        biomes = st.multiselect("Biomes", all_biomes, default=all_biomes, key="batch_biomes")
+        difficulties = st.multiselect("Difficulties", list(DIFFICULTY_MULTIPLIERS), default=list(DIFFICULTY_MULTIPLIERS), key="batch_difficulties")
+    with c2:
+        sites = st.multiselect("Sites", all_sites, default=all_sites, key="batch_sites")
+        exact_fill = st.checkbox("Exact Fill", value=False, key="batch_exact_fill", help="Pick among encounters that cost the budget exactly (see the Scanner's Generation Mode).")
+
+    c_adv1, c_adv2 = st.columns(2)
+    with c_adv1:
+        enable_ap_multiplier = st.checkbox("Action Economy Tax (WIP)", value=True, key="batch_ap_multiplier")
+        enable_group_multiplier = st.checkbox("Group Multiplier", value=True, key="batch_group_multiplier")
+        enable_budget_variation = st.checkbox("Enable Budget Variation (±10%)", value=True, key="batch_budget_variation")
+    with c_adv2:
+        enable_weight_bias = st.checkbox("Prefer Stronger Enemies", value=True, key="batch_weight_bias")
+        enable_role_synergy_tax = st.checkbox("Role Synergy Tax (WIP)", value=False, key="batch_role_synergy_tax")
+
+    # Whole party, as the Scanner's presets
+    party_data = load_data(CHARACTERS_FILE)
+    party_cr = calculate_party_cr(party_data if isinstance(party_data, list) else [],
+                                  use_ap_multiplier=enable_ap_multiplier, group_multiplier=enable_group_multiplier)
+
+    c3, c4, c5 = st.columns(3)
+    with c3:
+        party_cr = st.number_input("Party CR", min_value=10, value=max(10, party_cr), step=10, key="batch_party_cr", help="Budgets are this times the difficulty multiplier.")
+    with c4:
+        workers = st.number_input("Worker Processes", min_value=1, max_value=MAX_WORKERS, value=min(os.cpu_count() or 1, MAX_WORKERS), key="batch_workers")
+    with c5:
+        seed = st.number_input("Seed", min_value=0, value=0, key="batch_seed", help="Same seed, same batch. 0 picks a new one.")
+
+    jobs = plan_batch(bestiary.values(), int(party_cr), 0, difficulties, biomes, sites)
+    if difficulties:
+        st.caption(f"{len(jobs)} encounters: {len(jobs) // len(difficulties)} biome/site pairs × {len(difficulties)} difficulties")
+    else:
+        st.caption("Pick at least one difficulty.")
+
+    if st.button("⚡ Generate Batch", type="primary", use_container_width=True, disabled=not jobs or not difficulties):
+        batch_seed = int(seed) or session_rng(st.session_state).operation_seed()
+        jobs = plan_batch(bestiary.values(), int(party_cr), batch_seed, difficulties, biomes, sites)
+        settings = BatchSettings(
+            weight_bias=enable_weight_bias,
+            group_multiplier=enable_group_multiplier,
+            role_synergy_tax=enable_role_synergy_tax,
+            budget_variation=enable_budget_variation,
+            exact_fill=exact_fill,
+        )
+        bar = st.progress(0.0, text="Rolling encounters...")
+        rows = []
+        progress = None
+        for progress in run_batch(jobs, build_pool(bestiary.values(), enable_ap_multiplier), settings,
+                                  workers=int(workers), filepath=SAVED_FILE):
+            entry = progress.entry
+            rows.append({"Biome": entry["biome"], "Site": entry["site"], "Difficulty": entry["difficulty"],
+                         "Threats": sum(entry["threats"].values()), "Cost": entry["cost"]})
+            bar.progress(progress.done / progress.total,
+                         text=f"{progress.done}/{progress.total} encounters · {progress.rate:.0f}/s")
+        if progress:
+            saved = sum(1 for row in rows if row["Threats"])
+            st.session_state.batch_last = {"rows": rows, "seed": batch_seed,
+                                           "summary": f"Logged {saved} of {progress.total} encounters in {progress.elapsed:.1f}s "
+                                                      f"({progress.rate:.0f}/s, {int(workers)} workers). Seed: {batch_seed}"}
+
+    last = st.session_state.get("batch_last")
+    if last:
+        st.success(last["summary"])
+        st.dataframe(last["rows"], use_container_width=True, hide_index=True)
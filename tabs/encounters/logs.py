@@ -1,8 +1,10 @@
 import streamlit as st
 from utils.data_manager import load_data, save_data
+from utils.creatures import load_creatures
 from constants import SAVED_FILE, BESTIARY_FILE
 from utils.statblock import render_statblock, view_statblock_dialog
-from utils.dice import parse_and_roll_loot
+from utils.dice import roll_encounter_loot
+from utils.rng import Stream, session_rng
 
 @st.dialog("Delete Log")
 def delete_log_dialog(idx, data):
@@ -12,13 +14,18 @@ def delete_log_dialog(idx, data):
         save_data(SAVED_FILE, data)
         st.rerun()
 
+def _roll_log_loot(encounter, creatures, seed):
+    threats = [{"name": t_name, "count": t_count} for t_name, t_count in encounter.get('threats', {}).items()]
+    # Loot tables from the bestiary, rolled for each individual creature
+    return roll_encounter_loot(threats, lambda name: creatures[name].loot if name in creatures else (), Stream(seed, "loot"))
+
 # --- UI: SAVED ENCOUNTERS ---
 def render_saved() -> None:
     # --- Renders the saved encounters tab ---
     st.header("🗃️ Encounter Log")
 
     saved_data = load_data(SAVED_FILE)
-    bestiary_data = load_data(BESTIARY_FILE)
+    creatures = load_creatures(BESTIARY_FILE)
     
     if not saved_data:
         st.info("No saved encounters yet. Use the 'Scan' tab to generate and save one!")
@@ -59,6 +66,9 @@ def render_saved() -> None:
 
         date_str = encounter.get('date', 'Unknown Date')
         biome = encounter.get('biome', 'Unknown Biome')
+        # Batch Prep entries also record the site and difficulty
+        if encounter.get('site'): biome = f"{biome} / {encounter['site']}"
+        if encounter.get('difficulty'): biome = f"{biome} ({encounter['difficulty']})"
         cost = encounter.get('cost', 0)
         cost_str = f" | CR: {cost}" if cost > 0 else ""
         
@@ -90,7 +100,7 @@ def render_saved() -> None:
                     c_txt, c_btn = st.columns([0.85, 0.15])
                     c_txt.markdown(f"- `{qty}x` {name}")
                     if c_btn.button("📄", key=f"saved_pop_{real_index}_{name}", help="View Statblock", use_container_width=True):
-                        view_statblock_dialog(name, bestiary_data.get(name))
+                        view_statblock_dialog(name, creatures[name].data if name in creatures else None, creature=creatures.get(name))
             else:
                 st.markdown("**⚠️ Threats:** `None`")
 
@@ -108,7 +118,7 @@ def render_saved() -> None:
                 st.markdown("\n".join(loot_text))
                 
                 # Loot Controls
-                c_edit, c_reroll = st.columns([1, 1])
+                c_edit, c_reroll, c_replay = st.columns([1, 1, 1])
                 
                 with c_edit:
                     with st.popover("✏️ Edit Loot", use_container_width=True):
@@ -125,42 +135,17 @@ def render_saved() -> None:
 
                 with c_reroll:
                     if st.button("🎲 Re-roll Loot", key=f"reroll_loot_{real_index}", use_container_width=True, help="Regenerate loot based on the threats present."):
-                        temp_loot = {}
-                        threats_map = encounter.get('threats', {})
-                        
-                        for t_name, t_count in threats_map.items():
-                            # Fetch loot table from bestiary
-                            b_loot = bestiary_data.get(t_name, {}).get("loot", [])
-                            # Roll for each individual creature
-                            for _ in range(t_count):
-                                for item_str in b_loot:
-                                    item_name, item_qty, qty_str, decay_val, decay_str = parse_and_roll_loot(item_str)
-                                    
-                                    if decay_str:
-                                        key = f"{item_name} (Decay: {decay_val})"
-                                        extras = []
-                                        if qty_str and qty_str != "1": extras.append(qty_str)
-                                        extras.append(f"{decay_str} levels of decay")
-                                        key += f" [{', '.join(extras)}]"
-                                        
-                                        if key not in temp_loot: temp_loot[key] = {'qty': 0, 'dice': set(), 'is_decay': True}
-                                        temp_loot[key]['qty'] += item_qty
-                                    else:
-                                        key = item_name
-                                        if key not in temp_loot: temp_loot[key] = {'qty': 0, 'dice': set(), 'is_decay': False}
-                                        temp_loot[key]['qty'] += item_qty
-                                        if qty_str: temp_loot[key]['dice'].add(qty_str)
-                        
-                        new_loot_summary = {}
-                        for key, data in temp_loot.items():
-                            if data['is_decay']:
-                                new_loot_summary[key] = data['qty']
-                            else:
-                                dice_strs = sorted(list(data['dice']))
-                                dice_suffix = f" [{', '.join(dice_strs)}]" if dice_strs else ""
-                                new_loot_summary[f"{key}{dice_suffix}"] = data['qty']
-                        
-                        encounter["loot"] = new_loot_summary
+                        # A new seed for the loot, kept on the log so the roll can be replayed
+                        encounter["loot_seed"] = session_rng(st.session_state).operation_seed()
+                        encounter["loot"] = _roll_log_loot(encounter, creatures, encounter["loot_seed"])
+                        st.session_state["saved_log_open_idx"] = real_index
+                        save_data(SAVED_FILE, saved_data)
+                        st.rerun()
+
+                with c_replay:
+                    loot_seed = encounter.get('loot_seed', encounter.get('seed'))
+                    if st.button("↩️ Replay Loot", key=f"replay_loot_{real_index}", use_container_width=True, disabled=loot_seed is None, help="Rolls the loot again from the log's seed, restoring the last rolled result."):
+                        encounter["loot"] = _roll_log_loot(encounter, creatures, loot_seed)
                         st.session_state["saved_log_open_idx"] = real_index
                         save_data(SAVED_FILE, saved_data)
                         st.rerun()
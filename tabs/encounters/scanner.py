@@ -1,21 +1,42 @@
 import streamlit as st
-import random
 from typing import List, Dict, Any
 from datetime import datetime
-from utils.statblock import render_statblock, view_statblock_dialog, calculate_cr, get_creature_role
+from utils.statblock import render_statblock, view_statblock_dialog, calculate_cr
+from utils.cr_table import character_cr
+from utils.encounter_generator import DIFFICULTY_MULTIPLIERS, EncounterGenerator, calculate_party_cr
+from utils.encounter_solver import MAX_CREATURES, MAX_CREATURES_LIMIT, MAX_SPECIES, MAX_SPECIES_LIMIT, SolverCandidate, solve_budget
 from utils.data_manager import load_data, save_data
+from utils.creatures import load_creatures
+from utils.facets import get_facet_index, with_counts
+from utils.search import search_creatures
 from constants import BESTIARY_FILE, SAVED_FILE, CHARACTERS_FILE
-from utils.dice import parse_and_roll_loot
+from utils.dice import roll_encounter_loot
+from utils.rng import Stream, session_rng
+from utils.random_tables import TABLE_FILES, get_tables
 
 # --- UI: SCANNER MODE ---
 def render_scanner() -> None:
-    bestiary = load_data(BESTIARY_FILE)
+    bestiary = load_creatures(BESTIARY_FILE)
     if not bestiary:
         st.error("Bestiary data not found.")
         return
 
     if "current_encounter" not in st.session_state:
         st.session_state.current_encounter = []
+    rng = session_rng(st.session_state)
+
+    index = get_facet_index(BESTIARY_FILE)
+    # Selections from the last rerun, for the per-option counts of each filter
+    facet_keys = {"type": "scanner_types", "biome": "scanner_biomes", "site": "scanner_sites", "faction": "scanner_factions"}
+    selected = {facet: st.session_state.get(key, []) for facet, key in facet_keys.items()}
+
+    search_state = st.session_state.get("scanner_search", "")
+    search_mask = index.keys_mask(search_creatures(search_state)) if search_state else None
+
+    def facet_filter(label, facet):
+        within = index.query(selected, st.session_state.get("scanner_level", (0, 50)), search_mask, exclude=facet)
+        return st.multiselect(label, index.values(facet), format_func=with_counts(index.counts(facet, within)),
+                              key=facet_keys[facet])
 
     col_builder, col_viewer = st.columns([1, 1.5])
 
@@ -36,44 +57,20 @@ def render_scanner() -> None:
             if "scanner_level" not in st.session_state:
                 st.session_state.scanner_level = (0, 50)
 
-            search = st.text_input("Search Frequency", placeholder="Creature Name...", key="scanner_search")
+            search = st.text_input("Search Frequency", placeholder="Name, weapon, loot... (typos are fine)", key="scanner_search")
             min_lvl, max_lvl = st.slider("Threat Level", 0, 50, key="scanner_level")
             
             # Type Filter
-            all_types = sorted(list(set(c.get("type", "Unknown") for c in bestiary.values() if isinstance(c, dict))))
-            selected_types = st.multiselect("Signal Type", all_types, key="scanner_types")
-            
-            all_biomes = sorted({b for item in bestiary.values() if isinstance(item, dict) for b in item.get("biomes", [])})
-            selected_biomes = st.multiselect("Biome", all_biomes, key="scanner_biomes")
-            
-            all_sites = sorted({s for item in bestiary.values() if isinstance(item, dict) for s in item.get("sites", [])})
-            selected_sites = st.multiselect("Site", all_sites, key="scanner_sites")
-            
-            all_factions = sorted({f for item in bestiary.values() if isinstance(item, dict) for f in item.get("factions", [])})
-            selected_factions = st.multiselect("Faction", all_factions, key="scanner_factions")
+            selected_types = facet_filter("Signal Type", "type")
+            selected_biomes = facet_filter("Biome", "biome")
+            selected_sites = facet_filter("Site", "site")
+            selected_factions = facet_filter("Faction", "faction")
 
-        # Filter Logic
-        candidates = []
-        for name, stats in bestiary.items():
-            if not isinstance(stats, dict): continue
-            
-            if search.lower() in name.lower():
-                lvl = stats.get("level", 0)
-                if min_lvl <= lvl <= max_lvl:
-                    if not selected_types or stats.get("type") in selected_types:
-                        # Biome Check
-                        if selected_biomes and not set(stats.get("biomes", [])).intersection(selected_biomes):
-                            continue
-                        # Site Check
-                        if selected_sites and not set(stats.get("sites", [])).intersection(selected_sites):
-                            continue
-                        # Faction Check
-                        if selected_factions and not set(stats.get("factions", [])).intersection(selected_factions):
-                            continue
-                        
-                        candidates.append(name)
-        
-        candidates.sort()
+        # Filter Logic (bitwise, see utils/facets.py); sorted by name, or best match first
+        filters = {"type": selected_types, "biome": selected_biomes, "site": selected_sites, "faction": selected_factions}
+        ranked = search_creatures(search) if search else None
+        within = index.keys_mask(ranked) if ranked is not None else None
+        candidates = index.names(index.query(filters, (min_lvl, max_lvl), within), ranked)
                
         # --- BUDGET GENERATOR ---
         st.markdown("#### 💰 Budget Mode")
@@ -95,16 +92,7 @@ def render_scanner() -> None:
             def get_party_label(index):
                 if index < 0 or index >= len(party_data): return "Unknown"
                 c = party_data[index]
-                c_stats = {
-                    "level": c.get("level", 1),
-                    "hp": c.get("hp_max", 10),
-                    "sp": c.get("stamina_max", 10),
-                    "ac": c.get("ac", 10),
-                    "dt": 0, 
-                    "ap": c.get("action_points", 10),
-                    "special": c.get("stats", {})
-                }
-                indiv_cr = calculate_cr(c_stats, use_ap_multiplier=enable_ap_multiplier)
+                indiv_cr = character_cr(c, use_ap_multiplier=enable_ap_multiplier)
                 return f"{index+1}. {c.get('name', 'Unnamed')} (Lvl {c.get('level', 1)}) [CR: {indiv_cr}]"
 
             party_indices = list(range(len(party_data)))
@@ -127,24 +115,8 @@ def render_scanner() -> None:
                 key="scanner_party_selection"
             )
             
-            for i, index in enumerate(selected_indices):
-                char = party_data[index]
-                # Map character data to statblock format for CR calculation
-                c_stats = {
-                    "level": char.get("level", 1),
-                    "hp": char.get("hp_max", 10),
-                    "sp": char.get("stamina_max", 10),
-                    "ac": char.get("ac", 10),
-                    "dt": 0, 
-                    "ap": char.get("action_points", 10),
-                    "special": char.get("stats", {})
-                }
-                
-                member_cr = calculate_cr(c_stats, use_ap_multiplier=enable_ap_multiplier)
-                if enable_group_multiplier:
-                    member_cr *= (1.0 + (i * 0.08))
-                
-                party_cr += int(member_cr)
+            party_cr = calculate_party_cr((party_data[index] for index in selected_indices),
+                                          use_ap_multiplier=enable_ap_multiplier, group_multiplier=enable_group_multiplier)
 
         if party_cr > 0:
             c_preset, c_info = st.columns([2, 1])
@@ -153,11 +125,10 @@ def render_scanner() -> None:
                 if "scanner_diff_prev" not in st.session_state:
                     st.session_state.scanner_diff_prev = "Custom"
                 
-                difficulty = st.selectbox("Difficulty Preset", ["Custom", "Easy", "Medium", "Hard", "Deadly"], key="scanner_diff_preset")
+                difficulty = st.selectbox("Difficulty Preset", ["Custom", *DIFFICULTY_MULTIPLIERS], key="scanner_diff_preset")
                 
                 if difficulty != "Custom" and difficulty != st.session_state.scanner_diff_prev:
-                    multipliers = {"Easy": 0.5, "Medium": 1.0, "Hard": 1.5, "Deadly": 2.0}
-                    st.session_state.scanner_budget = int(party_cr * multipliers[difficulty])
+                    st.session_state.scanner_budget = int(party_cr * DIFFICULTY_MULTIPLIERS[difficulty])
                 
                 st.session_state.scanner_diff_prev = difficulty
 
@@ -173,112 +144,64 @@ def render_scanner() -> None:
         budget = st.number_input("Threat Budget", min_value=10, step=10, key="scanner_budget", on_change=on_budget_change, help="The target CR budget for the encounter.")
         
         enable_budget_variation = st.checkbox("Enable Budget Variation (±10%)", value=True, help="Adds a random ±10% to the target budget for more unpredictable encounters.")
-        
-        # Calculate actual budget with variation
-        actual_budget = budget
-        if enable_budget_variation:
-            variation = budget * 0.10
-            actual_budget = random.randint(int(budget - variation), int(budget + variation))
-        #    st.info(f"Actual Budget (with variation): {actual_budget}")
-        
-        # Overflow allowance (15%) to help fill the budget completely
-        overflow_allowance = int(actual_budget * 0.15)
+
+        generation_mode = st.radio("Generation Mode", ["Random Fill", "Exact Fill"], horizontal=True, key="scanner_generation_mode", help="Random Fill picks creatures until the budget runs out. Exact Fill picks at random among all encounters that cost the budget (within the tolerance).")
+        if generation_mode == "Exact Fill":
+            c_ex1, c_ex2, c_ex3 = st.columns(3)
+            with c_ex1:
+                exact_max_creatures = st.number_input("Max Creatures", min_value=1, max_value=MAX_CREATURES_LIMIT, value=MAX_CREATURES, key="scanner_exact_max_creatures")
+            with c_ex2:
+                exact_max_species = st.number_input("Max Species", min_value=1, max_value=MAX_SPECIES_LIMIT, value=MAX_SPECIES, key="scanner_exact_max_species")
+            with c_ex3:
+                exact_tolerance = st.number_input("Tolerance (%)", min_value=1, max_value=25, value=5, key="scanner_exact_tolerance")
+            exact_same_faction = st.checkbox("Same Faction", value=False, key="scanner_exact_same_faction", help="Every creature in the encounter shares at least one faction.")
         
         if st.button("⚡ Generate from Budget", use_container_width=True):
             if not candidates:
                 st.warning("No candidates available with current filters.")
             else:
-                # 1. Calculate CR for all candidates
-                pool = []
-                for name in candidates:
-                    stats = bestiary.get(name, {})
-                    cr = calculate_cr(stats, use_ap_multiplier=enable_ap_multiplier)
-                    role = get_creature_role(stats) if enable_role_synergy_tax else "Generic"
-                    pool.append({"name": name, "cr": cr, "role": role})
-                
-                # 2. Fill Budget
-                best_generated = []
-                best_remaining = actual_budget
-                
-                # Try up to 10 times to get a good fill (> 70%)
-                for _ in range(10):
-                    current_budget = actual_budget
-                    generated = []
-                    attempts = 0
-                    
-                    # Try to fill the budget
-                    while current_budget > 0 and attempts < 50:
-                        # Find creatures that fit in remaining budget
-                        # In advanced mode, costs are dynamic, so we filter by base CR first as a rough check
-                        affordable = [x for x in pool if x["cr"] <= (current_budget + overflow_allowance)]
-                        
-                        if not affordable:
-                            break
-                            
-                        if enable_weight_bias:
-                            # Bias towards higher CR enemies
-                            weights = [item["cr"] for item in affordable]
-                            pick = random.choices(affordable, weights=weights, k=1)[0]
-                        else:
-                            pick = random.choice(affordable)
+                # One seed per generated encounter; it is stored on the log to replay its rolls
+                encounter_seed = rng.operation_seed()
+                stream = Stream(encounter_seed, "encounter")
 
-                        pick_name = pick["name"]
-                        pick_cr = pick["cr"]
-                        pick_role = pick["role"]
-                        
-                        final_cost = pick_cr
-                        
-                        # --- ADVANCED LOGIC ---
-                        if enable_group_multiplier:
-                            # Group Multiplier (Tax for diverse groups)
-                            total_enemies_so_far = sum(item['count'] for item in generated)
-                            if total_enemies_so_far > 0:
-                                # Mild Group Multiplier: +2% cost per existing creature in the encounter
-                                final_cost *= (1.0 + (total_enemies_so_far * 0.08))
-                            
-                        if enable_role_synergy_tax:
-                            # Role Synergy Tax
-                            # Check if complementary roles exist in generated list
-                            roles_present = set()
-                            for gen_item in generated:
-                                # Find role from pool data
-                                p_data = next((p for p in pool if p["name"] == gen_item["name"]), None)
-                                if p_data: roles_present.add(p_data["role"])
-                            
-                            if (pick_role == "Striker" and "Tank" in roles_present) or \
-                               (pick_role == "Tank" and "Striker" in roles_present):
-                                final_cost *= 1.15 # +15% Synergy Tax
+                # Calculate actual budget with variation
+                actual_budget = budget
+                if enable_budget_variation:
+                    variation = budget * 0.10
+                    actual_budget = stream.randint(int(budget - variation), int(budget + variation))
+                
+                # Overflow allowance (15%) to help fill the budget completely
+                overflow_allowance = int(actual_budget * 0.15)
 
-                        # Check affordability again with final cost
-                        if final_cost > (current_budget + overflow_allowance):
-                            attempts += 1
-                            continue
-                        
-                        # Add to list
-                        existing = next((x for x in generated if x["name"] == pick_name), None)
-                        if existing:
-                            existing["count"] += 1
-                        else:
-                            generated.append({"name": pick_name, "count": 1})
-                        
-                        current_budget -= int(final_cost)
-                        attempts += 1
-                    
-                    # Check fill ratio
-                    filled = actual_budget - current_budget
-                    ratio = filled / actual_budget if actual_budget > 0 else 0
-                    
-                    # Keep track of best attempt (most filled)
-                    if filled > (actual_budget - best_remaining):
-                        best_generated = generated
-                        best_remaining = current_budget
-                    
-                    # If we hit > 70%, we are good
-                    if ratio >= 0.70:
-                        break
+                if generation_mode == "Exact Fill":
+                    best_generated, best_remaining = solve_budget(
+                        (SolverCandidate(name, bestiary[name].cr_for(enable_ap_multiplier), bestiary[name].role, bestiary[name].factions)
+                         for name in candidates),
+                        actual_budget,
+                        tolerance=exact_tolerance / 100,
+                        max_creatures=int(exact_max_creatures),
+                        max_species=int(exact_max_species),
+                        faction_coherence=exact_same_faction,
+                        group_multiplier=enable_group_multiplier,
+                        role_synergy_tax=enable_role_synergy_tax,
+                        rng=stream,
+                    )
+                else:
+                    # CR and role of all candidates (precomputed on the creature models)
+                    generator = EncounterGenerator(
+                        ((name, bestiary[name].cr_for(enable_ap_multiplier), bestiary[name].role if enable_role_synergy_tax else "Generic")
+                         for name in candidates),
+                        weight_bias=enable_weight_bias,
+                        group_multiplier=enable_group_multiplier,
+                        role_synergy_tax=enable_role_synergy_tax,
+                        rng=stream,
+                    )
+                    # Up to 10 fills; stops at the first one that spends > 70% of the budget
+                    best_generated, best_remaining = generator.generate(actual_budget, overflow_allowance)
                 
                 if best_generated:
                     st.session_state.current_encounter = best_generated
+                    st.session_state.current_encounter_seed = encounter_seed
                     st.toast(f"Generated encounter! Remaining Budget: {best_remaining}", icon="⚡")
                     st.rerun()
                 else:
@@ -303,7 +226,7 @@ def render_scanner() -> None:
  # --- RANDOM SCENARIO GENERATOR ---
         if st.button("🎲 Random Encounter", use_container_width=True, help="Spawns a random creature matching your selected filters (Biome, Faction, etc.)."):
             if candidates:
-                pick = random.choice(candidates)
+                pick = rng.stream("pick").choice(candidates)
                 existing = next((x for x in st.session_state.current_encounter if x["name"] == pick), None)
                 if existing:
                     existing["count"] += 1
@@ -314,6 +237,37 @@ def render_scanner() -> None:
             else:
                 st.warning("No creatures match your current filters. Adjust your search or tags.")
 
+        # --- BIOME TABLES ---
+        # Rolls on the weighted tables of data/encounters.json; results join the current threats
+        with st.expander("📜 Biome Tables"):
+            tables = get_tables(TABLE_FILES["Encounters"])
+            for error in tables.errors:
+                st.caption(f"⚠️ {error}")
+            if not tables.names():
+                st.info("No encounter tables found.")
+            else:
+                c_table, c_rolls = st.columns([3, 1])
+                with c_table:
+                    table = st.selectbox("Table", tables.names(), key="scanner_table")
+                with c_rolls:
+                    table_rolls = st.number_input("Rolls", min_value=1, max_value=20, value=1, key="scanner_table_rolls")
+                if st.button("🎲 Roll on Table", use_container_width=True):
+                    rolled = tables.roll(table, int(table_rolls), rng.stream("table"))
+                    for result in rolled:
+                        # The table's unit cost prices names that are not in the bestiary
+                        unit_cost = result["cost"] // result["count"]
+                        existing = next((x for x in st.session_state.current_encounter if x["name"] == result["name"]), None)
+                        if existing:
+                            existing["count"] += result["count"]
+                            existing.setdefault("cost", unit_cost)
+                        else:
+                            st.session_state.current_encounter.append({"name": result["name"], "count": result["count"], "cost": unit_cost})
+                    if rolled:
+                        st.toast("Rolled: " + ", ".join(f"{r['count']}x {r['name']}" for r in rolled), icon="📜")
+                        st.rerun()
+                    else:
+                        st.warning("Nothing rolled on this table.")
+
     with col_viewer:
         st.markdown("### ⚠️ Current Threats")
         
@@ -327,28 +281,34 @@ def render_scanner() -> None:
             roles_present = set()
             if enable_role_synergy_tax:
                 for entry in st.session_state.current_encounter:
-                    stats = bestiary.get(entry["name"], {})
-                    if stats: # Ensure stats exist before trying to get role
-                        roles_present.add(get_creature_role(stats))
+                    creature = bestiary.get(entry["name"])
+                    if creature: # Ensure stats exist before trying to get role
+                        roles_present.add(creature.role)
             
             for i, entry in enumerate(st.session_state.current_encounter):
                 name = entry["name"]
                 count = entry["count"]
-                stats = bestiary.get(name, {})
-                lvl = stats.get("level", 1)
+                creature = bestiary.get(name)
+                stats = creature.data if creature else {}
+                lvl = creature.level if creature else 1
                 
                 # XP Calculation
-                xp = lvl * 10 * count
+                xp = (creature.xp if creature else lvl * 10) * count
                 total_xp += xp
                 
                 # CR Cost Calculation for Display
-                base_cr = calculate_cr(stats, use_ap_multiplier=enable_ap_multiplier)
+                if creature:
+                    base_cr = creature.cr_for(enable_ap_multiplier)
+                elif "cost" in entry:
+                    base_cr = entry["cost"] # Rolled on a biome table: its cost
+                else:
+                    base_cr = calculate_cr(stats, use_ap_multiplier=enable_ap_multiplier)
                 entry_cost = 0
                 breakdown_text = ""
                 
                 role = "Generic" # Default role for display
                 if enable_role_synergy_tax:
-                    role = get_creature_role(stats)
+                    role = creature.role if creature else "Striker"
 
                 unit_cost = base_cr
                 
@@ -375,6 +335,8 @@ def render_scanner() -> None:
                     breakdown_text = f"CR Cost: {int(base_total_cr)} → **{int(entry_cost)}**{role_text}"
                 else:
                     breakdown_text = f"CR Cost: {int(entry_cost)}{role_text}"
+                if not creature:
+                    breakdown_text += " · Not in bestiary"
                 
                 total_cr_cost += entry_cost
 
@@ -388,8 +350,8 @@ def render_scanner() -> None:
                         entry["count"] += 1
                         st.rerun()
 
-                    if c4.button("📄", key=f"view_{i}"):
-                        view_statblock_dialog(name, stats)
+                    if c4.button("📄", key=f"view_{i}", disabled=not creature, help=None if creature else "No statblock: not in the bestiary"):
+                        view_statblock_dialog(name, stats, creature=creature)
                     
                     if c5.button("❌", key=f"rem_{i}"):
                         st.session_state.current_encounter.pop(i)
@@ -397,6 +359,9 @@ def render_scanner() -> None:
 
             st.divider()
             st.markdown(f"**Total XP:** {total_xp} | **Total CR Cost:** {int(total_cr_cost)}")
+            unresolved = [e["name"] for e in st.session_state.current_encounter if e["name"] not in bestiary]
+            if unresolved:
+                st.caption(f"Not in the bestiary (no statblock or loot; priced at their table cost when rolled): {', '.join(unresolved)}")
             
             c_save, c_clear = st.columns([3, 1])
             with c_save:
@@ -404,50 +369,19 @@ def render_scanner() -> None:
                     saved_logs = load_data(SAVED_FILE)
                     if not isinstance(saved_logs, list): saved_logs = []
                     
-                    # Generate Loot Summary with Aggregation
-                    temp_loot = {}
-                    for entry in st.session_state.current_encounter:
-                        name = entry["name"]
-                        count = entry["count"]
-                        b_loot = bestiary.get(name, {}).get("loot", [])
-                        # Roll for each individual creature to ensure variance
-                        for _ in range(count):
-                            for item_str in b_loot:
-                                item_name, item_qty, qty_str, decay_val, decay_str = parse_and_roll_loot(item_str)
-                                
-                                if decay_str:
-                                    # Decay Item: Keep distinct based on rolled decay value
-                                    # Format: Name (Decay: X) [Original Strings]
-                                    key = f"{item_name} (Decay: {decay_val})"
-                                    extras = []
-                                    if qty_str and qty_str != "1": extras.append(qty_str)
-                                    extras.append(f"{decay_str} levels of decay")
-                                    key += f" [{', '.join(extras)}]"
-                                    
-                                    if key not in temp_loot: temp_loot[key] = {'qty': 0, 'dice': set(), 'is_decay': True}
-                                    temp_loot[key]['qty'] += item_qty
-                                else:
-                                    # Condense non-decay items
-                                    key = item_name
-                                    if key not in temp_loot: temp_loot[key] = {'qty': 0, 'dice': set(), 'is_decay': False}
-                                    temp_loot[key]['qty'] += item_qty
-                                    if qty_str: temp_loot[key]['dice'].add(qty_str)
-                    
-                    loot_summary = {}
-                    for key, data in temp_loot.items():
-                        if data['is_decay']:
-                            loot_summary[key] = data['qty']
-                        else:
-                            dice_strs = sorted(list(data['dice']))
-                            dice_suffix = f" [{', '.join(dice_strs)}]" if dice_strs else ""
-                            loot_summary[f"{key}{dice_suffix}"] = data['qty']
+                    # Generate Loot Summary with Aggregation, from the encounter's seed (or a new one)
+                    encounter_seed = st.session_state.pop("current_encounter_seed", None) or rng.operation_seed()
+                    loot_summary = roll_encounter_loot(st.session_state.current_encounter,
+                                                       lambda name: bestiary[name].loot if name in bestiary else (),
+                                                       Stream(encounter_seed, "loot"))
                     
                     log_entry = {
                         "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
                         "biome": "Manual Scan",
                         "threats": {e["name"]: e["count"] for e in st.session_state.current_encounter},
                         "loot": loot_summary,
-                        "cost": int(total_cr_cost)
+                        "cost": int(total_cr_cost),
+                        "seed": encounter_seed
                     }
                     
                     saved_logs.append(log_entry)
@@ -459,4 +393,5 @@ def render_scanner() -> None:
             with c_clear:
                 if st.button("🗑️", use_container_width=True):
                     st.session_state.current_encounter = []
+                    st.session_state.pop("current_encounter_seed", None)
                     st.rerun()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import multiprocessing as mp
+import time
+from utils.cache_bus import CacheBus
+
+WORKERS = 4
+TIMEOUT = 5.0  # seconds a worker waits for the invalidation
+
+def _listen(path: str, ready, results, worker_id: int) -> None:
+    seen = []
+    bus = CacheBus(path, on_invalidate=lambda p, keys: seen.append((p, keys)), poll_seconds=0.01).start()
+    ready.put(worker_id)
+    deadline = time.monotonic() + TIMEOUT
+    while not seen and time.monotonic() < deadline:
+        time.sleep(0.005)
+    bus.stop()
+    results.put((worker_id, seen))
+
+def test_every_process_sees_an_invalidation(tmp_path):
+    path = str(tmp_path / "cache_bus.log")
+    ctx = mp.get_context("spawn")
+    ready, results = ctx.Queue(), ctx.Queue()
+    procs = [ctx.Process(target=_listen, args=(path, ready, results, i)) for i in range(WORKERS)]
+    for p in procs:
+        p.start()
+    try:
+        for _ in procs:
+            ready.get(timeout=30)
+        CacheBus(path).publish("data/characters.json", ["Alice"])
+        seen = dict(results.get(timeout=30) for _ in procs)
+    finally:
+        for p in procs:
+            p.join(timeout=10)
+    assert sorted(seen) == list(range(WORKERS))
+    for worker_id, messages in seen.items():
+        assert messages == [("data/characters.json", ["Alice"])], f"worker {worker_id} missed the invalidation"
+
+def test_own_messages_are_ignored(tmp_path):
+    path = str(tmp_path / "cache_bus.log")
+    seen = []
+    bus = CacheBus(path, on_invalidate=lambda p, keys: seen.append(p))
+    bus.publish("data/items.json")
+    assert bus.poll() == [] and seen == []
+
+def test_truncated_log_invalidates_everything(tmp_path):
+    path = str(tmp_path / "cache_bus.log")
+    reader = CacheBus(path)
+    writer = CacheBus(path)
+    for _ in range(10):
+        writer.publish("data/items.json")
+    assert reader.poll() == ["data/items.json"]
+    # As when a writer truncates the log past CACHE_BUS_MAX_BYTES
+    open(path, "wb").close()
+    writer.publish("data/perks.json")
+    assert reader.poll() == [None]
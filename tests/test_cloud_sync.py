@@ -0,0 +1,94 @@
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+import threading
+import pytest
+from utils.cloud_sync import make_server
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a device's copy of the repository, against the remote at sys.argv[1]
+SETUP = """
+import sys
+from constants import SAVED_FILE, BESTIARY_FILE
+from utils.cloud_sync import SyncError, get_remote, push, pull
+from utils.data_manager import load_data, save_data, flush_saves
+remote = get_remote(sys.argv[1])
+
+def add_log(biome):
+    logs = load_data(SAVED_FILE)
+    logs.append({"date": "2026-10-17 12:00", "biome": biome, "threats": {}, "loot": {}, "cost": 0})
+    save_data(SAVED_FILE, logs)
+    flush_saves()
+
+def set_creature_level(name, level):
+    bestiary = load_data(BESTIARY_FILE)
+    bestiary[name]["level"] = level
+    save_data(BESTIARY_FILE, bestiary)
+    flush_saves()
+"""
+
+def _device(tmp_path, name):
+    path = tmp_path / name
+    path.mkdir()
+    shutil.copytree(os.path.join(REPO, "data"), path / "data",
+                    ignore=shutil.ignore_patterns("*.db*", "*.idx", "sync_*", "replica_id",
+                                                  "*.crdt.json", "*.journal.jsonl", "cache_bus.log", "*.lock"))
+    return str(path)
+
+def _run(device, url, code):
+    env = dict(os.environ, PYTHONPATH=REPO)
+    proc = subprocess.run([sys.executable, "-c", SETUP + textwrap.dedent(code), url],
+                          cwd=device, env=env, capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.splitlines()
+
+@pytest.fixture(params=["directory", "server"])
+def remote_url(request, tmp_path):
+    store = str(tmp_path / "cloud")
+    if request.param == "directory":
+        yield store
+        return
+    server = make_server(store, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_push_without_pull_keeps_other_devices_changes(tmp_path, remote_url):
+    a, b = _device(tmp_path, "a"), _device(tmp_path, "b")
+    _run(a, remote_url, "push(remote)")
+    _run(b, remote_url, "pull(remote)")
+    creatures = sorted(_run(a, remote_url, "print(*list(load_data(BESTIARY_FILE))[:2], sep='\\n')"))
+    assert len(creatures) == 2
+
+    _run(a, remote_url, f"""
+        add_log("FromA")
+        set_creature_level({creatures[0]!r}, 41)
+        push(remote)
+    """)
+    # B changed other records without pulling: its push is refused, its pull merges
+    out = _run(b, remote_url, f"""
+        add_log("FromB")
+        set_creature_level({creatures[1]!r}, 42)
+        try:
+            push(remote)
+            print("pushed")
+        except SyncError:
+            print("refused")
+        pull(remote)
+        push(remote)
+    """)
+    assert out == ["refused"]
+
+    check = f"""
+        pull(remote)
+        bestiary = load_data(BESTIARY_FILE)
+        print(*[log["biome"] for log in load_data(SAVED_FILE) if log["biome"].startswith("From")],
+              bestiary[{creatures[0]!r}]["level"], bestiary[{creatures[1]!r}]["level"], sep="\\n")
+    """
+    for device in (a, b):
+        assert _run(device, remote_url, check) == ["FromA", "FromB", "41", "42"]
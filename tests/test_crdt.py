@@ -0,0 +1,99 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from utils import crdt
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = [{"id": "c1", "name": "Ann", "hp_current": 10, "notes": "", "inventory": [{"id": "i1", "name": "Knife"}]}]
+
+def _device(replica, records, t):
+    return crdt.observe(crdt.observe({}, BASE, replica, [1, replica, 0]), records, replica, [t, replica, 0])
+
+def _edited(**fields):
+    record = json.loads(json.dumps(BASE[0]))
+    record.update(fields)
+    return [record]
+
+def test_merge_is_commutative_associative_and_idempotent():
+    states = [
+        _device("a", _edited(notes="from a", hp_current=7), 10),
+        _device("b", _edited(notes="from b", inventory=[{"id": "i2", "name": "Pipe"}]), 20),
+        _device("c", [], 30),
+    ]
+    results = set()
+    for x, y, z in itertools.permutations(states):
+        results.add(json.dumps(crdt.merge(crdt.merge(x, y), z), sort_keys=True))
+        results.add(json.dumps(crdt.merge(x, crdt.merge(y, z)), sort_keys=True))
+    assert len(results) == 1
+    merged = json.loads(results.pop())
+    assert crdt.merge(merged, merged) == merged
+
+def test_counters_and_registers_merge():
+    a = _device("a", _edited(notes="from a", hp_current=7), 10)
+    b = _device("b", _edited(notes="from b", hp_current=14), 20)
+    [record] = crdt.materialize(crdt.merge(a, b))
+    # Damage on one device and healing on the other both apply; the later note wins
+    assert record["hp_current"] == 11
+    assert record["notes"] == "from b"
+
+def test_edit_after_removal_restores_the_record():
+    removed = _device("a", [], 10)
+    edited = _device("b", _edited(notes="still here"), 20)
+    for state in (crdt.merge(removed, edited), crdt.merge(edited, removed)):
+        assert [r["notes"] for r in crdt.materialize(state)] == ["still here"]
+
+def test_removal_after_edit_removes_the_record():
+    edited = _device("b", _edited(notes="too late"), 10)
+    removed = _device("a", [], 20)
+    assert crdt.materialize(crdt.merge(removed, edited)) == []
+    assert crdt.materialize(crdt.merge(edited, removed)) == []
+
+def test_removed_inventory_entry_stays_removed_unless_edited_later():
+    dropped = _device("a", _edited(inventory=[]), 10)
+    renamed = _device("b", _edited(inventory=[{"id": "i1", "name": "Rusty Knife"}]), 20)
+    [record] = crdt.materialize(crdt.merge(dropped, renamed))
+    assert record["inventory"] == [{"id": "i1", "name": "Rusty Knife"}]
+    dropped_later = _device("a", _edited(inventory=[]), 30)
+    [record] = crdt.materialize(crdt.merge(dropped_later, renamed))
+    assert record["inventory"] == []
+
+# --- Saves stamp edits when they are made, not when a sync observes them ---
+def _run(device, code):
+    proc = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=device,
+                          env=dict(os.environ, PYTHONPATH=REPO), capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.strip()
+
+def _edit(device, notes):
+    _run(device, f"""
+        from utils.character_store import update_character
+        from utils.data_manager import flush_saves
+        update_character(lambda c: c.update(notes={notes!r}), char_id="c1")
+        flush_saves()
+    """)
+
+def _sync(device, other):
+    return _run(device, f"""
+        import json
+        from utils.character_store import merge_characters, load_characters
+        with open({os.path.join(other, "data", "characters.crdt.json")!r}) as f:
+            merge_characters(json.load(f))
+        print(load_characters()[0]["notes"])
+    """)
+
+def test_the_later_edit_wins_whichever_device_syncs_last(tmp_path):
+    for first, second in (("a", "b"), ("b", "a")):
+        devices = {}
+        for name in "ab":
+            path = tmp_path / f"{first}{second}-{name}" / "data"
+            path.mkdir(parents=True)
+            (path / "characters.json").write_text(json.dumps(BASE))
+            devices[name] = str(path.parent)
+        _edit(devices[first], f"edited on {first}")
+        _edit(devices[second], f"edited on {second}")
+        # The first editor syncs last, after its edit was made: it still loses
+        assert _sync(devices[second], devices[first]) == f"edited on {second}"
+        assert _sync(devices[first], devices[second]) == f"edited on {second}"
@@ -0,0 +1,32 @@
+from utils.storage import RecordStore
+
+def _store(tmp_path, data):
+    store = RecordStore(str(tmp_path / "wasteland.db"))
+    store.save_collection("characters", data)
+    return store
+
+def _rows(store):
+    return dict(store._conn.execute("SELECT key, body FROM records WHERE collection = 'characters'"))
+
+def test_named_records_only_are_written(tmp_path):
+    chars = [{"id": "a", "hp": 1}, {"id": "b", "hp": 2}, {"id": "c", "hp": 3}]
+    store = _store(tmp_path, chars)
+    before = _rows(store)
+
+    # "a" changed in memory too, but only "b" is named
+    edited = [{"id": "a", "hp": 10}, {"id": "b", "hp": 20}, {"id": "c", "hp": 3}]
+    assert store.save_records("characters", edited, ["b"]) == 1
+    rows = _rows(store)
+    assert rows["a"] == before["a"] and rows["b"] != before["b"]
+    assert store.get("characters", "b") == {"id": "b", "hp": 20}
+
+def test_inserts_and_deletes_leave_other_rows_alone(tmp_path):
+    store = _store(tmp_path, [{"id": "a"}, {"id": "b"}, {"id": "c"}])
+    assert store.save_records("characters", [{"id": "z"}, {"id": "b"}, {"id": "c"}], ["z", "a"]) == 2
+    assert store.load_collection("characters") == [{"id": "b"}, {"id": "c"}, {"id": "z"}]
+
+def test_unresolvable_keys_fall_back_to_a_full_diff(tmp_path):
+    store = _store(tmp_path, [{"id": "a"}, {"name": "legacy"}])
+    data = [{"id": "a", "hp": 5}, {"name": "legacy", "hp": 1}]
+    store.save_records("characters", data, ["@1"])
+    assert store.load_collection("characters") == data
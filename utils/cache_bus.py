@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set
+from constants import CACHE_BUS_FILE, CACHE_BUS_POLL_SECONDS, CACHE_BUS_MAX_BYTES
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still atomic enough for one line
+    fcntl = None
+
+# --- CROSS-PROCESS INVALIDATION ---
+# Every worker appends one JSON line per saved file to a shared log and tails it from
+# a daemon thread. Lines written by other processes invalidate just the named file in
+# the local cache (and, when the writer knew them, the changed record keys). The log
+# is truncated once it grows past CACHE_BUS_MAX_BYTES; a reader that notices the
+# truncation invalidates everything, since it may have missed messages.
+
+class CacheBus:
+    def __init__(self, path: str = CACHE_BUS_FILE,
+                 on_invalidate: Optional[Callable[[Optional[str], Optional[List[str]]], None]] = None,
+                 poll_seconds: float = CACHE_BUS_POLL_SECONDS):
+        self.path = path
+        self.on_invalidate = on_invalidate
+        self.poll_seconds = poll_seconds
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.received = 0
+        self._offset = 0
+        self._partial = b""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _lock(self, f, exclusive: bool = True) -> None:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock(self, f) -> None:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def publish(self, filepath: Optional[str], keys: Optional[List[str]] = None) -> None:
+        """Tells every other process that `filepath` changed (None: every file).
+
+        `keys` optionally names the records that changed; None means all of them.
+        """
+        msg = {"origin": self.origin, "file": filepath, "ts": time.time()}
+        if keys is not None:
+            msg["keys"] = list(keys)
+        line = json.dumps(msg) + "\n"
+        try:
+            dir_name = os.path.dirname(self.path)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            with open(self.path, "ab") as f:
+                self._lock(f)
+                try:
+                    if f.tell() > CACHE_BUS_MAX_BYTES:
+                        f.truncate(0)
+                    f.write(line.encode("utf-8"))
+                    f.flush()
+                finally:
+                    self._unlock(f)
+        except OSError:
+            # The bus is best effort; the local cache was already invalidated
+            pass
+
+    def poll(self) -> List[Optional[str]]:
+        """Reads new messages from other processes and dispatches them.
+
+        Returns the invalidated paths (None meaning "everything").
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size == self._offset:
+            return []
+
+        # path -> changed record keys (None: the whole file)
+        changed: Dict[Optional[str], Optional[Set[str]]] = {}
+        if size < self._offset:
+            # Log was truncated under us; messages may have been lost
+            self._offset, self._partial = 0, b""
+            changed[None] = None
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        self._offset += len(chunk)
+
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        for raw in lines:
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue
+            if msg.get("origin") == self.origin:
+                continue
+            path, keys = msg.get("file"), msg.get("keys")
+            if keys is None:
+                changed[path] = None
+            elif path not in changed:
+                changed[path] = set(keys)
+            elif changed[path] is not None:
+                changed[path].update(keys)
+
+        if None in changed:
+            changed = {None: None}
+        for path, keys in changed.items():
+            self.received += 1
+            if self.on_invalidate:
+                self.on_invalidate(path, sorted(keys) if keys is not None else None)
+        return list(changed)
+
+    def start(self) -> "CacheBus":
+        """Starts tailing the log from its current end."""
+        if self._thread is not None:
+            return self
+        try:
+            self._offset = os.path.getsize(self.path)
+        except OSError:
+            self._offset = 0
+        self._thread = threading.Thread(target=self._run, name="cache-bus", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception:
+                # Never let a bad message kill the listener
+                pass
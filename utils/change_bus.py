@@ -0,0 +1,58 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# --- IN-PROCESS CHANGE NOTIFICATIONS ---
+# The storage layer publishes every change here: the file, and the ids of the records
+# that changed when the writer knows them (None means "anything in the file").
+# Fragments that used to re-read and re-compute a character every few seconds now
+# compare a version tuple instead and only reload when their own record changed.
+# Saves made by other server processes arrive through the cache bus.
+
+_COND = threading.Condition()
+_SEQ = 0
+_FILE_VERSIONS: Dict[str, int] = {}
+_RECORD_VERSIONS: Dict[Tuple[str, str], int] = {}
+_SUBSCRIBERS: List[Callable[[str, Optional[List[str]]], None]] = []
+
+def publish(filepath: str, keys: Optional[List[str]] = None) -> None:
+    """Announces a change to `filepath` (to the given record keys, or to all records)."""
+    global _SEQ
+    with _COND:
+        _SEQ += 1
+        if keys is None:
+            _FILE_VERSIONS[filepath] = _FILE_VERSIONS.get(filepath, 0) + 1
+        else:
+            for key in keys:
+                _RECORD_VERSIONS[(filepath, key)] = _RECORD_VERSIONS.get((filepath, key), 0) + 1
+        _COND.notify_all()
+        subscribers = list(_SUBSCRIBERS)
+    for callback in subscribers:
+        try:
+            callback(filepath, keys)
+        except Exception:
+            pass
+
+def seq() -> int:
+    """Global counter, bumped by every publish."""
+    return _SEQ
+
+def version(filepath: str, key: Optional[str] = None) -> Tuple[int, int]:
+    """Changes whenever the record (or, without a key, any whole-file change) is published."""
+    return (_FILE_VERSIONS.get(filepath, 0), _RECORD_VERSIONS.get((filepath, key), 0) if key else 0)
+
+def subscribe(callback: Callable[[str, Optional[List[str]]], None]) -> Callable[[], None]:
+    """Registers callback(filepath, keys) and returns a function that removes it."""
+    with _COND:
+        _SUBSCRIBERS.append(callback)
+
+    def unsubscribe() -> None:
+        with _COND:
+            if callback in _SUBSCRIBERS:
+                _SUBSCRIBERS.remove(callback)
+    return unsubscribe
+
+def wait_for_change(since: int, timeout: Optional[float] = None) -> int:
+    """Blocks until something is published after `since` (a seq() value). Returns the new seq."""
+    with _COND:
+        _COND.wait_for(lambda: _SEQ != since, timeout)
+        return _SEQ
@@ -6,10 +6,14 @@ import uuid
 import random
 import time
 import copy
-from utils.data_manager import load_data, save_data
+from utils.data_manager import load_data, load_static, save_data, invalidate_cache
+from utils.character_store import load_characters, save_character, update_character, patch_character, find_character, CharacterConflictError
+from utils import change_bus
 from utils.character_logic import get_default_character, calculate_stats, SKILL_MAP
 from utils.item_components import render_item_form, render_modifier_builder, parse_modifiers, join_modifiers, get_item_data_from_form
 from utils.dice import roll_dice
+from utils.global_search import SOURCES, search_keys
+from utils.item_catalog import get_catalog, find_item
 from constants import ITEM_FILE, PERKS_FILE, RECIPES_FILE, CHARACTERS_FILE
 
 BESTIARY_FILE = "data/bestiary.json"
@@ -530,6 +534,46 @@ def render_bars(char, effective_health_max, effective_stamina_max):
         col_stamina_max.text_input("Max SP", value=str(effective_stamina_max), disabled=True, label_visibility="collapsed")
         char["stamina_current"] = col_stamina_current.number_input("Curr SP", min_value=0, max_value=effective_stamina_max, step=1, key="c_stamina_curr", label_visibility="collapsed")
 
+# mtime of the characters file at the last check, shared by every fragment of this process
+_seen_mtime = None
+
+def _pick_up_outside_edits():
+    """Invalidates the characters cache once when the file changed on disk without a save
+    from this app (e.g. edited by hand); our own saves only cost one extra re-read."""
+    global _seen_mtime
+    try:
+        mtime = os.path.getmtime(CHARACTERS_FILE)
+    except OSError:
+        return
+    if _seen_mtime is not None and mtime != _seen_mtime:
+        invalidate_cache(CHARACTERS_FILE, broadcast=False)
+    _seen_mtime = mtime
+
+def get_live_character(cache_key, char_id=None, char_index=None, name=None):
+    """Character for an auto-refreshing fragment, re-read only when change_bus reports a change to it.
+
+    Returns (char, index), or (None, None) if the character is gone.
+    """
+    _pick_up_outside_edits()
+    cached = st.session_state.get(cache_key)
+    if cached is not None and cached["version"] == change_bus.version(CHARACTERS_FILE, cached["id"]):
+        return cached["char"], cached["index"]
+
+    start = change_bus.seq()
+    chars = load_characters()
+    idx = find_character(chars, char_id, name, char_index)
+    if idx == -1 and not char_id and not name and char_index is not None and 0 <= char_index < len(chars):
+        idx = char_index
+    if idx == -1:
+        st.session_state.pop(cache_key, None)
+        return None, None
+
+    char = chars[idx]
+    # If anything was published while loading, re-read on the next tick to be safe
+    version = change_bus.version(CHARACTERS_FILE, char.get("id")) if change_bus.seq() == start else None
+    st.session_state[cache_key] = {"id": char.get("id"), "version": version, "char": char, "index": idx}
+    return char, idx
+
 def _update_and_save_char(original_char, target_char, key, value, char_index, save_callback):
     """Helper to update character data and save to disk immediately."""
     target_char[key] = value
@@ -537,11 +581,8 @@ def _update_and_save_char(original_char, target_char, key, value, char_index, sa
     original_char[key] = value
     
     if char_index is not None:
-        # Save directly to disk to ensure persistence of the fresh object
-        all_chars = load_data(CHARACTERS_FILE)
-        if all_chars and len(all_chars) > char_index:
-            all_chars[char_index] = target_char
-            save_data(CHARACTERS_FILE, all_chars)
+        # Journaled single-field patch: no stale overwrite, no full rewrite of the file
+        patch_character({key: value}, char_id=target_char.get("id"), index=char_index)
     
     # Trigger callback (updates session state mirrors if needed)
     if save_callback:
@@ -552,12 +593,12 @@ def _render_hp_manager_fragment(char, max_hp, save_callback, char_index):
     target_char = char
     target_max = max_hp
     
-    # If linked to a DB index, reload fresh data to detect external changes
+    # If linked to a DB index, pick up external changes (only re-read when the record changed)
     if char_index is not None:
         try:
-            fresh_data = load_data(CHARACTERS_FILE)
-            if fresh_data and len(fresh_data) > char_index:
-                target_char = fresh_data[char_index]
+            fresh_char, _ = get_live_character(f"live_hp_dlg_{char_index}", char.get("id"), char_index)
+            if fresh_char:
+                target_char = fresh_char
                 # Recalculate Max HP based on fresh stats
                 eff_hp, _, _, _, _ = calculate_stats(target_char)
                 target_max = eff_hp
@@ -592,9 +633,9 @@ def _render_sp_manager_fragment(char, max_sp, save_callback, char_index):
     
     if char_index is not None:
         try:
-            fresh_data = load_data(CHARACTERS_FILE)
-            if fresh_data and len(fresh_data) > char_index:
-                target_char = fresh_data[char_index]
+            fresh_char, _ = get_live_character(f"live_sp_dlg_{char_index}", char.get("id"), char_index)
+            if fresh_char:
+                target_char = fresh_char
                 _, eff_sp, _, _, _ = calculate_stats(target_char)
                 target_max = eff_sp
         except Exception:
@@ -784,8 +825,7 @@ def crafting_manager_dialog(char, save_callback=None):
                     # Check if we can stack
                     # For simplicity, just add new item. The user can stack manually or we implement auto-stack later.
                     # We should try to find item data from ITEM_FILE to get weight/desc
-                    eq_db = load_data(ITEM_FILE)
-                    db_item = next((i for i in eq_db if i["name"] == res_name), None)
+                    db_item = find_item(res_name)
                     
                     new_item = {
                         "id": str(uuid.uuid4()),
@@ -847,15 +887,16 @@ def level_up_dialog(char, current_level, save_callback):
         tab_p, tab_s = st.tabs(["New Perk", "Ability Score"])
         
         with tab_p:
-            perks_db = load_data(PERKS_FILE)
+            perks_db = load_static(PERKS_FILE)
             if not isinstance(perks_db, list): perks_db = []
             perk_opts = [p["name"] for p in perks_db if "name" in p]
+            perk_catalog = get_catalog(PERKS_FILE)
             sel_perk = st.selectbox("Select Perk", [""] + perk_opts, key=f"{dlg_id}_perk_sel")
             
             if st.button("Add Perk", key=f"{dlg_id}_btn_add_perk"):
                 if st.session_state[f"{dlg_id}_perks_spent"] < total_perk_points:
                     if sel_perk:
-                        p_data = next((p for p in perks_db if p["name"] == sel_perk), None)
+                        p_data = perk_catalog.find(sel_perk)
                         if p_data:
                             new_p = copy.deepcopy(p_data)
                             new_p["id"] = str(uuid.uuid4())
@@ -962,7 +1003,7 @@ def level_up_dialog(char, current_level, save_callback):
 
 @st.dialog("Add Monster")
 def add_monster_dialog(tracker_key, callback=None):
-    bestiary = load_data(BESTIARY_FILE)
+    bestiary = load_static(BESTIARY_FILE)
     if not bestiary:
         st.error("Bestiary not found or empty.")
         return
@@ -1226,7 +1267,7 @@ def edit_item_dialog(item, item_id, all_items, callback, show_load=True, show_ty
     current_values = {} 
     mods_key = f"{dialog_id}_mods"
     
-    db_items = load_data(ITEM_FILE)
+    db_items = load_static(ITEM_FILE)
     render_item_form(dialog_id, current_values, mods_key, db_items, show_quantity=True, is_equipment=show_load)
     
     # Retrieve updated data
@@ -1340,6 +1381,15 @@ def edit_item_dialog(item, item_id, all_items, callback, show_load=True, show_ty
             callback()
         st.rerun()
 
+def filter_db_options(query, file_path, options, labels):
+    """Database ids matching a search box, best match first (all of them without a query)."""
+    if not query:
+        return options
+    if file_path in SOURCES:
+        return [i for i in search_keys(query, file_path) if i in labels]
+    # Files outside the global search (e.g. backgrounds): plain name filter
+    return [i for i in options if query.lower() in labels[i].lower()]
+
 @st.dialog("Add Item")
 def add_db_item_dialog(label, file_path, char, char_key, session_key, prefix, callback=None, close_key=None, key=None):
     """Dialog to add items from database or custom."""
@@ -1356,7 +1406,7 @@ def add_db_item_dialog(label, file_path, char, char_key, session_key, prefix, ca
 
     show_load = (label == "Equipment")
     show_type = (label == "Equipment")
-    data_list = load_data(file_path)
+    data_list = load_static(file_path)
     if not isinstance(data_list, list):
         data_list = []
     
@@ -1369,15 +1419,17 @@ def add_db_item_dialog(label, file_path, char, char_key, session_key, prefix, ca
     
     st.markdown(f"**Add {label}**")
     
-    # Database Selection
-    selected_id = st.selectbox(f"Search Database:", [""] + options, format_func=lambda x: labels.get(x, "") if x else "", key=f"{prefix}_select_dlg")
+    # Database Selection (ranked by the global search; typos and partial words allowed)
+    db_query = st.text_input("Search Database:", key=f"{prefix}_search_dlg")
+    options = filter_db_options(db_query, file_path, options, labels)
+    selected_id = st.selectbox(f"{len(options)} matches:", [""] + options, format_func=lambda x: labels.get(x, "") if x else "", key=f"{prefix}_select_dlg")
     
     c_qty, c_add = st.columns([1, 3])
     qty_val = c_qty.number_input("Qty", min_value=1, value=1, step=1, key=f"{prefix}_db_add_qty")
     
     if c_add.button(f"Add Selected to {label}", key=f"{prefix}_btn_add_dlg", use_container_width=True):
         if selected_id:
-            entry = next((e for e in valid_items if e["id"] == selected_id), None)
+            entry = get_catalog(file_path).get(selected_id)
             
             # Use shared conversion logic for robust import
             new_item = convert_nested_to_flat(entry)
@@ -1468,12 +1520,14 @@ def render_database_manager(label, file_path, char, char_key, session_key, prefi
         
         options = [i["id"] for i in valid_items]
         labels = {i["id"]: i.get("name", "Unknown") for i in valid_items}
+        db_query = st.text_input(f"Search {label}:", key=f"{prefix}_search")
+        options = filter_db_options(db_query, file_path, options, labels)
         st.selectbox(f"Database {label}:", [""] + options, format_func=lambda x: labels.get(x, "") if x else "", key=f"{prefix}_select")
         
         def add_db_item():
             selected_id = st.session_state.get(f"{prefix}_select")
             if selected_id:
-                entry = next((e for e in valid_items if e["id"] == selected_id), None)
+                entry = get_catalog(file_path).get(selected_id)
                 
                 # Use shared conversion logic
                 new_item = convert_nested_to_flat(entry)
@@ -1855,12 +1909,8 @@ def show_attack_result(weapon, char, attack_total, attack_roll, attack_mod, dama
         ammo_identifier = weapon.get("ammo_item", "")
         
         # Resolve Ammo Name from ID (since inventory stores Names, but Weapon stores ID)
-        ammo_search_name = ammo_identifier
-        db_items = load_data(ITEM_FILE)
-        if isinstance(db_items, list):
-            found_ammo = next((x for x in db_items if x.get("id") == ammo_identifier), None)
-            if found_ammo:
-                ammo_search_name = found_ammo.get("name", ammo_identifier)
+        found_ammo = get_catalog(ITEM_FILE).get(ammo_identifier)
+        ammo_search_name = found_ammo.get("name", ammo_identifier) if found_ammo else ammo_identifier
         
         # Magazine System
         if ammo_cap > 0:
@@ -2127,23 +2177,20 @@ def _render_sb_inventory_content(char, effective_stats, save_callback):
         else:
             st.caption("Stash is empty.")
 
+def _save_char_record(char, char_index=None):
+    """Revision-checked save of a live character; reports a conflict instead of overwriting."""
+    try:
+        save_character(char, index=char_index)
+        return True
+    except CharacterConflictError as e:
+        st.error(str(e))
+        return False
+
 @st.fragment(run_every=5)
 def render_live_inventory(char_id, char_index, label="Equipment"):
     """Fragment to render inventory that auto-updates from disk."""
-    # Reload char data
-    data = load_data(CHARACTERS_FILE)
-    if not isinstance(data, list):
-        return
-
-    char = None
-    # Try index
-    if char_index is not None and 0 <= char_index < len(data):
-        if data[char_index].get("id") == char_id:
-            char = data[char_index]
-    
-    # Fallback ID
-    if not char:
-        char = next((c for c in data if c.get("id") == char_id), None)
+    # Reloaded only when this character's record changed
+    char, _ = get_live_character(f"live_inv_char_{char_id}", char_id, char_index)
 
     if char:
         try:
@@ -2152,16 +2199,7 @@ def render_live_inventory(char_id, char_index, label="Equipment"):
             
             def local_save():
                 # Save changes back to disk
-                all_chars = load_data(CHARACTERS_FILE)
-                # Find index again
-                t_idx = -1
-                for i, c in enumerate(all_chars):
-                    if c.get("id") == char_id:
-                        t_idx = i
-                        break
-                if t_idx != -1:
-                    all_chars[t_idx] = char
-                    save_data(CHARACTERS_FILE, all_chars)
+                _save_char_record(char)
 
             # Render Inventory
             render_inventory_management(
@@ -2177,52 +2215,26 @@ def render_live_inventory(char_id, char_index, label="Equipment"):
 @st.fragment(run_every=3)
 def render_live_status_row(char_index, char_id=None):
     """Renders the status row (HP, SP, XP, Caps) inside a fragment for auto-updates."""
-    # Optimization: Check file timestamp to avoid unnecessary processing
-    try:
-        mtime = os.path.getmtime(CHARACTERS_FILE)
-    except OSError:
-        mtime = 0
+    # Optimization: the record is only re-read when change_bus reports a change to it
+    char, found_index = get_live_character(f"live_stat_char_{char_index}", char_id, char_index)
+    if not char:
+        st.error("Character not found (ID mismatch).")
+        return
+    if found_index != char_index:
+        # Index mismatch (list shifted?); attempt to fix global state if possible
+        char_index = found_index
+        if "active_char_idx" in st.session_state:
+            st.session_state.active_char_idx = found_index
         
     cache_key = f"live_stat_cache_{char_index}"
     
-    # Only reload and recalculate if the file has changed or cache is missing
-    if cache_key not in st.session_state or st.session_state[cache_key]["mtime"] != mtime:
-            
-        saved_chars = load_data(CHARACTERS_FILE)
-        
-        # Verify we are loading the correct character by ID to prevent index shift issues
-        char = None
-        if char_index < len(saved_chars):
-            candidate = saved_chars[char_index]
-            if char_id and candidate.get("id") != char_id:
-                # Index mismatch (list shifted?), search for ID
-                found = False
-                for i, c in enumerate(saved_chars):
-                    if c.get("id") == char_id:
-                        char = c
-                        char_index = i # Update local index
-                        # Attempt to fix global state if possible
-                        if "active_char_idx" in st.session_state:
-                            st.session_state.active_char_idx = i
-                        found = True
-                        break
-                
-                # If not found by ID, check if candidate has NO ID (legacy data match)
-                if not found and candidate.get("id") is None:
-                    char = candidate
-            else:
-                char = candidate
-        
-        if not char:
-            st.error("Character not found (ID mismatch).")
-            return
-
+    # Only recalculate if the record was reloaded or cache is missing
+    if cache_key not in st.session_state or st.session_state[cache_key]["char"] is not char:
         # Recalculate stats to get effective max values
         effective_health_max, effective_stamina_max, _, _, _ = calculate_stats(char)
         
         # Update Cache
         st.session_state[cache_key] = {
-            "mtime": mtime,
             "char": char,
             "hp_max": effective_health_max,
             "sp_max": effective_stamina_max
@@ -2236,11 +2248,8 @@ def render_live_status_row(char_index, char_id=None):
     unique_id = char.get("name", "char")
     
     def local_save():
-        # Load fresh data to ensure we don't overwrite other concurrent changes
-        current_db = load_data(CHARACTERS_FILE)
-        if current_db and len(current_db) > char_index:
-            current_db[char_index] = char
-            save_data(CHARACTERS_FILE, current_db)
+        # Revision-checked save so concurrent changes are merged, not overwritten
+        _save_char_record(char, char_index)
             
         # Update session state mirror if needed
         if "char_sheet" in st.session_state and st.session_state.get("active_char_idx") == char_index:
@@ -2346,40 +2355,8 @@ def render_dm_health_bar(char_index):
 @st.fragment(run_every=5)
 def render_statblock_inventory_fragment(char_id, char_index):
     """Fragment to render statblock inventory that auto-updates from disk."""
-    # --- Add mtime check and notification trigger ---
-    try:
-        mtime = os.path.getmtime(CHARACTERS_FILE)
-    except OSError:
-        mtime = 0
-    
-    cache_key = f"live_inv_cache_{char_index}"
-    
-    file_changed = cache_key not in st.session_state or st.session_state[cache_key].get("mtime") != mtime
-    
-    if file_changed:
-        if cache_key not in st.session_state: st.session_state[cache_key] = {}
-        st.session_state[cache_key]["mtime"] = mtime
-    
-    # Robust Data Loading
-    data = load_data(CHARACTERS_FILE)
-    if not isinstance(data, list):
-        st.error("Failed to load character data.")
-        return
-
-    char = None
-    
-    # 1. Try by Index (Fastest)
-    if char_index is not None and 0 <= char_index < len(data):
-        candidate = data[char_index]
-        if candidate.get("id") == char_id:
-            char = candidate
-        elif not candidate.get("id"):
-            # Fallback for legacy characters without ID in DB but ID in session
-            char = candidate
-            
-    # 2. Fallback by ID (Robustness against list shifts)
-    if not char:
-        char = next((c for c in data if c.get("id") == char_id), None)
+    # Reloaded only when this character's record changed
+    char, _ = get_live_character(f"live_inv_cache_{char_index}", char_id, char_index)
         
     if char:
         try:
@@ -2387,22 +2364,8 @@ def render_statblock_inventory_fragment(char_id, char_index):
             _, _, _, effective_stats, _ = calculate_stats(char)
             
             def local_save():
-                all_chars = load_data(CHARACTERS_FILE)
-                # Find index again to ensure we save to correct slot
-                target_idx = -1
-                for i, c in enumerate(all_chars):
-                    if c.get("id") == char_id:
-                        target_idx = i
-                        break
-                
-                # Fallback to index if ID not found (Legacy support)
-                if target_idx == -1 and char_index is not None and char_index < len(all_chars):
-                    if not all_chars[char_index].get("id"):
-                        target_idx = char_index
-                
-                if target_idx != -1:
-                    all_chars[target_idx] = char
-                    save_data(CHARACTERS_FILE, all_chars)
+                # Matched by id, falling back to the index for legacy characters
+                _save_char_record(char, char_index)
             
             _render_sb_inventory_content(char, effective_stats, local_save)
         except Exception as e:
@@ -2412,24 +2375,12 @@ def render_statblock_inventory_fragment(char_id, char_index):
 
 def _safe_char_update(char_id, update_func):
     """
-    Safely updates a character's data by reloading from disk, applying the update, and saving.
+    Safely updates a character's data by applying the update to the latest stored revision.
     update_func(fresh_char) -> None
     """
-    all_chars = load_data(CHARACTERS_FILE)
-    target_idx = -1
-    fresh_char = None
-    
-    for i, c in enumerate(all_chars):
-        if c.get("id") == char_id:
-            target_idx = i
-            fresh_char = c
-            break
+    fresh_char = update_character(update_func, char_id=char_id)
             
     if fresh_char:
-        update_func(fresh_char)
-        all_chars[target_idx] = fresh_char
-        save_data(CHARACTERS_FILE, all_chars)
-        
         # Update session state mirror if this is the active character
         if "char_sheet" in st.session_state and st.session_state.char_sheet.get("id") == char_id:
             st.session_state.char_sheet = fresh_char
@@ -2448,6 +2399,7 @@ def _safe_item_action(char_id, item_id, action_func):
             action_func(fresh_char, item)
         else:
             st.warning(f"Item not found on character.")
+            return False
             
     return _safe_char_update(char_id, wrapper)
 
@@ -2915,13 +2867,8 @@ def render_character_statblock(char, save_callback=None, char_index=None, char_i
                         
                         # Resolve Ammo Name from ID for Reload Button
                         ammo_identifier = w.get("ammo_item", "")
-                        ammo_search_name = ammo_identifier
-                        if ammo_identifier:
-                            db_items = load_data(ITEM_FILE)
-                            if isinstance(db_items, list):
-                                found_ammo = next((x for x in db_items if x.get("id") == ammo_identifier), None)
-                                if found_ammo:
-                                    ammo_search_name = found_ammo.get("name", ammo_identifier)
+                        found_ammo = get_catalog(ITEM_FILE).get(ammo_identifier) if ammo_identifier else None
+                        ammo_search_name = found_ammo.get("name", ammo_identifier) if found_ammo else ammo_identifier
 
                         # Reload Button
                         if w.get("ammo_capacity", 0) > 0 and ammo_identifier:
@@ -418,4 +418,5 @@ def duplicate_character(char):
     new_char = copy.deepcopy(char)
     new_char["id"] = str(uuid.uuid4())
     new_char["name"] = f"{new_char.get('name', 'Unnamed')} (Copy)"
+    new_char.pop("_rev", None)
     return new_char
\ No newline at end of file
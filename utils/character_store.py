@@ -0,0 +1,399 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from constants import CHARACTERS_FILE, CHARACTERS_CRDT_FILE, SERVER_WORKERS, JOURNAL_COMPACT_BYTES
+from utils.data_manager import load_data, load_fresh, save_data, flush_saves, invalidate_cache
+from utils.journal import get_journal, SEQ_FIELD
+from utils import crdt
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+# --- REVISIONED CHARACTER WRITES ---
+# Every character record carries a `_rev` counter that is bumped on each write.
+# Writers no longer push the whole characters.json back from a stale copy:
+#   * update_character() re-reads the latest record and applies a change to it
+#     (combat tracker, item hand-outs, quick HP/SP edits).
+#   * save_character() writes a full edited record only if its `_rev` is still
+#     current; otherwise the edit is merged field by field against the revision
+#     it was based on, and CharacterConflictError is raised if both sides changed
+#     the same value.
+# The file lock is only held for the read-merge-write itself, never while a user
+# is editing, so the DM and players do not wait on each other.
+
+REV_FIELD = "_rev"
+_LOCK_FILE = f"{CHARACTERS_FILE}.lock"
+_THREAD_LOCK = threading.Lock()
+
+# Revisions this process has handed out, used as the merge base for stale saves:
+# {character id: {revision: record}}, least recently used first. The cap is per
+# character, so edits to one character never evict another's bases.
+_BASES: Dict[str, "OrderedDict[int, Dict[str, Any]]"] = {}
+_MAX_BASES_PER_CHARACTER = 32
+
+class CharacterConflictError(Exception):
+    """A save was based on an old revision and changed the same fields as a newer write."""
+
+    def __init__(self, name: str, fields: List[str]):
+        self.name = name
+        self.fields = fields
+        super().__init__(f"'{name}' was changed elsewhere ({', '.join(fields)}). Reload to see the latest version.")
+
+@contextmanager
+def _write_lock():
+    with _THREAD_LOCK:
+        lock_dir = os.path.dirname(_LOCK_FILE)
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        with open(_LOCK_FILE, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+                if SERVER_WORKERS > 1:
+                    # Other processes read the file itself, not this process's save queue
+                    flush_saves(CHARACTERS_FILE)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _keys_of(char: Dict[str, Any]) -> Optional[List[str]]:
+    """Change-notification keys for a written record (None: legacy record without an id)."""
+    return [char["id"]] if char.get("id") else None
+
+def get_rev(char: Dict[str, Any]) -> int:
+    return char.get(REV_FIELD, 0) if isinstance(char, dict) else 0
+
+def _remember(char: Dict[str, Any]) -> None:
+    char_id = char.get("id")
+    if not char_id:
+        return
+    revs = _BASES.setdefault(char_id, OrderedDict())
+    rev = get_rev(char)
+    if rev in revs:
+        revs.move_to_end(rev)
+        return
+    revs[rev] = copy.deepcopy(char)
+    if len(revs) > _MAX_BASES_PER_CHARACTER:
+        revs.popitem(last=False)
+
+def _base_of(char: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The remembered record `char` was edited from, if any."""
+    revs = _BASES.get(char.get("id"))
+    rev = get_rev(char)
+    if not revs or rev not in revs:
+        return None
+    revs.move_to_end(rev)
+    return revs[rev]
+
+def load_characters() -> List[Dict[str, Any]]:
+    """load_data(CHARACTERS_FILE) that also remembers each revision as a merge base."""
+    chars = load_data(CHARACTERS_FILE)
+    if not isinstance(chars, list):
+        return []
+    for char in chars:
+        if isinstance(char, dict):
+            _remember(char)
+    return chars
+
+def find_character(chars: List[Dict[str, Any]], char_id: Optional[str] = None,
+                   name: Optional[str] = None, index: Optional[int] = None) -> int:
+    """Index of a character by id, then name, then (legacy, id-less) list position. -1 if missing."""
+    if char_id:
+        for i, c in enumerate(chars):
+            if c.get("id") == char_id:
+                return i
+    if name:
+        for i, c in enumerate(chars):
+            if c.get("name") == name:
+                return i
+    if index is not None and 0 <= index < len(chars) and not chars[index].get("id"):
+        return index
+    return -1
+
+# --- MERGE ---
+_MISSING = object()
+
+def _merge(base: Any, ours: Any, theirs: Any, path: str, conflicts: List[str]) -> Any:
+    """Three-way merge: keeps whichever side changed a value; records clashes in `conflicts`."""
+    if ours == theirs:
+        return ours
+    if ours == base:
+        return theirs
+    if theirs == base:
+        return ours
+
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        base = base if isinstance(base, dict) else {}
+        merged = {}
+        for key in list(theirs) + [k for k in ours if k not in theirs]:
+            value = _merge(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING),
+                           f"{path}.{key}" if path else str(key), conflicts)
+            if value is not _MISSING:
+                merged[key] = value
+        return merged
+
+    if _is_id_list(ours) and _is_id_list(theirs) and (base is _MISSING or _is_id_list(base)):
+        # Inventories, perks, backgrounds: merge entry by entry using their ids
+        base_map = {e["id"]: e for e in base} if base is not _MISSING else {}
+        ours_map = {e["id"]: e for e in ours}
+        theirs_map = {e["id"]: e for e in theirs}
+        merged = []
+        for entry_id in list(theirs_map) + [i for i in ours_map if i not in theirs_map]:
+            value = _merge(base_map.get(entry_id, _MISSING), ours_map.get(entry_id, _MISSING),
+                           theirs_map.get(entry_id, _MISSING), f"{path}[{entry_id}]", conflicts)
+            if value is not _MISSING:
+                merged.append(value)
+        return merged
+
+    conflicts.append(path or "record")
+    return theirs
+
+def _is_id_list(value: Any) -> bool:
+    if not isinstance(value, list):
+        return False
+    ids = [e.get("id") if isinstance(e, dict) else None for e in value]
+    return all(ids) and len(set(ids)) == len(ids)
+
+# --- WRITE API ---
+def update_character(update_func: Callable[[Dict[str, Any]], Any], char_id: Optional[str] = None,
+                     name: Optional[str] = None, index: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Applies update_func(char) to the latest stored version of a character and saves it.
+
+    Returns the updated character, or None if it was not found or update_func returned False.
+    """
+    with _write_lock():
+        _start_observing()
+        chars = load_fresh(CHARACTERS_FILE)
+        if not isinstance(chars, list):
+            return None
+        idx = find_character(chars, char_id, name, index)
+        if idx == -1:
+            return None
+        char = chars[idx]
+        if update_func(char) is False:
+            return None
+        char[REV_FIELD] = get_rev(char) + 1
+        if not save_data(CHARACTERS_FILE, chars, changed_keys=_keys_of(char)):
+            return None
+        _observe_locked(chars)
+    _remember(char)
+    return char
+
+def save_character(char: Dict[str, Any], index: Optional[int] = None) -> Dict[str, Any]:
+    """Saves a full, edited character record (compare-and-swap on its `_rev`).
+
+    If another writer got there first, the edit is merged with the newer record
+    and `char` is updated in place with the merged result. Raises
+    CharacterConflictError when both sides changed the same value.
+    """
+    with _write_lock():
+        _start_observing()
+        chars = load_fresh(CHARACTERS_FILE)
+        if not isinstance(chars, list):
+            chars = []
+        idx = find_character(chars, char.get("id"), index=index)
+        if idx == -1 and index is not None and 0 <= index < len(chars) and char.get("id") and not chars[index].get("id"):
+            # Legacy record that only got its id in this session
+            idx = index
+
+        if idx == -1:
+            merged = dict(char)
+            merged[REV_FIELD] = 1
+            chars.append(merged)
+        else:
+            current = chars[idx]
+            if get_rev(current) == get_rev(char):
+                merged = dict(char)
+            else:
+                base = _base_of(char)
+                if base is None:
+                    raise CharacterConflictError(char.get("name", "Character"), ["unknown base revision"])
+                conflicts: List[str] = []
+                merged = _merge(base, char, current, "", conflicts)
+                if conflicts:
+                    raise CharacterConflictError(char.get("name", "Character"), conflicts)
+            merged[REV_FIELD] = get_rev(current) + 1
+            chars[idx] = merged
+
+        if not save_data(CHARACTERS_FILE, chars, changed_keys=_keys_of(merged)):
+            return char
+        _observe_locked(chars)
+
+    char.clear()
+    char.update(merged)
+    _remember(char)
+    return char
+
+def add_character(char: Dict[str, Any]) -> int:
+    """Appends a new character and returns its index."""
+    with _write_lock():
+        _start_observing()
+        chars = load_fresh(CHARACTERS_FILE)
+        if not isinstance(chars, list):
+            chars = []
+        char[REV_FIELD] = 1
+        chars.append(char)
+        if save_data(CHARACTERS_FILE, chars, changed_keys=_keys_of(char)):
+            _observe_locked(chars)
+    _remember(char)
+    return len(chars) - 1
+
+def delete_character(char_id: Optional[str] = None, index: Optional[int] = None) -> bool:
+    with _write_lock():
+        _start_observing()
+        chars = load_fresh(CHARACTERS_FILE)
+        if not isinstance(chars, list):
+            return False
+        idx = find_character(chars, char_id, index=index)
+        if idx == -1:
+            return False
+        chars.pop(idx)
+        if not save_data(CHARACTERS_FILE, chars):
+            return False
+        _observe_locked(chars)
+        return True
+
+# --- JOURNALED PATCHES ---
+# Combat damage/healing and the HP/SP dialogs only touch a couple of fields; they are
+# appended to the characters journal instead of rewriting characters.json. Every
+# read replays the journal (utils/journal.py) and compaction folds it back.
+_JOURNAL = get_journal(CHARACTERS_FILE)
+_COMPACT_LOCK = threading.Lock()
+
+def patch_character(fields: Dict[str, Any], char_id: Optional[str] = None,
+                    name: Optional[str] = None, index: Optional[int] = None) -> bool:
+    """Sets a few top-level fields of a character with a single journal append."""
+    if not char_id:
+        chars = load_characters()
+        idx = find_character(chars, None, name, index)
+        if idx == -1:
+            return False
+        char_id = chars[idx].get("id")
+        if not char_id:
+            # Legacy character without an id: nothing to key the patch on
+            return update_character(lambda c: c.update(fields), name=name, index=index) is not None
+
+    with _write_lock():
+        _start_observing()
+        _JOURNAL.append(char_id, fields)
+        _observe_fields(char_id, fields)
+    invalidate_cache(CHARACTERS_FILE, keys=[char_id])
+
+    if _JOURNAL.size() > JOURNAL_COMPACT_BYTES:
+        threading.Thread(target=compact_journal, name="journal-compaction", daemon=True).start()
+    return True
+
+def compact_journal() -> int:
+    """Folds the journal into characters.json and truncates it. Returns the patches folded."""
+    if not _COMPACT_LOCK.acquire(blocking=False):
+        return 0
+    try:
+        with _write_lock():
+            entries = _JOURNAL.entries()
+            if not entries:
+                return 0
+            # load_fresh already replays the journal on top of the snapshot
+            chars = load_fresh(CHARACTERS_FILE)
+            # Same content, so no record is announced as changed
+            if not save_data(CHARACTERS_FILE, chars, changed_keys=[]):
+                return 0
+            # The snapshot must be on disk before its patches are dropped
+            flush_saves(CHARACTERS_FILE)
+            _JOURNAL.truncate(max(e["seq"] for e in entries))
+        # Readers that raced the truncation reload once more
+        invalidate_cache(CHARACTERS_FILE, keys=[])
+        return len(entries)
+    finally:
+        _COMPACT_LOCK.release()
+
+# --- MERGEABLE SYNC STATE ---
+# Devices that play offline sync characters as CRDT state (utils/crdt.py) kept in
+# characters.crdt.json. Every write above records its edit there as a write of this
+# device, stamped when it is made, so the last edit wins a conflict rather than the
+# last device to sync; a sync only observes what changed outside these functions.
+# Merging another device's state rewrites only the characters whose content changed,
+# keeping their journal position so old patches are not replayed.
+_CLOCK: Dict[str, crdt.Clock] = {}
+_OBSERVING = threading.Event()
+
+def _clock() -> crdt.Clock:
+    if "clock" not in _CLOCK:
+        _CLOCK["clock"] = crdt.Clock(crdt.replica_id())
+    return _CLOCK["clock"]
+
+def _start_observing() -> None:
+    """Observes the characters as they are before the first recorded edit.
+
+    That first observation is stamped as old (see crdt.observe), so the edit that
+    follows gets a stamp of its own instead of being folded into it.
+    """
+    if _OBSERVING.is_set():
+        return
+    if not load_fresh(CHARACTERS_CRDT_FILE):
+        chars = load_fresh(CHARACTERS_FILE)
+        _observe_locked(chars if isinstance(chars, list) else [])
+    _OBSERVING.set()
+
+def _observe_fields(char_id: str, fields: Dict[str, Any]) -> None:
+    state = load_fresh(CHARACTERS_CRDT_FILE)
+    state = state if isinstance(state, dict) else {}
+    clock = _clock()
+    observed = crdt.observe_fields(state, char_id, fields, clock.replica, clock.stamp())
+    if observed is not state:
+        save_data(CHARACTERS_CRDT_FILE, observed, changed_keys=[])
+
+def _observe_locked(chars: List[Dict[str, Any]]) -> Dict[str, Any]:
+    state = load_fresh(CHARACTERS_CRDT_FILE)
+    state = state if isinstance(state, dict) else {}
+    clock = _clock()
+    observed = crdt.observe(state, chars, clock.replica, clock.stamp())
+    if observed != state:
+        save_data(CHARACTERS_CRDT_FILE, observed, changed_keys=[])
+    return observed
+
+def observe_characters() -> Dict[str, Any]:
+    """Records local character edits in the sync state and returns it."""
+    with _write_lock():
+        chars = load_fresh(CHARACTERS_FILE)
+        return _observe_locked(chars if isinstance(chars, list) else [])
+
+def _content(char: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in char.items() if k not in crdt.LOCAL_FIELDS}
+
+def merge_characters(remote_state: Dict[str, Any]) -> int:
+    """Merges another device's sync state into the characters. Returns characters changed."""
+    with _write_lock():
+        chars = load_fresh(CHARACTERS_FILE)
+        chars = chars if isinstance(chars, list) else []
+        state = crdt.merge(_observe_locked(chars), remote_state)
+        current = {crdt.record_key(c): c for c in chars if isinstance(c, dict)}
+
+        merged, changed = [], []
+        for record in crdt.materialize(state, like=chars):
+            key = crdt.record_key(record)
+            old = current.get(key)
+            if old is not None and _content(old) == record:
+                merged.append(old)
+                continue
+            if old is not None and SEQ_FIELD in old:
+                record[SEQ_FIELD] = old[SEQ_FIELD]
+            record[REV_FIELD] = get_rev(old) + 1 if old is not None else 1
+            merged.append(record)
+            changed.append(key)
+
+        kept = {crdt.record_key(c) for c in merged}
+        removed = [k for k in current if k not in kept]
+        if changed or removed:
+            keys = changed + removed
+            # Legacy records without an id cannot be announced by key
+            save_data(CHARACTERS_FILE, merged, None if any(k.startswith("name:") for k in keys) else keys)
+        save_data(CHARACTERS_CRDT_FILE, state, changed_keys=[])
+        for char in merged:
+            _remember(char)
+        return len(changed) + len(removed)
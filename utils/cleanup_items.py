@@ -1,37 +1,45 @@
 import json
 import os
-
-# Path relative to where you run the script (project root)
-FILE_PATH = os.path.join("data", "items.json")
+from utils import packs
+from constants import ITEM_FILE
 
 def remove_duplicates():
-    if not os.path.exists(FILE_PATH):
-        print(f"File not found: {FILE_PATH}")
+    # Split into packs: the first occurrence across all packs is kept.
+    # Paths are relative to where you run the script (project root)
+    files = packs.all_paths(ITEM_FILE) if packs.is_packed(ITEM_FILE) else [ITEM_FILE]
+    missing = [file_path for file_path in files if not os.path.exists(file_path)]
+    if not files or missing:
+        print(f"File not found: {missing[0] if missing else ITEM_FILE}")
         return
 
-    print(f"Scanning {FILE_PATH}...")
-    with open(FILE_PATH, "r", encoding="utf-8") as f:
-        items = json.load(f)
-
     seen_ids = set()
-    unique_items = []
     duplicates_count = 0
 
-    for item in items:
-        item_id = item.get("id")
-        if item_id and item_id in seen_ids:
-            duplicates_count += 1
-        else:
-            if item_id:
-                seen_ids.add(item_id)
-            unique_items.append(item)
+    for file_path in files:
+        print(f"Scanning {file_path}...")
+        with open(file_path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+
+        unique_items = []
+        file_duplicates = 0
+        for item in items:
+            item_id = item.get("id")
+            if item_id and item_id in seen_ids:
+                file_duplicates += 1
+            else:
+                if item_id:
+                    seen_ids.add(item_id)
+                unique_items.append(item)
+
+        if file_duplicates > 0:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(unique_items, f, indent=2)
+            duplicates_count += file_duplicates
 
     if duplicates_count > 0:
-        with open(FILE_PATH, "w", encoding="utf-8") as f:
-            json.dump(unique_items, f, indent=2)
         print(f"Successfully removed {duplicates_count} duplicate items.")
     else:
         print("No duplicates found.")
 
 if __name__ == "__main__":
-    remove_duplicates()
\ No newline at end of file
+    remove_duplicates()
@@ -0,0 +1,634 @@
+import streamlit as st
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from constants import (
+    DATA_DIR, BESTIARY_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE, CHARACTERS_CRDT_FILE,
+    SAVED_FILE, DM_SCREEN_FILE, CLOUD_SYNC_URL, SYNC_CACHE_DIR, SYNC_BASE_FILE
+)
+from utils import codec
+from utils.storage import list_record_keys
+from utils.save_queue import write_atomic
+from utils.data_manager import load_fresh, save_data, flush_saves, invalidate_cache, physical_files
+from utils.character_store import observe_characters, merge_characters
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+# --- DELTA CLOUD SYNC ---
+# Every data file is described by a content-addressed Merkle tree:
+#   root   -> {file name: file node hash}
+#   file   -> {"shape": "dict" | "list", "order": order hash, "buckets": [bucket hashes]}
+#   order  -> [record keys, in file order]
+#   bucket -> {record key: record hash} for the keys that fall into the bucket
+#   record -> the record's JSON
+# Objects are named by the SHA-256 of their JSON. They are stored zlib-compressed one
+# by one and travel as zlib-compressed batches. The remote only stores objects plus
+# one mutable "ref" naming the current root.
+# Push and pull walk both trees from the root and stop at the first matching hash,
+# so only changed files, buckets and records are exchanged. Uploads go bottom-up and
+# the ref moves last: an interrupted push changes nothing remotely and its retry
+# skips the objects already uploaded. Objects fetched by a pull are kept in
+# SYNC_CACHE_DIR until the pull has been applied, so a retry does not fetch them again.
+# Each copy remembers the root it last synced with (SYNC_BASE_FILE). A push is refused
+# once another device has moved the ref past that base: the copy has to pull first.
+# A pull merges every file three ways against the base, record by record, so changes
+# made here since the last sync are kept next to the ones pulled (see _merge_records).
+# Characters are synced as CRDT state (utils/crdt.py) rather than as characters.json,
+# and a pull merges them field by field.
+
+# Characters travel as their CRDT state; characters.json is rebuilt from it locally
+SYNC_FILES = [BESTIARY_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE, CHARACTERS_CRDT_FILE, SAVED_FILE, DM_SCREEN_FILE]
+BUCKETS = 16
+BATCH_OBJECTS = 256
+
+class SyncError(Exception):
+    """The remote could not be reached, sent bad data or refused an update."""
+
+def _hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+def _node(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _bucket_of(key: str) -> int:
+    return hashlib.sha1(key.encode("utf-8")).digest()[0] % BUCKETS
+
+def _verify(obj_hash: str, raw: bytes) -> bytes:
+    if _hash(raw) != obj_hash:
+        raise SyncError(f"Corrupted object {obj_hash[:12]}: hash mismatch")
+    return raw
+
+def _decompress(obj_hash: str, blob: bytes) -> bytes:
+    try:
+        return _verify(obj_hash, zlib.decompress(blob))
+    except zlib.error as e:
+        raise SyncError(f"Corrupted object {obj_hash[:12]}: {e}")
+
+def _batches(items: List[str], size: int = BATCH_OBJECTS) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+# --- MERKLE TREE ---
+class Tree:
+    """Merkle tree of a set of data files: every object by hash, plus the root."""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.records: Set[str] = set()
+        self.files: Dict[str, str] = {}
+        self.root: Optional[str] = None
+
+    def add(self, raw: bytes, children: Iterable[str] = (), record: bool = False) -> str:
+        obj_hash = _hash(raw)
+        self.objects.setdefault(obj_hash, raw)
+        children = list(children)
+        if children:
+            self.children[obj_hash] = children
+        if record:
+            self.records.add(obj_hash)
+        return obj_hash
+
+def _record_items(data: Union[Dict, List]) -> List[tuple]:
+    if isinstance(data, dict):
+        return [(str(k), v) for k, v in data.items()]
+    return list(zip(list_record_keys(data), data))
+
+def build_tree(files: Dict[str, Union[Dict, List]]) -> Tree:
+    tree = Tree()
+    for name, data in sorted(files.items()):
+        items = _record_items(data)
+        buckets: List[Dict[str, str]] = [{} for _ in range(BUCKETS)]
+        for key, record in items:
+            buckets[_bucket_of(key)][key] = tree.add(codec.dumps(record).encode("utf-8"), record=True)
+        order = tree.add(_node([key for key, _ in items]))
+        bucket_hashes = [tree.add(_node(b), children=sorted(set(b.values()))) for b in buckets]
+        file_node = {"shape": "dict" if isinstance(data, dict) else "list", "order": order, "buckets": bucket_hashes}
+        tree.files[name] = tree.add(_node(file_node), children=[order] + bucket_hashes)
+    tree.root = tree.add(_node(tree.files), children=sorted(set(tree.files.values())))
+    return tree
+
+def _file_name(path: str) -> str:
+    return os.path.relpath(path, DATA_DIR).replace(os.sep, "/")
+
+def _file_path(name: str) -> str:
+    return os.path.join(DATA_DIR, *name.split("/"))
+
+CRDT_NAME = _file_name(CHARACTERS_CRDT_FILE)
+
+def local_files() -> Dict[str, Union[Dict, List]]:
+    """Current contents of every synced file, keyed by its path inside DATA_DIR."""
+    # Local character edits since the last sync become CRDT writes of this device
+    observe_characters()
+    files = {}
+    for datafile in SYNC_FILES:
+        for path in physical_files(datafile):
+            data = load_fresh(path)
+            if isinstance(data, (dict, list)) and (data or os.path.exists(path)):
+                files[_file_name(path)] = data
+    return files
+
+# --- REMOTES ---
+class DirectoryRemote:
+    """A directory standing in for the cloud (the sync server stores into one too)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.location = os.path.abspath(path)
+        self.sent = 0
+        self.received = 0
+        self._lock = threading.Lock()
+
+    def _object_path(self, obj_hash: str) -> str:
+        return os.path.join(self.path, "objects", obj_hash[:2], obj_hash)
+
+    def get_ref(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.path, "ref"), "r", encoding="utf-8") as f:
+                ref = f.read().strip()
+        except FileNotFoundError:
+            return None
+        self.received += len(ref)
+        return ref or None
+
+    def set_ref(self, new: str, old: Optional[str]) -> None:
+        """Moves the ref to `new` if it still points at `old` (compare-and-swap)."""
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "ref.lock"), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                if self.get_ref() != old:
+                    raise SyncError("The cloud copy changed during the sync, try again.")
+                write_atomic(os.path.join(self.path, "ref"), new)
+                self.sent += len(new)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def has(self, hashes: List[str]) -> Set[str]:
+        return {h for h in hashes if os.path.exists(self._object_path(h))}
+
+    def put_objects(self, objects: Dict[str, bytes]) -> None:
+        for obj_hash, raw in objects.items():
+            _verify(obj_hash, raw)
+            path = self._object_path(obj_hash)
+            if os.path.exists(path):
+                continue
+            blob = zlib.compress(raw, 6)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+            self.sent += len(blob)
+
+    def get_objects(self, hashes: List[str]) -> Dict[str, bytes]:
+        objects = {}
+        for obj_hash in hashes:
+            try:
+                with open(self._object_path(obj_hash), "rb") as f:
+                    blob = f.read()
+            except FileNotFoundError:
+                raise SyncError(f"The cloud copy is missing object {obj_hash[:12]}")
+            self.received += len(blob)
+            objects[obj_hash] = _decompress(obj_hash, blob)
+        return objects
+
+def _pack_bundle(objects: Dict[str, bytes]) -> bytes:
+    """One compressed payload: (hash, uint32 length, JSON) per object."""
+    return zlib.compress(b"".join(h.encode("ascii") + struct.pack("<I", len(raw)) + raw for h, raw in objects.items()), 6)
+
+def _unpack_bundle(payload: bytes) -> Dict[str, bytes]:
+    try:
+        data = zlib.decompress(payload)
+    except zlib.error as e:
+        raise SyncError(f"Corrupted payload: {e}")
+    objects = {}
+    pos = 0
+    while pos < len(data):
+        obj_hash = data[pos:pos + 64].decode("ascii")
+        (length,) = struct.unpack_from("<I", data, pos + 64)
+        objects[obj_hash] = _verify(obj_hash, data[pos + 68:pos + 68 + length])
+        pos += 68 + length
+    return objects
+
+class HttpRemote:
+    """Client for the sync server (`python -m utils.cloud_sync serve`)."""
+
+    def __init__(self, url: str, timeout: float = 30):
+        self.url = url.rstrip("/")
+        self.location = self.url
+        self.timeout = timeout
+        self.sent = 0
+        self.received = 0
+
+    def _request(self, method: str, path: str, body: bytes = b"", missing_ok: bool = False) -> Optional[bytes]:
+        req = urllib.request.Request(self.url + path, data=body if method != "GET" else None, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                data = resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404 and missing_ok:
+                return None
+            if e.code == 409:
+                raise SyncError("The cloud copy changed during the sync, try again.")
+            raise SyncError(f"{method} {path} failed: HTTP {e.code} {e.read().decode('utf-8', 'replace')}")
+        except OSError as e:
+            raise SyncError(f"Cannot reach {self.url}: {e}")
+        self.sent += len(body)
+        self.received += len(data)
+        return data
+
+    def get_ref(self) -> Optional[str]:
+        data = self._request("GET", "/ref", missing_ok=True)
+        return data.decode("ascii") if data else None
+
+    def set_ref(self, new: str, old: Optional[str]) -> None:
+        self._request("PUT", "/ref", _node({"new": new, "old": old}))
+
+    def has(self, hashes: List[str]) -> Set[str]:
+        return set(json.loads(self._request("POST", "/has", _node(hashes))))
+
+    def put_objects(self, objects: Dict[str, bytes]) -> None:
+        self._request("POST", "/objects/put", _pack_bundle(objects))
+
+    def get_objects(self, hashes: List[str]) -> Dict[str, bytes]:
+        return _unpack_bundle(self._request("POST", "/objects/get", _node(hashes)))
+
+def get_remote(url: str = CLOUD_SYNC_URL) -> Optional[Union[DirectoryRemote, HttpRemote]]:
+    if not url:
+        return None
+    if url.startswith(("http://", "https://")):
+        return HttpRemote(url)
+    return DirectoryRemote(url[len("file://"):] if url.startswith("file://") else url)
+
+# --- SYNC BASE ---
+def _load_base(remote) -> Optional[str]:
+    """The root this copy last synced with on `remote`, None if it never did."""
+    try:
+        with open(SYNC_BASE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get(remote.location)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _save_base(remote, root: str) -> None:
+    try:
+        with open(SYNC_BASE_FILE, "r", encoding="utf-8") as f:
+            bases = json.load(f)
+    except (OSError, ValueError):
+        bases = {}
+    if not isinstance(bases, dict):
+        bases = {}
+    bases[remote.location] = root
+    write_atomic(SYNC_BASE_FILE, json.dumps(bases, indent=2))
+
+# --- PUSH / PULL ---
+def _stats(direction: str, tree: Tree, remote, started: float, sent0: int, received0: int) -> Dict[str, Any]:
+    return {
+        "direction": direction,
+        "files": len(tree.files),
+        "files_changed": 0,
+        "records": 0,
+        "objects": 0,
+        "raw_bytes": 0,
+        "full_bytes": sum(len(tree.objects[h]) for h in tree.records),
+        "bytes_sent": remote.sent - sent0,
+        "bytes_received": remote.received - received0,
+        "conflicts": 0,
+        "seconds": time.time() - started,
+    }
+
+class _Fetcher:
+    """Resolves objects from local data first, then the pull cache, then the remote."""
+
+    def __init__(self, remote, local: Tree, cache_dir: str = SYNC_CACHE_DIR):
+        self.remote = remote
+        self.local = local
+        self.cache_dir = cache_dir
+        self.fetched: List[str] = []
+        self.raw_bytes = 0
+
+    def _cache_path(self, obj_hash: str) -> str:
+        return os.path.join(self.cache_dir, obj_hash)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        wanted = []
+        for obj_hash in dict.fromkeys(hashes):
+            if obj_hash in self.local.objects:
+                found[obj_hash] = self.local.objects[obj_hash]
+                continue
+            try:
+                with open(self._cache_path(obj_hash), "rb") as f:
+                    found[obj_hash] = _decompress(obj_hash, f.read())
+            except (OSError, SyncError):
+                wanted.append(obj_hash)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for batch in _batches(wanted):
+            objects = self.remote.get_objects(batch)
+            for obj_hash in batch:
+                if obj_hash not in objects:
+                    raise SyncError(f"The cloud copy is missing object {obj_hash[:12]}")
+                raw = objects[obj_hash]
+                with open(self._cache_path(obj_hash), "wb") as f:
+                    f.write(zlib.compress(raw, 6))
+                found[obj_hash] = raw
+                self.fetched.append(obj_hash)
+                self.raw_bytes += len(raw)
+        return found
+
+    def get_json(self, obj_hash: str) -> Any:
+        return json.loads(self.get_many([obj_hash])[obj_hash])
+
+def _read_index(fetcher: _Fetcher, file_hash: Optional[str]) -> Tuple[str, List[str], Dict[str, str]]:
+    """A file's shape, key order and {key: record hash}, without reading the records."""
+    if file_hash is None:
+        return "dict", [], {}
+    node = fetcher.get_json(file_hash)
+    order = fetcher.get_json(node["order"])
+    keyed: Dict[str, str] = {}
+    for bucket in fetcher.get_many(node["buckets"]).values():
+        keyed.update(json.loads(bucket))
+    return node["shape"], order, keyed
+
+def _read_remote_file(fetcher: _Fetcher, file_hash: str, record_hashes: Set[str]) -> Union[Dict, List]:
+    shape, order, keyed = _read_index(fetcher, file_hash)
+    record_hashes.update(keyed.values())
+    records = fetcher.get_many(keyed.values())
+    if shape == "dict":
+        return {key: codec.loads(records[keyed[key]]) for key in order}
+    return [codec.loads(records[keyed[key]]) for key in order]
+
+def _identities(shape: str, order: List[str], keyed: Dict[str, str]) -> Dict[str, Tuple[str, str]]:
+    """{identity: (key, record hash)} in file order.
+
+    A record is identified by its key, except list records keyed by position (no
+    unique id, e.g. saved encounters): those are identified by their content, so an
+    entry appended on two devices is two entries rather than one conflict.
+    """
+    out: Dict[str, Tuple[str, str]] = {}
+    for key in order:
+        record_hash = keyed[key]
+        ident = key
+        if shape == "list" and key.startswith("@"):
+            ident, n = f"@{record_hash}", 1
+            while ident in out:
+                ident, n = f"@{record_hash}#{n}", n + 1
+        out[ident] = (key, record_hash)
+    return out
+
+def _merge_records(base: Dict[str, Tuple[str, str]], local: Dict[str, Tuple[str, str]],
+                   remote: Dict[str, Tuple[str, str]], keep_local: bool) -> Tuple[List[Tuple[str, str]], int]:
+    """Three-way merge of one file: the merged (key, record hash) list and the conflicts.
+
+    A record changed or removed on one side only takes that side. A record changed on
+    both sides is a conflict: the local version wins when `keep_local` (it goes up with
+    the next push), else the remote one; an edit always wins over a removal.
+    """
+    merged, conflicts = [], 0
+    for ident in dict.fromkeys(list(remote) + list(local)):
+        b, l, r = base.get(ident), local.get(ident), remote.get(ident)
+        bh, lh, rh = (x[1] if x else None for x in (b, l, r))
+        if lh == rh or lh == bh:
+            chosen = r
+        elif rh == bh:
+            chosen = l
+        else:
+            conflicts += 1
+            chosen = (l if keep_local else r) if l and r else (l or r)
+        if chosen is not None:
+            merged.append(chosen)
+    return merged, conflicts
+
+def push(remote) -> Dict[str, Any]:
+    """Makes the remote match the local data, uploading only what it does not have.
+
+    Refused when another device pushed since this copy last synced: pull first, which
+    merges their changes in.
+    """
+    started, sent0, received0 = time.time(), remote.sent, remote.received
+    tree = build_tree(local_files())
+    old_ref = remote.get_ref()
+    if old_ref == tree.root:
+        _save_base(remote, old_ref)
+        return _stats("push", tree, remote, started, sent0, received0)
+    if old_ref is not None and old_ref != _load_base(remote):
+        raise SyncError("The cloud copy has changes from another device. Pull first, then push again.")
+
+    # Top-down: a subtree the remote already has is never looked into
+    levels: List[List[str]] = []
+    wanted = [tree.root]
+    while wanted:
+        present: Set[str] = set()
+        for batch in _batches(wanted):
+            present |= remote.has(batch)
+        missing = [h for h in wanted if h not in present]
+        levels.append(missing)
+        wanted = sorted({c for h in missing for c in tree.children.get(h, [])})
+
+    # Bottom-up: records first, so the remote never holds a node with missing children
+    uploaded = [h for level in reversed(levels) for h in level]
+    for batch in _batches(uploaded):
+        remote.put_objects({h: tree.objects[h] for h in batch})
+    remote.set_ref(tree.root, old_ref)
+    _save_base(remote, tree.root)
+
+    stats = _stats("push", tree, remote, started, sent0, received0)
+    stats["files_changed"] = len(levels[1]) if len(levels) > 1 else 0
+    stats["records"] = sum(1 for h in uploaded if h in tree.records)
+    stats["objects"] = len(uploaded)
+    stats["raw_bytes"] = sum(len(tree.objects[h]) for h in uploaded)
+    return stats
+
+def pull(remote) -> Dict[str, Any]:
+    """Brings the remote changes into the local data, downloading only what changed.
+
+    Every file is merged three ways against the root of the last sync, so local
+    changes not pushed yet are kept (see _merge_records); characters merge as CRDT
+    state. Local files the remote does not know about are left untouched.
+    """
+    started, sent0, received0 = time.time(), remote.sent, remote.received
+    ref = remote.get_ref()
+    if ref is None:
+        raise SyncError("The cloud copy is empty, push first.")
+
+    local = build_tree(local_files())
+    if ref == local.root:
+        _save_base(remote, ref)
+        return _stats("pull", local, remote, started, sent0, received0)
+
+    fetcher = _Fetcher(remote, local)
+    base_root = _load_base(remote)
+    try:
+        base_files = fetcher.get_json(base_root) if base_root else {}
+    except SyncError:  # the cloud copy was reset since: there is no common base
+        base_root, base_files = None, {}
+    changed: Dict[str, Union[Dict, List]] = {}
+    record_hashes: Set[str] = set()
+    conflicts = 0
+    remote_files = fetcher.get_json(ref)
+    for name, file_hash in sorted(remote_files.items()):
+        local_hash = local.files.get(name)
+        if local_hash == file_hash or base_files.get(name) == file_hash:
+            continue  # nothing new on the remote side
+        if name == CRDT_NAME or local_hash is None or local_hash == base_files.get(name):
+            changed[name] = _read_remote_file(fetcher, file_hash, record_hashes)
+            continue
+        shape, order, keyed = _read_index(fetcher, file_hash)
+        record_hashes.update(keyed.values())
+        mine = _identities(*_read_index(fetcher, local_hash))
+        merged, file_conflicts = _merge_records(
+            _identities(*_read_index(fetcher, base_files.get(name))), mine,
+            _identities(shape, order, keyed), keep_local=base_root is not None,
+        )
+        conflicts += file_conflicts
+        if merged == list(mine.values()):
+            continue
+        records = fetcher.get_many(h for _, h in merged)
+        if shape == "dict":
+            changed[name] = {key: codec.loads(records[h]) for key, h in merged}
+        else:
+            changed[name] = [codec.loads(records[h]) for _, h in merged]
+
+    for name, data in changed.items():
+        if name == CRDT_NAME:
+            merge_characters(data)
+        elif not save_data(_file_path(name), data):
+            raise SyncError(f"Could not save {name}")
+    flush_saves()
+    invalidate_cache()
+    _save_base(remote, ref)
+    shutil.rmtree(SYNC_CACHE_DIR, ignore_errors=True)
+
+    stats = _stats("pull", local, remote, started, sent0, received0)
+    stats["files_changed"] = len(changed)
+    stats["records"] = sum(1 for h in fetcher.fetched if h in record_hashes)
+    stats["objects"] = len(fetcher.fetched)
+    stats["raw_bytes"] = fetcher.raw_bytes
+    stats["conflicts"] = conflicts
+    return stats
+
+# --- SYNC SERVER ---
+def make_server(path: str, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """HTTP front end for a DirectoryRemote, used as a local stand-in for the cloud."""
+    store = DirectoryRemote(path)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: bytes = b"") -> None:
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_GET(self):
+            if self.path != "/ref":
+                return self._reply(404)
+            ref = store.get_ref()
+            self._reply(200, ref.encode("ascii")) if ref else self._reply(404)
+
+        def do_PUT(self):
+            if self.path != "/ref":
+                return self._reply(404)
+            msg = json.loads(self._body())
+            try:
+                store.set_ref(msg["new"], msg.get("old"))
+            except SyncError as e:
+                return self._reply(409, str(e).encode("utf-8"))
+            self._reply(204)
+
+        def do_POST(self):
+            body = self._body()
+            try:
+                if self.path == "/has":
+                    self._reply(200, _node(sorted(store.has(json.loads(body)))))
+                elif self.path == "/objects/put":
+                    store.put_objects(_unpack_bundle(body))
+                    self._reply(204)
+                elif self.path == "/objects/get":
+                    self._reply(200, _pack_bundle(store.get_objects(json.loads(body))))
+                else:
+                    self._reply(404)
+            except SyncError as e:
+                self._reply(400, str(e).encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+# --- UI ---
+def push_to_cloud() -> bool:
+    """Uploads the local changes to the configured remote."""
+    remote = get_remote()
+    if remote is None:
+        st.warning("Cloud sync is not configured. Set WASTELAND_SYNC_URL to a folder or a sync server URL.")
+        return False
+    try:
+        stats = push(remote)
+    except Exception as e:
+        st.error(f"Cloud Push Failed: {e}")
+        return False
+    st.session_state["cloud_sync_stats"] = stats
+    st.toast(f"☁️ Pushed {stats['records']} changed records ({format_bytes(stats['bytes_sent'])} sent)", icon="✅")
+    return True
+
+def pull_from_cloud() -> bool:
+    """Downloads the records that changed on the remote and merges them into the local data."""
+    remote = get_remote()
+    if remote is None:
+        st.warning("Cloud sync is not configured. Set WASTELAND_SYNC_URL to a folder or a sync server URL.")
+        return False
+    try:
+        stats = pull(remote)
+    except Exception as e:
+        st.error(f"Cloud Pull Failed: {e}")
+        return False
+    st.session_state["cloud_sync_stats"] = stats
+    st.toast(f"☁️ Pulled {stats['records']} changed records ({format_bytes(stats['bytes_received'])} received). Reloading...", icon="✅")
+    return True
+
+def describe_stats(stats: Dict[str, Any]) -> str:
+    return (f"Last {stats['direction']}: {stats['files_changed']}/{stats['files']} files, "
+            f"{stats['records']} records · ↑ {format_bytes(stats['bytes_sent'])} "
+            f"↓ {format_bytes(stats['bytes_received'])} (full copy: {format_bytes(stats['full_bytes'])})"
+            + (f" · {stats['conflicts']} records changed on both sides" if stats.get("conflicts") else ""))
+
+if __name__ == "__main__":
+    # python -m utils.cloud_sync serve <dir> [port]   local sync server
+    # python -m utils.cloud_sync push|pull [url]      sync from the command line
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "serve" and len(sys.argv) > 2:
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 8765
+        print(f"Serving {sys.argv[2]} on http://127.0.0.1:{port}")
+        make_server(sys.argv[2], port=port).serve_forever()
+    elif command in ("push", "pull"):
+        remote = get_remote(sys.argv[2] if len(sys.argv) > 2 else CLOUD_SYNC_URL)
+        if remote is None:
+            sys.exit("No remote: pass a folder/URL or set WASTELAND_SYNC_URL")
+        print(describe_stats(push(remote) if command == "push" else pull(remote)))
+    else:
+        sys.exit("usage: python -m utils.cloud_sync serve <dir> [port] | push [url] | pull [url]")
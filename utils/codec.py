@@ -0,0 +1,38 @@
+import json
+from typing import Any, Tuple, Union
+
+# --- JSON CODEC ---
+# Fast path for parsing and writing the data files. Uses orjson if installed and
+# falls back to the stdlib json module; output is always UTF-8 JSON with 2-space
+# indentation (or compact for the record store) so files stay diffable.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Errors raised by loads() for malformed input, whatever the backend
+DecodeError: Tuple[type, ...] = (ValueError,)
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Serializes to a JSON string. Raises TypeError for values JSON cannot represent."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+        except TypeError:
+            # e.g. non-string dict keys, which the stdlib coerces
+            pass
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def load_file(filepath: str) -> Any:
+    with open(filepath, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,160 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- COMBAT RATING ---
+# The CR formula, with its weights in one place. calculate_cr() and get_creature_role()
+# rate a single statblock (characters, creatures being edited); CRTable rates a whole
+# bestiary at once, one column per input stat, in a single vectorized pass with NumPy
+# when it is installed (plain Python otherwise, same results). A new formula is a
+# recompute() of the stored columns, without touching the creature records.
+
+class CRFormula(NamedTuple):
+    level: float = 5.0          # base score per level
+    dt: float = 4.0             # durability per point of DT
+    ac: float = 2.0             # durability per AC point above 10
+    ap: float = 2.0             # capability per AP
+    ap_baseline: float = 10.0   # AP multiplier: 1.0 at the baseline,
+    ap_step: float = 0.05       # +/- ap_step per point above/below it
+    tank_dt: float = 10.0       # role: tank score = HP + SP + DT * tank_dt,
+    striker_level: float = 5.0  # striker score = level * striker_level
+    striker_ap: float = 5.0     # + AP * striker_ap
+
+CR_FORMULA = CRFormula()
+
+SPECIAL_KEYS = ("STR", "PER", "END", "CHA", "INT", "AGI", "LCK")
+CONTROL_KEYWORDS = ("Stunned", "Prone", "Blinded", "Fatigue", "Paralyzed", "Unconscious", "Grappled", "Restrained")
+ROLES = ("Striker", "Tank", "Controller")
+
+def is_controller(actions: Any) -> bool:
+    """True if any action inflicts a status effect."""
+    for act in actions if isinstance(actions, list) else ():
+        text = ""
+        if isinstance(act, str): text = act
+        elif isinstance(act, dict): text = f"{act.get('name','')} {act.get('effect','')}"
+        if any(k in text for k in CONTROL_KEYWORDS):
+            return True
+    return False
+
+def _total(level, hp, sp, ac, dt, ap, special_sum, formula: CRFormula):
+    # Works on numbers and on NumPy arrays alike (same operation order, same result)
+    base_score = level * formula.level
+    durability_score = ((hp + sp) / 2) + (dt * formula.dt) + ((ac - 10) * formula.ac)
+    capability_score = (ap * formula.ap) + (special_sum / 2)
+    return base_score + durability_score + capability_score
+
+def _ap_multiplier(ap, formula: CRFormula):
+    return 1.0 + ((ap - formula.ap_baseline) * formula.ap_step)
+
+def calculate_cr(data: Dict[str, Any], use_ap_multiplier: bool = False, formula: Optional[CRFormula] = None) -> int:
+    """Calculates the Combat Rating (CR) based on creature stats."""
+    formula = formula or CR_FORMULA
+    special = data.get("special", {})
+    if not isinstance(special, dict):
+        special = {}
+    # Sum SPECIAL stats (defaulting to 5 if missing)
+    special_sum = sum(special.get(k, special.get("LUC" if k == "LCK" else k, 5)) for k in SPECIAL_KEYS)
+    ap = data.get("ap", 0)
+    total = _total(data.get("level", 1), data.get("hp", 0), data.get("sp", 0), data.get("ac", 10),
+                   data.get("dt", 0), ap, special_sum, formula)
+    if use_ap_multiplier:
+        total *= _ap_multiplier(ap, formula)
+    return int(total)
+
+def get_creature_role(data: Dict[str, Any], formula: Optional[CRFormula] = None) -> str:
+    """Determines the combat role of a creature based on stats and actions."""
+    formula = formula or CR_FORMULA
+    if is_controller(data.get("actions", [])):
+        return "Controller"
+    tank_score = (data.get("hp", 0) + data.get("sp", 0)) + (data.get("dt", 0) * formula.tank_dt)
+    striker_score = (data.get("level", 1) * formula.striker_level) + (data.get("ap", 0) * formula.striker_ap)
+    return "Tank" if tank_score > striker_score else "Striker"
+
+def character_cr(char: Dict[str, Any], use_ap_multiplier: bool = False) -> int:
+    """CR of a player character (its sheet fields mapped onto statblock stats)."""
+    return calculate_cr({
+        "level": char.get("level", 1),
+        "hp": char.get("hp_max", 10),
+        "sp": char.get("stamina_max", 10),
+        "ac": char.get("ac", 10),
+        "dt": 0,
+        "ap": char.get("action_points", 10),
+        "special": char.get("stats", {}),
+    }, use_ap_multiplier=use_ap_multiplier)
+
+# --- BESTIARY TABLE ---
+_COLUMNS = ("level", "hp", "sp", "ac", "dt", "ap", "special_sum")
+
+class CRTable:
+    """Base CR, AP-adjusted CR and role of many creatures; row i is `keys[i]`."""
+
+    def __init__(self, keys: List[str], rows: Sequence[Sequence[float]], controller: Sequence[bool],
+                 formula: Optional[CRFormula] = None):
+        """`rows[i]` holds the _COLUMNS values of `keys[i]`."""
+        self.keys = keys
+        self._rows = {key: i for i, key in enumerate(keys)}
+        if np is not None:
+            # One conversion for the whole table; the columns are views into it
+            matrix = np.array(rows, dtype=np.float64).reshape(len(keys), len(_COLUMNS))
+            self._columns = {name: matrix[:, i] for i, name in enumerate(_COLUMNS)}
+            self._controller = np.array(controller, dtype=bool)
+        else:
+            columns = list(zip(*rows)) or [()] * len(_COLUMNS)
+            self._columns = {name: list(column) for name, column in zip(_COLUMNS, columns)}
+            self._controller = list(controller)
+        self.formula = formula or CR_FORMULA
+        self.recompute()
+
+    @classmethod
+    def from_creatures(cls, creatures: Iterable[Any], formula: Optional[CRFormula] = None) -> "CRTable":
+        """Table over Creature models (utils/creatures.py), from their precomputed inputs."""
+        creatures = list(creatures)
+        return cls([c.key for c in creatures], [c.rating_inputs for c in creatures],
+                   [c.controller for c in creatures], formula)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def recompute(self, formula: Optional[CRFormula] = None) -> None:
+        """Re-rates every row, e.g. after the formula changed."""
+        self.formula = formula or self.formula
+        f, cols = self.formula, self._columns
+        if np is not None:
+            total = _total(*(cols[name] for name in _COLUMNS), f)
+            self.cr = total.astype(np.int64)  # truncates like int()
+            self.cr_ap = (total * _ap_multiplier(cols["ap"], f)).astype(np.int64)
+            tank = (cols["hp"] + cols["sp"]) + (cols["dt"] * f.tank_dt)
+            striker = (cols["level"] * f.striker_level) + (cols["ap"] * f.striker_ap)
+            # Index into ROLES: Controller, else Tank or Striker
+            self.role_codes = np.where(self._controller, 2, np.where(tank > striker, 1, 0))
+            return
+        rows = list(zip(*(cols[name] for name in _COLUMNS)))
+        totals = [_total(*row, f) for row in rows]
+        self.cr = [int(t) for t in totals]
+        self.cr_ap = [int(t * _ap_multiplier(row[5], f)) for t, row in zip(totals, rows)]
+        self.role_codes = [
+            2 if controller else (1 if (hp + sp) + (dt * f.tank_dt) > (level * f.striker_level) + (ap * f.striker_ap) else 0)
+            for (level, hp, sp, _, dt, ap, _), controller in zip(rows, self._controller)
+        ]
+
+    def row(self, key: str) -> Optional[int]:
+        return self._rows.get(key)
+
+    def as_lists(self) -> Tuple[List[int], List[int], List[str]]:
+        """(CR, AP-adjusted CR, role) columns as plain Python values, in `keys` order."""
+        if np is not None:
+            return self.cr.tolist(), self.cr_ap.tolist(), [ROLES[code] for code in self.role_codes.tolist()]
+        return list(self.cr), list(self.cr_ap), [ROLES[code] for code in self.role_codes]
+
+    def rating(self, key: str, use_ap_multiplier: bool = False) -> Optional[int]:
+        i = self._rows.get(key)
+        if i is None:
+            return None
+        return int((self.cr_ap if use_ap_multiplier else self.cr)[i])
+
+    def role(self, key: str) -> Optional[str]:
+        i = self._rows.get(key)
+        return ROLES[int(self.role_codes[i])] if i is not None else None
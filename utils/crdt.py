@@ -0,0 +1,262 @@
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from constants import REPLICA_ID_FILE
+
+# --- MERGEABLE RECORDS (CRDT) ---
+# State-based CRDT for the records of a list-shaped data file (characters). The
+# state of a file is {record key: {"c": creation stamp, "node": node}}, where a node
+# mirrors the record's JSON:
+#   reg  last-writer-wins register {"t": "reg", "v": value, "s": stamp}
+#        ({"t": "reg", "d": 1, "s": stamp} is the tombstone of a removed key/entry)
+#   ctr  counter for COUNTER_FIELDS {"t": "ctr", "b": [base, stamp], "p": {replica: n},
+#        "n": {replica: n}}: damage on one device and healing on another both apply
+#   map  {"t": "map", "e": {key: node}} for nested dicts (stats, skills)
+#   set  {"t": "set", "e": {id: node}, "c": {id: stamp}} for lists of records keyed by
+#        `id` (inventory, perks, backgrounds)
+# Stamps are [time_ns, replica, position] and compare the same way everywhere.
+# observe() records the difference between the last state and the current plain
+# data as one replica's writes (observe_fields() for a few fields of one record),
+# merge() combines two states (commutative, associative, idempotent) and
+# materialize() rebuilds the plain records.
+
+COUNTER_FIELDS = {
+    "hp_current", "stamina_current", "xp", "caps", "rads", "radiation",
+    "fatigue", "exhaustion", "hunger", "dehydration", "quantity", "ammo_current",
+}
+# Per-device bookkeeping that is never synced
+LOCAL_FIELDS = {"_rev", "_jseq"}
+
+Stamp = List[Any]
+
+def replica_id(path: str = REPLICA_ID_FILE) -> str:
+    """This installation's replica id, created on first use."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            rid = f.read().strip()
+        if rid:
+            return rid
+    except OSError:
+        pass
+    rid = uuid.uuid4().hex[:12]
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(rid)
+    return rid
+
+class Clock:
+    """Strictly increasing stamps for one replica."""
+
+    def __init__(self, replica: str):
+        self.replica = replica
+        self._last = 0
+
+    def stamp(self) -> Stamp:
+        self._last = max(time.time_ns(), self._last + 1)
+        return [self._last, self.replica, 0]
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_keyed_list(value: Any) -> bool:
+    if not isinstance(value, list) or not value:
+        return False
+    ids = [v.get("id") if isinstance(v, dict) else None for v in value]
+    return all(isinstance(i, str) and i for i in ids) and len(set(ids)) == len(ids)
+
+def _is_tombstone(node: Optional[Dict[str, Any]]) -> bool:
+    return node is None or bool(node.get("d"))
+
+def _tombstone(stamp: Stamp) -> Dict[str, Any]:
+    return {"t": "reg", "d": 1, "s": stamp}
+
+def _at(stamp: Stamp, position: int) -> Stamp:
+    return [stamp[0], stamp[1], position]
+
+# --- OBSERVE ---
+def _new(value: Any, stamp: Stamp, key: Optional[str] = None) -> Dict[str, Any]:
+    if key in COUNTER_FIELDS and _is_number(value):
+        return {"t": "ctr", "b": [value, stamp], "p": {}, "n": {}}
+    if isinstance(value, dict):
+        return {"t": "map", "e": {k: _new(value[k], stamp, k) for k in sorted(value) if k not in LOCAL_FIELDS}}
+    if _is_keyed_list(value):
+        return _observe_set({"t": "set", "e": {}, "c": {}}, value, stamp, "")
+    return {"t": "reg", "v": value, "s": stamp}
+
+def _observe_set(node: Dict[str, Any], value: List[Dict[str, Any]], stamp: Stamp, replica: str) -> Dict[str, Any]:
+    entries, created = dict(node["e"]), dict(node["c"])
+    seen = set()
+    for position, item in enumerate(value):
+        rid = item["id"]
+        seen.add(rid)
+        previous = entries.get(rid)
+        entries[rid] = _observe(previous, item, stamp, replica)
+        if _is_tombstone(previous):
+            # New (or re-added) entry: sorts after everything created before it
+            created[rid] = _at(stamp, position)
+    for rid, child in node["e"].items():
+        if rid not in seen and not _is_tombstone(child):
+            entries[rid] = _tombstone(stamp)
+    return {"t": "set", "e": dict(sorted(entries.items())), "c": dict(sorted(created.items()))}
+
+def _observe(node: Optional[Dict[str, Any]], value: Any, stamp: Stamp, replica: str,
+             key: Optional[str] = None) -> Dict[str, Any]:
+    """Returns `node` updated (copy-on-write) so that it materializes to `value`."""
+    if _is_tombstone(node):
+        return _new(value, stamp, key)
+    kind = node["t"]
+    if kind == "ctr" and _is_number(value):
+        delta = value - _counter_value(node)
+        if not delta:
+            return node
+        side = "p" if delta > 0 else "n"
+        counts = dict(node[side])
+        counts[replica] = counts.get(replica, 0) + abs(delta)
+        return {**node, side: counts}
+    if kind == "map" and isinstance(value, dict):
+        entries = dict(node["e"])
+        for k, v in value.items():
+            if k not in LOCAL_FIELDS:
+                entries[k] = _observe(entries.get(k), v, stamp, replica, k)
+        for k, child in node["e"].items():
+            if k not in value and not _is_tombstone(child):
+                entries[k] = _tombstone(stamp)
+        return {"t": "map", "e": dict(sorted(entries.items()))}
+    if kind == "set" and (_is_keyed_list(value) or value == []):
+        return _observe_set(node, value, stamp, replica)
+    if kind == "reg" and node["v"] == value:
+        return node
+    return _new(value, stamp, key)
+
+def record_key(record: Dict[str, Any]) -> str:
+    """Records are keyed by id; legacy records without one by name."""
+    rid = record.get("id")
+    return rid if isinstance(rid, str) and rid else f"name:{record.get('name', '')}"
+
+def observe(state: Optional[Dict[str, Any]], records: List[Dict[str, Any]], replica: str,
+            stamp: Stamp) -> Dict[str, Any]:
+    """Folds the current plain records into the state as writes of `replica`."""
+    if not state:
+        # First observation: the existing data is not a new write, so any real edit
+        # from another device wins over it
+        stamp = [0, replica, 0]
+    state = dict(state or {})
+    seen = set()
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            continue
+        key = record_key(record)
+        seen.add(key)
+        entry = state.get(key)
+        if entry is None or _is_tombstone(entry["node"]):
+            state[key] = {"c": _at(stamp, position), "node": _new(record, stamp)}
+        else:
+            node = _observe(entry["node"], record, stamp, replica)
+            if node is not entry["node"]:
+                state[key] = {"c": entry["c"], "node": node}
+    for key, entry in list(state.items()):
+        if key not in seen and not _is_tombstone(entry["node"]):
+            state[key] = {"c": entry["c"], "node": _tombstone(stamp)}
+    return dict(sorted(state.items()))
+
+def observe_fields(state: Dict[str, Any], key: str, fields: Dict[str, Any], replica: str,
+                   stamp: Stamp) -> Dict[str, Any]:
+    """Folds new values of a few top-level fields of one record into the state.
+
+    Records the state does not know yet are left to the next observe().
+    """
+    entry = state.get(key)
+    if entry is None or _is_tombstone(entry["node"]) or entry["node"]["t"] != "map":
+        return state
+    entries = dict(entry["node"]["e"])
+    for k, v in fields.items():
+        if k not in LOCAL_FIELDS:
+            entries[k] = _observe(entries.get(k), v, stamp, replica, k)
+    node = {"t": "map", "e": dict(sorted(entries.items()))}
+    if node == entry["node"]:
+        return state
+    return {**state, key: {"c": entry["c"], "node": node}}
+
+# --- MERGE ---
+_ZERO: Stamp = [0, "", 0]
+
+def _max_stamp(node: Dict[str, Any]) -> Stamp:
+    kind = node["t"]
+    if kind == "reg":
+        return node["s"]
+    if kind == "ctr":
+        return node["b"][1]
+    stamps = [_max_stamp(child) for child in node["e"].values()]
+    if kind == "set":
+        stamps += list(node["c"].values())
+    return max(stamps, default=_ZERO)
+
+def merge_nodes(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if a["t"] == b["t"] == "reg":
+        return a if (a["s"], repr(a)) >= (b["s"], repr(b)) else b
+    if a["t"] != b["t"] or a.get("d") or b.get("d"):
+        # Replaced by a value of another kind: the most recent write wins
+        return a if (_max_stamp(a), repr(a)) >= (_max_stamp(b), repr(b)) else b
+    if a["t"] == "ctr":
+        base = a["b"] if (a["b"][1], repr(a["b"])) >= (b["b"][1], repr(b["b"])) else b["b"]
+        return {
+            "t": "ctr", "b": base,
+            "p": {r: max(a["p"].get(r, 0), b["p"].get(r, 0)) for r in sorted(set(a["p"]) | set(b["p"]))},
+            "n": {r: max(a["n"].get(r, 0), b["n"].get(r, 0)) for r in sorted(set(a["n"]) | set(b["n"]))},
+        }
+    entries = {k: merge_nodes(a["e"].get(k), b["e"].get(k)) for k in sorted(set(a["e"]) | set(b["e"]))}
+    if a["t"] == "map":
+        return {"t": "map", "e": entries}
+    created = {k: min(s for s in (a["c"].get(k), b["c"].get(k)) if s is not None)
+               for k in sorted(set(a["c"]) | set(b["c"]))}
+    return {"t": "set", "e": entries, "c": created}
+
+def merge(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combines two file states; the result is the same whichever side is `a`."""
+    a, b = a or {}, b or {}
+    merged = {}
+    for key in sorted(set(a) | set(b)):
+        ea, eb = a.get(key), b.get(key)
+        if ea is None or eb is None:
+            merged[key] = ea or eb
+        else:
+            merged[key] = {"c": min(ea["c"], eb["c"]), "node": merge_nodes(ea["node"], eb["node"])}
+    return merged
+
+# --- MATERIALIZE ---
+def _counter_value(node: Dict[str, Any]) -> Any:
+    return node["b"][0] + sum(node["p"].values()) - sum(node["n"].values())
+
+def _ordered(keys: List[str], created: Dict[str, Stamp], like_order: List[str]) -> List[str]:
+    """Keys in the order of the local copy, then the others by creation stamp."""
+    known = set(keys)
+    first = [k for k in like_order if k in known]
+    placed = set(first)
+    return first + sorted((k for k in keys if k not in placed), key=lambda k: (created.get(k, _ZERO), k))
+
+def materialize_node(node: Dict[str, Any], like: Any = None) -> Any:
+    kind = node["t"]
+    if kind == "reg":
+        return node["v"]
+    if kind == "ctr":
+        return _counter_value(node)
+    live = [k for k, child in node["e"].items() if not _is_tombstone(child)]
+    if kind == "map":
+        like = like if isinstance(like, dict) else {}
+        return {k: materialize_node(node["e"][k], like.get(k)) for k in _ordered(live, {}, list(like))}
+    like_items = {i.get("id"): i for i in like if isinstance(i, dict)} if isinstance(like, list) else {}
+    return [materialize_node(node["e"][k], like_items.get(k)) for k in _ordered(live, node["c"], list(like_items))]
+
+def materialize(state: Dict[str, Any], like: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Plain records of a state, in the order of `like` (the local records) where possible."""
+    like_by_key = {record_key(r): r for r in like or [] if isinstance(r, dict)}
+    live = [k for k, entry in state.items() if not _is_tombstone(entry["node"])]
+    created = {k: state[k]["c"] for k in live}
+    return [materialize_node(state[k]["node"], like_by_key.get(k)) for k in _ordered(live, created, list(like_by_key))]
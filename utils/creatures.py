@@ -0,0 +1,212 @@
+import re
+import threading
+from array import array
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+from constants import BESTIARY_FILE
+from utils.data_manager import load_static, load_record, get_version
+from utils.cr_table import CRTable, calculate_cr, get_creature_role, is_controller
+
+# --- CREATURE MODEL ---
+# Bestiary entries are plain dicts, so every consumer used to re-check types, apply
+# defaults, resolve the LUC/LCK alias and recompute CR and roles on each rerun.
+# load_creatures() turns them into Creature objects once per data version: slotted,
+# with SPECIAL as a fixed int array, facet tags as sorted tuples and the derived
+# values (CR in both AP modes, role, XP, parsed actions) computed up front. The
+# original read-only record stays available as `data` for the statblock renderer.
+# Only the creatures whose record changed are rebuilt: load_static re-reads just the
+# pack that was saved, so the others keep their record object and their model.
+# CR and role of the shared models come from one CRTable pass over the whole
+# bestiary (utils/cr_table.py); a standalone Creature rates itself.
+
+SPECIAL_KEYS = ("STR", "PER", "END", "CHA", "INT", "AGI", "LCK")
+
+class Action(NamedTuple):
+    """One parsed bestiary action, e.g. "4 AP Combat Shotgun. ... +12 to hit ..."."""
+    text: str
+    cost: int
+    name: str
+    hit_mod: Optional[int]
+    damage: Optional[str]
+    description: str
+    crit_threshold: int
+    crit_mod: Optional[str]
+
+def parse_action(action: Any) -> Action:
+    """Parses a bestiary action (string, or legacy {name, effect} dict) for Cost, Name,
+    Hit Mod, Damage, Description, Crit Threshold and Crit Mod."""
+    action_str = action if isinstance(action, str) else f"{action.get('name')}: {action.get('effect')}"
+    cost = 0
+    name = "Action"
+    hit_mod = None
+    damage = None
+    description = ""
+    crit_threshold = 20
+    crit_mod = None
+
+    # Extract AP Cost (e.g., "5 AP ...")
+    cost_match = re.match(r"^(\d+)\s*AP", action_str, re.IGNORECASE)
+    if cost_match:
+        cost = int(cost_match.group(1))
+        remaining = action_str[cost_match.end():].strip()
+    else:
+        remaining = action_str
+
+    # Extract Name (up to first period or colon)
+    name_match = re.match(r"^([^.:]+)(?:[.:]+)?\s*(.*)", remaining)
+    if name_match:
+        name = name_match.group(1).strip()
+        description = name_match.group(2).strip()
+    else:
+        name = remaining[:20] + "..."
+        description = remaining
+
+    # Extract Hit/Roll Modifier ("+X to hit" or "+X to roll")
+    hit_match = re.search(r"\+(\d+)\s*to\s*(?:hit|roll)", action_str, re.IGNORECASE)
+    if hit_match:
+        hit_mod = int(hit_match.group(1))
+
+    # Extract Damage ("Hit: ...")
+    dmg_match = re.search(r"Hit:\s*([^.]*)", action_str, re.IGNORECASE)
+    if dmg_match:
+        damage = dmg_match.group(1).strip()
+
+    # Extract Crit Info ("Crit chance Y/Modifier")
+    crit_match = re.search(r"Crit chance:?\s*(\d+)\s*/\s*([^.]+)", action_str, re.IGNORECASE)
+    if crit_match:
+        crit_threshold = int(crit_match.group(1))
+        crit_mod = crit_match.group(2).strip()
+
+    return Action(action_str, cost, name, hit_mod, damage, description, crit_threshold, crit_mod)
+
+def _number(value: Any, default: Union[int, float]) -> Union[int, float]:
+    """The value if it is a number (fractional levels such as 0.5 exist), else the default."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(value) if "." in str(value) else int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _tags(value: Any) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)):
+        return ()
+    return tuple(sorted({str(v) for v in value if v}))
+
+class Creature:
+    """Read-only model of one bestiary entry with its derived values precomputed."""
+
+    __slots__ = (
+        "key", "data", "name", "source", "type", "subtype", "size",
+        "level", "hp", "sp", "ac", "dt", "ap", "special",
+        "biomes", "sites", "factions",
+        "cr", "cr_ap", "role", "xp", "actions", "traits", "loot",
+        "rating_inputs", "controller",
+    )
+
+    def __init__(self, key: str, data: Dict[str, Any], rated: bool = True):
+        self.key = key
+        self.data = data
+        self.name = str(data.get("name") or key)
+        self.source = str(data.get("source") or "Unknown")
+        self.type = str(data.get("type") or "Unknown")
+        self.subtype = data.get("subtype") or None
+        self.size = data.get("size") or None
+
+        self.level = _number(data.get("level", 1), 1)
+        self.hp = _number(data.get("hp", 0), 0)
+        self.sp = _number(data.get("sp", 0), 0)
+        self.ac = _number(data.get("ac", 10), 10)
+        self.dt = _number(data.get("dt", 0), 0)
+        self.ap = _number(data.get("ap", 0), 0)
+        special = data.get("special")
+        if not isinstance(special, dict):
+            special = {}
+        self.special = array("h", (
+            int(_number(special.get(k, special.get("LUC", 5) if k == "LCK" else 5), 5)) for k in SPECIAL_KEYS
+        ))
+
+        self.biomes = _tags(data.get("biomes"))
+        self.sites = _tags(data.get("sites"))
+        self.factions = _tags(data.get("factions"))
+
+        actions = data.get("actions") if isinstance(data.get("actions"), list) else []
+        # What CRTable rates, kept with the model so unchanged records are not re-read
+        self.rating_inputs = (self.level, self.hp, self.sp, self.ac, self.dt, self.ap, sum(self.special))
+        self.controller = is_controller(actions)
+        if rated:
+            derived = {
+                "level": self.level, "hp": self.hp, "sp": self.sp, "ac": self.ac, "dt": self.dt,
+                "ap": self.ap, "special": dict(zip(SPECIAL_KEYS, self.special)), "actions": actions,
+            }
+            self.cr = calculate_cr(derived)
+            self.cr_ap = calculate_cr(derived, use_ap_multiplier=True)
+            self.role = get_creature_role(derived)
+        self.xp = self.level * 10
+        self.actions = tuple(parse_action(a) for a in actions if isinstance(a, (str, dict)))
+        traits = data.get("traits")
+        self.traits = tuple(str(t) for t in traits) if isinstance(traits, list) else ()
+        loot = data.get("loot")
+        self.loot = tuple(str(item) for item in loot) if isinstance(loot, list) else ()
+
+    def stat(self, key: str) -> int:
+        """One SPECIAL value ("LUC" is accepted for "LCK")."""
+        return self.special[SPECIAL_KEYS.index("LCK" if key == "LUC" else key)]
+
+    def cr_for(self, use_ap_multiplier: bool = False) -> int:
+        return self.cr_ap if use_ap_multiplier else self.cr
+
+    def __repr__(self) -> str:
+        return f"Creature({self.key!r}, level={self.level}, cr={self.cr})"
+
+# --- SHARED MODELS ---
+# {filepath: (version, load_static result, {key: Creature}, CRTable)}
+_MODELS: Dict[str, Tuple[int, Any, Dict[str, Creature], CRTable]] = {}
+_LOCK = threading.Lock()
+
+def _rate(models: Dict[str, Creature], table: CRTable) -> None:
+    for key, cr, cr_ap, role in zip(table.keys, *table.as_lists()):
+        model = models[key]
+        model.cr, model.cr_ap, model.role = cr, cr_ap, role
+
+def load_creatures(filepath: str = BESTIARY_FILE) -> Dict[str, Creature]:
+    """Every creature of the bestiary by key, shared and read-only like load_static."""
+    version = get_version(filepath)
+    entry = _MODELS.get(filepath)
+    if entry is not None and entry[0] == version:
+        return entry[2]
+
+    data = load_static(filepath)
+    with _LOCK:
+        entry = _MODELS.get(filepath)
+        if entry is not None and entry[1] is data:
+            models, table = entry[2], entry[3]
+        else:
+            previous = entry[2] if entry is not None else {}
+            models = {}
+            if isinstance(data, dict):
+                for key, record in data.items():
+                    if not isinstance(record, dict):
+                        continue
+                    old = previous.get(key)
+                    # Unchanged records are the very same frozen object
+                    models[key] = old if old is not None and old.data is record else Creature(key, record, rated=False)
+            # One vectorized rating pass per bestiary version
+            table = CRTable.from_creatures(models.values())
+            _rate(models, table)
+        _MODELS[filepath] = (version, data, models, table)
+    return models
+
+def get_creature(key: str, filepath: str = BESTIARY_FILE) -> Optional[Creature]:
+    """One creature, without loading the whole bestiary when it is not loaded yet."""
+    entry = _MODELS.get(filepath)
+    if entry is not None and entry[0] == get_version(filepath):
+        return entry[2].get(key)
+    record = load_record(filepath, key)
+    return Creature(key, record) if isinstance(record, dict) else None
+
+def get_cr_table(filepath: str = BESTIARY_FILE) -> CRTable:
+    """CR table of the current bestiary (see utils/cr_table.py)."""
+    load_creatures(filepath)
+    return _MODELS[filepath][3]
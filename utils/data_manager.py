@@ -1,20 +1,57 @@
 import streamlit as st
-import json
 import os
 import shutil
-import tempfile
-from typing import Any, Union, Dict, List
-from constants import BESTIARY_FILE, SAVED_FILE, CHARACTERS_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE
+import threading
+from typing import Any, Optional, Union, Dict, List, Tuple
+from constants import STORAGE_BACKEND, SAVE_DEBOUNCE_SECONDS
+from utils.storage import COLLECTIONS, get_store
+from utils.frozen import freeze
+from utils.cache_bus import CacheBus
+from utils import save_queue
+from utils.journal import get_journal, replay
+from utils import change_bus
+from utils import codec
+from utils import record_index
+from utils import packs
+
+def _uses_store(filepath: str) -> bool:
+    """True when the file is served by the SQLite record store instead of the JSON file."""
+    return STORAGE_BACKEND == "sqlite" and filepath in COLLECTIONS
+
+def _packed(filepath: str) -> bool:
+    """True when the file is assembled from content packs (utils/packs.py)."""
+    return not _uses_store(filepath) and packs.is_packed(filepath)
 
 # --- DATA MANAGEMENT ---
-@st.cache_data
-def load_data(filepath: str) -> Union[Dict, List]:
+def _read_file(filepath: str) -> Union[Dict, List]:
+    """Reads a data file from the active backend, without any caching."""
+    if _packed(filepath):
+        paths = packs.enabled_paths(filepath)
+        return packs.merge(filepath, [_read_file(path) for path in paths], paths)
+    data = _read_stored(filepath)
+    journal = get_journal(filepath)
+    if journal is not None:
+        # Patches appended since the last compaction
+        replay(data, journal.entries())
+    return data
+
+def _read_stored(filepath: str) -> Union[Dict, List]:
+    if _uses_store(filepath):
+        try:
+            data = get_store().load_collection(COLLECTIONS[filepath])
+        except Exception as e:
+            st.error(f"Error loading {filepath} from the database: {e}")
+            return {}
+        return data if data is not None else {}
+    pending = save_queue.pending_content(filepath)
+    if pending is not None:
+        # Saved but still waiting in the write queue
+        return codec.loads(pending)
     if not os.path.exists(filepath):
         return {}
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
+        return codec.load_file(filepath)
+    except codec.DecodeError:
         st.warning(f"⚠️ Data corruption detected in {filepath}. Resetting file and creating backup at {filepath}.bak")
         try:
             shutil.copy(filepath, f"{filepath}.bak")
@@ -25,74 +62,263 @@ def load_data(filepath: str) -> Union[Dict, List]:
         st.error(f"Error loading {filepath}: {e}")
         return {}
 
-def save_data(filepath: str, data: Any) -> None:
-    tmp_path = None
-    try:
-        # Serialize to string first to prevent file corruption on error
-        json_str = json.dumps(data, indent=2)
-        
-        # Write to a temporary file first to ensure atomicity
-        dir_name = os.path.dirname(filepath)
-        with tempfile.NamedTemporaryFile("w", delete=False, dir=dir_name, encoding="utf-8") as tmp_file:
-            tmp_file.write(json_str)
-            tmp_path = tmp_file.name
-            
-        # Atomic replace of the target file
-        os.replace(tmp_path, filepath)
-        
-        # Clear the cache so the next load gets the updated data
-        load_data.clear()
-    except TypeError as e:
-        st.error(f"Serialization Error (Data not saved): {e}")
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
-    except Exception as e:
-        st.error(f"Error saving to {filepath}: {e}")
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+# --- VERSIONED CACHE ---
+# Every data file carries a monotonically increasing version, bumped when it is saved.
+# Cache entries are keyed on (filepath, version), so a save only invalidates the file
+# it touched: logging an encounter no longer forces the bestiary to be re-parsed.
+_VERSIONS: Dict[str, int] = {}
+_STATS: Dict[str, Dict[str, int]] = {}
+_VERSION_LOCK = threading.Lock()
+
+def _stats(filepath: str) -> Dict[str, int]:
+    stats = _STATS.get(filepath)
+    if stats is None:
+        stats = _STATS.setdefault(filepath, {"reads": 0, "misses": 0, "invalidations": 0})
+    return stats
+
+def _count(filepath: str, field: str) -> None:
+    with _VERSION_LOCK:
+        _stats(filepath)[field] += 1
+
+def get_version(filepath: str) -> int:
+    """Current version of a data file (0 until it is first saved or invalidated)."""
+    return _VERSIONS.get(filepath, 0)
+
+def invalidate_cache(filepath: Optional[str] = None, broadcast: bool = True,
+                     keys: Optional[List[str]] = None) -> None:
+    """Bumps the version of one file (or of every cached file if no path is given).
 
-# --- CLOUD SYNC (Placeholder) ---
-def push_to_cloud():
+    Entries for older versions are never read again and age out of st.cache_data.
+    With `broadcast`, the other server processes are told to do the same. `keys`
+    names the records that changed (None: possibly all of them) for change_bus
+    subscribers such as the live character fragments.
     """
-    Reads local JSON files and uploads them to the cloud database.
+    with _VERSION_LOCK:
+        paths = [filepath] if filepath else list(_STATS)
+        parent = packs.parent_of(filepath)
+        if parent:
+            # A pack changed: the merged view of its data file is stale too
+            paths.append(parent)
+        for path in paths:
+            _VERSIONS[path] = _VERSIONS.get(path, 0) + 1
+            _stats(path)["invalidations"] += 1
+    for path in paths:
+        change_bus.publish(path, keys if filepath else None)
+    if broadcast:
+        _BUS.publish(filepath, keys)
+
+# Listens for saves made by other worker processes
+_BUS = CacheBus(on_invalidate=lambda path, keys: invalidate_cache(path, broadcast=False, keys=keys)).start()
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    """Per-file cache counters (version, reads, hits, misses, invalidations)."""
+    with _VERSION_LOCK:
+        rows = []
+        for path, stats in sorted(_STATS.items()):
+            hits = stats["reads"] - stats["misses"]
+            writes = save_queue.writer_stats(path)
+            rows.append({
+                "file": os.path.basename(path),
+                "version": _VERSIONS.get(path, 0),
+                "reads": stats["reads"],
+                "hits": hits,
+                "misses": stats["misses"],
+                "hit_rate": f"{hits / stats['reads']:.0%}" if stats["reads"] else "-",
+                "invalidations": stats["invalidations"],
+                "saves": writes["saves"],
+                "disk_writes": writes["writes"],
+            })
+    return rows
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_versioned(filepath: str, version: int) -> Union[Dict, List]:
+    # Only runs on a cache miss
+    _count(filepath, "misses")
+    return _read_file(filepath)
+
+def load_data(filepath: str) -> Union[Dict, List]:
+    """Returns a private, mutable copy of a data file (use for editing)."""
+    _count(filepath, "reads")
+    return _load_versioned(filepath, get_version(filepath))
+
+def load_fresh(filepath: str) -> Union[Dict, List]:
+    """Reads the current contents straight from the backend, bypassing every cache."""
+    return _read_file(filepath)
+
+# --- SHARED READ-ONLY CACHE ---
+# One frozen copy per file for the whole process, shared by every session and rerun.
+# Read-only consumers (scanner, bestiary, statblocks, lookups) use this instead of
+# load_data, which pickles and deep-copies the data into every caller.
+_SHARED: Dict[str, Tuple[int, Any]] = {}
+_SHARED_LOCK = threading.RLock()
+
+def load_static(filepath: str) -> Union[Dict, List]:
+    """Returns the shared, read-only view of a data file without copying it.
+
+    The result must not be modified; use copy.deepcopy() or utils.frozen.thaw()
+    to get an editable copy.
     """
-    try:
-        # 1. Load local data
-        characters = load_data(CHARACTERS_FILE)
-        bestiary = load_data(BESTIARY_FILE)
-        items = load_data(ITEM_FILE)
-        # ... load other files as needed
-
-        # 2. Connect to Database (e.g., Firestore)
-        # db = firestore.Client.from_service_account_info(st.secrets["gcp_service_account"])
-
-        # 3. Upload Data
-        # db.collection("app_data").document("characters").set({"data": characters})
-        # db.collection("app_data").document("bestiary").set({"data": bestiary})
-        
-        st.toast("☁️ Data pushed to cloud successfully! (Simulated)", icon="✅")
-        return True
-    except Exception as e:
-        st.error(f"Cloud Push Failed: {e}")
-        return False
+    _count(filepath, "reads")
+    version = get_version(filepath)
+    entry = _SHARED.get(filepath)
+    if entry is None or entry[0] != version:
+        with _SHARED_LOCK:
+            entry = _SHARED.get(filepath)
+            if entry is None or entry[0] != version:
+                _count(filepath, "misses")
+                if _packed(filepath):
+                    # Built from the shared view of each pack: toggling or editing one
+                    # pack only re-reads that pack
+                    paths = packs.enabled_paths(filepath)
+                    data = packs.merge(filepath, [load_static(path) for path in paths], paths)
+                else:
+                    data = _read_file(filepath)
+                entry = (version, freeze(data))
+                _SHARED[filepath] = entry
+    return entry[1]
+
+# --- SINGLE RECORDS ---
+def _find_record(data: Any, key: str) -> Optional[Any]:
+    if isinstance(data, dict):
+        return data.get(key)
+    if isinstance(data, list):
+        return next((r for r in data if isinstance(r, dict) and r.get("id") == key), None)
+    return None
 
-def pull_from_cloud():
+def load_record(filepath: str, key: str) -> Optional[Any]:
+    """Returns one read-only record (dict files by key, list files by `id`), or None.
+
+    Same data as load_static(filepath), but when the file is not loaded yet only the
+    requested record is read: through the offset index (utils/record_index.py) for
+    the JSON files, or a single row for the SQLite backend.
     """
-    Downloads data from the cloud database and overwrites local JSON files.
+    entry = _SHARED.get(filepath)
+    if entry is not None and entry[0] == get_version(filepath):
+        return _find_record(entry[1], key)
+
+    if _packed(filepath):
+        paths = packs.enabled_paths(filepath)
+        # Same precedence as packs.merge: later packs win for dicts, lists keep the first match
+        for path in (reversed(paths) if isinstance(packs.empty(filepath), dict) else paths):
+            record = load_record(path, key)
+            if record is not None:
+                return record
+        return None
+
+    if _uses_store(filepath):
+        try:
+            record = get_store().get(COLLECTIONS[filepath], key)
+        except Exception:
+            record = None
+        if record is not None:
+            return freeze(record)
+    elif record_index.covers(filepath) and save_queue.pending_content(filepath) is None and get_journal(filepath) is None:
+        answered, record = record_index.read_record(filepath, key)
+        if answered:
+            return freeze(record) if record is not None else None
+
+    return _find_record(load_static(filepath), key)
+
+def save_data(filepath: str, data: Any, changed_keys: Optional[List[str]] = None) -> bool:
+    """Writes a data file and invalidates its cache entry. Returns True on success.
+
+    Callers that know which records they changed pass their keys in `changed_keys`.
     """
+    if _packed(filepath):
+        return _save_packs(filepath, data, changed_keys)
+
+    if _uses_store(filepath):
+        # Only the records that actually changed are written: the named ones when the
+        # caller knows them, else whatever differs from the stored rows
+        try:
+            if changed_keys is None:
+                get_store().save_collection(COLLECTIONS[filepath], data)
+            else:
+                get_store().save_records(COLLECTIONS[filepath], data, changed_keys)
+            invalidate_cache(filepath, keys=changed_keys)
+            return True
+        except TypeError as e:
+            st.error(f"Serialization Error (Data not saved): {e}")
+        except Exception as e:
+            st.error(f"Error saving to {filepath}: {e}")
+        return False
+
     try:
-        # 1. Connect to Database
-        # db = firestore.Client.from_service_account_info(st.secrets["gcp_service_account"])
-
-        # 2. Fetch Data
-        # char_ref = db.collection("app_data").document("characters").get()
-        # if char_ref.exists:
-        #     save_data(CHARACTERS_FILE, char_ref.to_dict().get("data", []))
-        
-        # ... save other files
-        
-        st.toast("☁️ Data pulled from cloud! Reloading...", icon="✅")
+        # Serialize to string first to prevent file corruption on error
+        json_str = codec.dumps(data, indent=True)
+    except TypeError as e:
+        st.error(f"Serialization Error (Data not saved): {e}")
+        return False
+
+    if SAVE_DEBOUNCE_SECONDS <= 0:
+        try:
+            save_queue.write_atomic(filepath, json_str)
+        except Exception as e:
+            st.error(f"Error saving to {filepath}: {e}")
+            return False
+        invalidate_cache(filepath, keys=changed_keys)
         return True
-    except Exception as e:
-        st.error(f"Cloud Pull Failed: {e}")
+
+    # Queued: the writer thread coalesces bursts into one atomic write and tells the
+    # other processes once the file is on disk. Local readers see it immediately.
+    writer = save_queue.get_writer(filepath, on_written=_BUS.publish)
+    if writer.error is not None:
+        st.error(f"Error saving to {filepath}: {writer.error} (retrying in the background)")
+        writer.error = None
+    writer.submit(json_str, changed_keys)
+    invalidate_cache(filepath, broadcast=False, keys=changed_keys)
+    return True
+
+def _save_packs(filepath: str, data: Any, changed_keys: Optional[List[str]] = None) -> bool:
+    """Splits `data` into its packs and rewrites only the packs that changed."""
+    try:
+        parts = packs.split(filepath, data)
+    except TypeError as e:
+        st.error(f"Serialization Error (Data not saved): {e}")
         return False
+
+    enabled = {p["id"] for p in packs.list_packs(filepath) if p["enabled"]}
+    ok = True
+    in_order = set()  # packs whose content is exactly their slice of `data`
+    for pack_id in sorted(enabled | set(parts)):
+        path = packs.pack_path(filepath, pack_id)
+        content = parts.get(pack_id, packs.empty(filepath))
+        exists = os.path.exists(path)
+        if pack_id not in enabled and exists:
+            # The editor never saw this switched-off pack: add to it instead of replacing it
+            content = packs.merge(filepath, [load_fresh(path), content])
+        else:
+            in_order.add(pack_id)
+        current = load_static(path) if exists else None
+        # For dicts the key order counts too: it is the record order the editor shows
+        if exists and current == content and (not isinstance(content, dict) or list(current) == list(content)):
+            continue
+        if not save_data(path, content, changed_keys):
+            ok = False
+            continue
+        if not exists:
+            # list_packs only finds a new pack once its file is on disk
+            flush_saves(path)
+            invalidate_cache(path, broadcast=False)
+        packs.bump_version(filepath, pack_id, content)
+    # Keeps the editor's record order, even when no pack content changed
+    order = packs.positions(filepath, data)
+    if packs.set_positions(filepath, {pid: order.get(pid, []) for pid in in_order}):
+        invalidate_cache(filepath)
+    return ok
+
+def physical_files(filepath: str) -> List[str]:
+    """The files a data file is stored in on disk: all of its packs, or the file itself."""
+    return packs.all_paths(filepath) if _packed(filepath) else [filepath]
+
+def set_pack_enabled(filepath: str, pack_id: str, enabled: bool) -> None:
+    """Switches a content pack on or off for every session and server process."""
+    packs.set_enabled(filepath, pack_id, enabled)
+    invalidate_cache(filepath)
+
+def flush_saves(filepath: Optional[str] = None) -> None:
+    """Blocks until queued saves (of one file, or all) are on disk."""
+    if filepath:
+        save_queue.flush(filepath)
+    else:
+        save_queue.flush_all()
@@ -1,7 +1,7 @@
 import random
 import re
 
-def roll_dice(dice_str: str) -> int:
+def roll_dice(dice_str: str, rng=random) -> int:
     # Converts a dice notation string (e.g., "2d6+3", "1d10", "5") into a random integer result.
     dice_str = str(dice_str).lower().strip()
 
@@ -16,7 +16,7 @@ def roll_dice(dice_str: str) -> int:
         die_faces = int(match.group(2))
         
         # Roll the dice
-        total = sum(random.randint(1, die_faces) for _ in range(num_dice))
+        total = sum(rng.randint(1, die_faces) for _ in range(num_dice))
         
         # Add or subtract modifier if it exists
         if match.group(3) and match.group(4):
@@ -32,7 +32,7 @@ def roll_dice(dice_str: str) -> int:
     # Fallback for unrecognized format
     return 1
 
-def parse_and_roll_loot(loot_str: str) -> tuple[str, int, str, int, str]:
+def parse_and_roll_loot(loot_str: str, rng=random) -> tuple[str, int, str, int, str]:
     """Parses a loot string into name, qty, qty_str, decay_val, decay_str."""
     qty_str = "1"
     name = loot_str.strip()
@@ -43,7 +43,7 @@ def parse_and_roll_loot(loot_str: str) -> tuple[str, int, str, int, str]:
         qty_str = match_qty.group(1)
         name = match_qty.group(2).strip()
     
-    qty = roll_dice(qty_str)
+    qty = roll_dice(qty_str, rng)
     
     # 2. Parse Decay suffix "(... levels of decay)"
     decay_val = 0
@@ -51,7 +51,47 @@ def parse_and_roll_loot(loot_str: str) -> tuple[str, int, str, int, str]:
     match_decay = re.search(r"\(([\dd+\-\s]+)\s+levels? of decay\)", name, re.IGNORECASE)
     if match_decay:
         decay_str = match_decay.group(1).strip()
-        decay_val = roll_dice(decay_str)
+        decay_val = roll_dice(decay_str, rng)
         name = name.replace(match_decay.group(0), "").strip()
         
-    return name, qty, qty_str, decay_val, decay_str
\ No newline at end of file
+    return name, qty, qty_str, decay_val, decay_str
+
+def roll_encounter_loot(encounter: list, loot_of, rng=random) -> dict:
+    """Rolls the loot of every creature in an encounter ([{"name", "count"}]) into a log summary.
+
+    `loot_of(name)` returns the creature's loot strings.
+    """
+    temp_loot = {}
+    for entry in encounter:
+        # Roll for each individual creature to ensure variance
+        for _ in range(entry["count"]):
+            for item_str in loot_of(entry["name"]):
+                item_name, item_qty, qty_str, decay_val, decay_str = parse_and_roll_loot(item_str, rng)
+
+                if decay_str:
+                    # Decay Item: Keep distinct based on rolled decay value
+                    # Format: Name (Decay: X) [Original Strings]
+                    key = f"{item_name} (Decay: {decay_val})"
+                    extras = []
+                    if qty_str and qty_str != "1": extras.append(qty_str)
+                    extras.append(f"{decay_str} levels of decay")
+                    key += f" [{', '.join(extras)}]"
+
+                    if key not in temp_loot: temp_loot[key] = {'qty': 0, 'dice': set(), 'is_decay': True}
+                    temp_loot[key]['qty'] += item_qty
+                else:
+                    # Condense non-decay items
+                    key = item_name
+                    if key not in temp_loot: temp_loot[key] = {'qty': 0, 'dice': set(), 'is_decay': False}
+                    temp_loot[key]['qty'] += item_qty
+                    if qty_str: temp_loot[key]['dice'].add(qty_str)
+
+    loot_summary = {}
+    for key, data in temp_loot.items():
+        if data['is_decay']:
+            loot_summary[key] = data['qty']
+        else:
+            dice_strs = sorted(list(data['dice']))
+            dice_suffix = f" [{', '.join(dice_strs)}]" if dice_strs else ""
+            loot_summary[f"{key}{dice_suffix}"] = data['qty']
+    return loot_summary
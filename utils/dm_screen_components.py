@@ -1,14 +1,19 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import random
 import copy
 import uuid
 import re
 import urllib.parse
 from utils.dice import roll_dice, parse_and_roll_loot
-from utils.data_manager import load_data, save_data
+from utils.rng import session_rng
+from utils.data_manager import load_data, load_static
+from utils.creatures import load_creatures, get_creature
+from utils.search import search_creatures
+from utils.item_catalog import get_catalog, clean_name, stem
+from utils.random_tables import TABLE_FILES, get_tables
+from utils.character_store import update_character, patch_character
 from utils.character_logic import calculate_stats
-from utils.character_components import convert_nested_to_flat
+from utils.character_components import convert_nested_to_flat, get_live_character
 from constants import BESTIARY_FILE, SAVED_FILE, CHARACTERS_FILE, ITEM_FILE
 
 def _render_panel_settings(key_prefix, grid_context):
@@ -46,12 +51,40 @@ def render_dice_roller(key_prefix, grid_context=None):
     c1, c2 = st.columns([3, 1])
     formula = c1.text_input("Formula", value="1d20", key=f"{key_prefix}_formula", label_visibility="collapsed")
     if c2.button("Roll", key=f"{key_prefix}_roll"):
-        result = roll_dice(formula)
+        result = roll_dice(formula, session_rng(st.session_state).stream("dice"))
         st.session_state[f"{key_prefix}_result"] = f"Result: {result}"
     
     if f"{key_prefix}_result" in st.session_state:
         st.info(st.session_state[f"{key_prefix}_result"])
 
+def render_random_tables(key_prefix, grid_context=None):
+    c_title, c_conf = st.columns([5, 1], vertical_alignment="center")
+    c_title.markdown("##### 📜 Random Tables")
+    with c_conf:
+        _render_panel_settings(key_prefix, grid_context)
+
+    c1, c2 = st.columns(2)
+    source = c1.selectbox("Source", list(TABLE_FILES), key=f"{key_prefix}_tbl_source", label_visibility="collapsed")
+    tables = get_tables(TABLE_FILES[source])
+    if not tables.names():
+        st.caption("No tables found.")
+        return
+    table = c2.selectbox("Table", tables.names(), key=f"{key_prefix}_tbl_name", label_visibility="collapsed")
+
+    c3, c4 = st.columns([1, 2])
+    rolls = c3.number_input("Rolls", min_value=1, max_value=20, value=1, key=f"{key_prefix}_tbl_rolls", label_visibility="collapsed")
+    if c4.button("Roll", key=f"{key_prefix}_tbl_roll", use_container_width=True):
+        st.session_state[f"{key_prefix}_tbl_result"] = tables.roll(table, int(rolls), session_rng(st.session_state).stream("table"))
+
+    result = st.session_state.get(f"{key_prefix}_tbl_result")
+    if result is not None:
+        if not result:
+            st.caption("Nothing rolled.")
+        for row in result:
+            st.markdown(f"**{row['count']}x** {row['name']} · Cost {row['cost']}")
+    for error in tables.errors:
+        st.caption(f"⚠️ {error}")
+
 def render_scratchpad(key_prefix, grid_context=None):
     c_title, c_conf = st.columns([5, 1], vertical_alignment="center")
     c_title.markdown("##### 📝 Notes")
@@ -80,51 +113,6 @@ def render_quick_ref(key_prefix, grid_context=None):
         st.caption("**3/4 Cover**: +5 AC/Dex Saves.")
         st.caption("**Total Cover**: Can't be targeted directly.")
 
-def _parse_action_string(action_str):
-    """Parses a bestiary action string for Cost, Name, Hit Mod, Damage, Description, Crit Threshold, and Crit Mod."""
-    cost = 0
-    name = "Action"
-    hit_mod = None
-    damage = None
-    description = ""
-    crit_threshold = 20
-    crit_mod = None
-    
-    # Extract AP Cost (e.g., "5 AP ...")
-    cost_match = re.match(r"^(\d+)\s*AP", action_str, re.IGNORECASE)
-    if cost_match:
-        cost = int(cost_match.group(1))
-        remaining = action_str[cost_match.end():].strip()
-    else:
-        remaining = action_str
-        
-    # Extract Name (up to first period or colon)
-    name_match = re.match(r"^([^.:]+)(?:[.:]+)?\s*(.*)", remaining)
-    if name_match:
-        name = name_match.group(1).strip()
-        description = name_match.group(2).strip()
-    else:
-        name = remaining[:20] + "..."
-        description = remaining
-        
-    # Extract Hit/Roll Modifier ("+X to hit" or "+X to roll")
-    hit_match = re.search(r"\+(\d+)\s*to\s*(?:hit|roll)", action_str, re.IGNORECASE)
-    if hit_match:
-        hit_mod = int(hit_match.group(1))
-        
-    # Extract Damage ("Hit: ...")
-    dmg_match = re.search(r"Hit:\s*([^.]*)", action_str, re.IGNORECASE)
-    if dmg_match:
-        damage = dmg_match.group(1).strip()
-        
-    # Extract Crit Info ("Crit chance Y/Modifier")
-    crit_match = re.search(r"Crit chance:?\s*(\d+)\s*/\s*([^.]+)", action_str, re.IGNORECASE)
-    if crit_match:
-        crit_threshold = int(crit_match.group(1))
-        crit_mod = crit_match.group(2).strip()
-        
-    return cost, name, hit_mod, damage, description, crit_threshold, crit_mod
-
 def inject_dm_scripts():
     """Injects necessary JS for the DM screen. Should be called once outside fragments."""
     components.html("""
@@ -169,35 +157,41 @@ def _apply_combat_change(entry, action_type, amount):
     # Sync to file if player and values changed
     if entry.get("is_player") and (entry.get('hp') != old_hp or entry.get('sp') != old_sp):
         try:
-            all_chars = load_data(CHARACTERS_FILE)
             c_name = entry.get("source_name", entry.get("name"))
-            for c in all_chars:
-                if c.get("name") == c_name:
-                    c["hp_current"] = entry['hp']
-                    c["stamina_current"] = entry['sp']
-                    save_data(CHARACTERS_FILE, all_chars)
-                    break
+            # Appended to the characters journal (O(1)), not a rewrite of the whole file
+            patch_character({"hp_current": entry['hp'], "stamina_current": entry['sp']}, name=c_name)
         except Exception:
             pass
 
 def reroll_sequence_callback(entry, data_key, widget_key):
-    roll = random.randint(1, 20)
+    roll = session_rng(st.session_state).stream("initiative").randint(1, 20)
     mod = entry.get('seq_mod', 0)
     entry['seq_roll'] = roll
     entry['seq'] = roll + mod
     st.session_state[widget_key] = entry['seq']
     st.session_state[data_key].sort(key=lambda x: x['seq'], reverse=True)
 
+def _live_player(entry):
+    """Character record behind a player combatant, with stats applied.
+
+    Re-read and recalculated only when change_bus reports a change to that character,
+    so idle ticks of the HP/SP/DT fragments cost a version comparison.
+    """
+    c_name = entry.get("source_name", entry.get("name"))
+    found, _ = get_live_character(f"dm_live_player_{c_name}", name=c_name)
+    applied = st.session_state.setdefault("dm_live_player_stats", {})
+    if found is not None and applied.get(c_name) is not found:
+        calculate_stats(found)
+        applied[c_name] = found
+    return found
+
 @st.fragment(run_every=3)
 def render_hp_bar(entry):
     # Sync if player
     if entry.get("is_player"):
         try:
-            chars = load_data(CHARACTERS_FILE)
-            c_name = entry.get("source_name", entry.get("name"))
-            found = next((c for c in chars if c.get("name") == c_name), None)
+            found = _live_player(entry)
             if found:
-                calculate_stats(found)
                 entry["hp"] = found.get("hp_current", entry["hp"])
                 entry["max_hp"] = found.get("hp_max", entry["max_hp"])
         except Exception:
@@ -218,11 +212,8 @@ def render_sp_bar(entry):
     # Sync if player
     if entry.get("is_player"):
         try:
-            chars = load_data(CHARACTERS_FILE)
-            c_name = entry.get("source_name", entry.get("name"))
-            found = next((c for c in chars if c.get("name") == c_name), None)
+            found = _live_player(entry)
             if found:
-                calculate_stats(found)
                 entry["sp"] = found.get("stamina_current", entry["sp"])
                 entry["max_sp"] = found.get("stamina_max", entry["max_sp"])
         except Exception:
@@ -244,11 +235,8 @@ def render_player_dt(entry):
     dt_value = entry.get('dt', 0)
     if entry.get("is_player"):
         try:
-            chars = load_data(CHARACTERS_FILE)
-            c_name = entry.get("source_name", entry.get("name"))
-            found = next((c for c in chars if c.get("name") == c_name), None)
+            found = _live_player(entry)
             if found:
-                calculate_stats(found)
                 new_dt = found.get("dt", 0)
                 entry["dt"] = new_dt
                 dt_value = new_dt
@@ -259,27 +247,17 @@ def render_player_dt(entry):
 def give_item_to_player(player_name, item_data):
     """Safely adds an item to a player character's inventory."""
     try:
-        all_chars = load_data(CHARACTERS_FILE)
-        target_idx = -1
-        for i, c in enumerate(all_chars):
-            if c.get("name") == player_name:
-                target_idx = i
-                break
-                
-        if target_idx != -1:
-            char = all_chars[target_idx]
+        # Ensure ID
+        if "id" not in item_data: item_data["id"] = str(uuid.uuid4())
+
+        def add_item(char):
             if "inventory" not in char: char["inventory"] = []
-            
-            # Ensure ID
-            if "id" not in item_data: item_data["id"] = str(uuid.uuid4())
-            
             char["inventory"].append(item_data)
-            all_chars[target_idx] = char
-            save_data(CHARACTERS_FILE, all_chars)
-            return True
+
+        # Appended to the latest stored revision, so a player's concurrent edits survive
+        return update_character(add_item, name=player_name) is not None
     except Exception:
         return False
-    return False
 
 def render_combatant_row(entry, is_active, data_key, key_prefix):
     """Renders a single combatant row."""
@@ -354,14 +332,13 @@ def render_combatant_row(entry, is_active, data_key, key_prefix):
                 is_looted = entry['id'] in st.session_state[looted_key]
                 
                 if st.button("🎁", key=f"btn_loot_{entry['id']}", disabled=is_looted, help="Add loot to pool"):
-                    bestiary = load_data(BESTIARY_FILE)
                     source_name = entry.get("source_name", entry["name"])
-                    b_entry = bestiary.get(source_name)
+                    creature = get_creature(source_name)
                     new_loot = []
-                    if b_entry:
-                        loot_table = b_entry.get("loot", [])
-                        for loot_str in loot_table:
-                            name, qty, _, decay_val, _ = parse_and_roll_loot(loot_str)
+                    if creature:
+                        loot_rng = session_rng(st.session_state).stream("loot")
+                        for loot_str in creature.loot:
+                            name, qty, _, decay_val, _ = parse_and_roll_loot(loot_str, loot_rng)
                             new_loot.append({"name": name, "qty": qty, "decay": decay_val})
                     
                     if pool_key not in st.session_state: st.session_state[pool_key] = []
@@ -510,8 +487,9 @@ def render_combat_sequence_tracker(key_prefix, grid_context=None):
             st.markdown("**Manage Combat**")
             
             if st.button("🔄 Reroll All", key=f"{key_prefix}_reroll_all", use_container_width=True):
+                initiative = session_rng(st.session_state).stream("initiative")
                 for c in st.session_state[data_key]:
-                    roll = random.randint(1, 20)
+                    roll = initiative.randint(1, 20)
                     mod = c.get('seq_mod', 0)
                     c['seq_roll'] = roll
                     c['seq'] = roll + mod
@@ -552,29 +530,24 @@ def render_combat_sequence_tracker(key_prefix, grid_context=None):
                 if st.button("Import Threats", key=f"{key_prefix}_import"):
                     encounter = options[selected_key]
                     threats = encounter.get("threats", {})
-                    bestiary = load_data(BESTIARY_FILE)
-                    if not isinstance(bestiary, dict): bestiary = {}
+                    bestiary = load_creatures(BESTIARY_FILE)
                     
                     for name, count in threats.items():
                         # Get stats for initiative bonus
-                        b_stats = bestiary.get(name, {})
+                        creature = bestiary.get(name)
                         
                         # Calculate Combat Sequence: PER - 5
-                        # Or use pre-calculated if available, but bestiary usually has raw stats
-                        special = b_stats.get("special", {})
-                        if isinstance(special, dict):
-                            per = special.get("PER", 5)
-                        else:
-                            per = 5
+                        per = creature.stat("PER") if creature else 5
                         
                         base_seq = per - 5
-                        hp = b_stats.get("hp", 10)
-                        sp = b_stats.get("sp", 10)
-                        dt = b_stats.get("dt", 0)
+                        hp = creature.data.get("hp", 10) if creature else 10
+                        sp = creature.data.get("sp", 10) if creature else 10
+                        dt = creature.dt if creature else 0
                         
+                        initiative = session_rng(st.session_state).stream("initiative")
                         for i in range(count):
                             # Roll Sequence: d20 + Base Seq
-                            roll = random.randint(1, 20)
+                            roll = initiative.randint(1, 20)
                             seq_val = roll + base_seq
                             display_name = f"{name} {i+1}" if count > 1 else name
                             st.session_state[data_key].append({
@@ -608,6 +581,7 @@ def render_combat_sequence_tracker(key_prefix, grid_context=None):
                 if st.button("Add Party", key=f"{key_prefix}_add_party"):
                     existing_players = {c["name"] for c in st.session_state[data_key] if c.get("is_player")}
                     added_any = False
+                    initiative = session_rng(st.session_state).stream("initiative")
                     
                     for char_name in selected_chars:
                         if char_name in existing_players:
@@ -621,7 +595,7 @@ def render_combat_sequence_tracker(key_prefix, grid_context=None):
                                 per = char_data.get("stats", {}).get("PER", 5)
                                 base_seq = per - 5
                             
-                            roll = random.randint(1, 20)
+                            roll = initiative.randint(1, 20)
                             seq_val = roll + base_seq
                             hp = char_data.get("hp_current", 10)
                             max_hp = char_data.get("hp_max", 10)
@@ -795,18 +769,23 @@ def render_monster_lookup(key_prefix, grid_context=None):
     with c_conf:
         _render_panel_settings(key_prefix, grid_context)
 
-    bestiary = load_data(BESTIARY_FILE)
+    bestiary = load_creatures(BESTIARY_FILE)
     if not bestiary:
         st.error("No Data")
         return
         
-    names = sorted(list(bestiary.keys()))
+    query = st.text_input("Search", key=f"{key_prefix}_search", placeholder="Search (typos are fine)...", label_visibility="collapsed")
+    names = search_creatures(query) if query else sorted(bestiary.keys())
+    if not names:
+        st.caption("No creatures match your search.")
+        return
     selection = st.selectbox("Creature", names, key=f"{key_prefix}_sel", label_visibility="collapsed")
     
     if selection:
-        data = bestiary[selection]
+        creature = bestiary[selection]
+        data = creature.data
         with st.expander("Stats"):
-            st.markdown(f"**HP**: {data.get('hp')} | **AC**: {data.get('ac')}")
+            st.markdown(f"**HP**: {data.get('hp')} | **AC**: {data.get('ac')} | **CR**: {creature.cr} ({creature.role})")
             st.markdown(f"**Speed**: {data.get('speed', '30 ft.')}")
             st.caption(data.get('description', ''))
 
@@ -816,6 +795,13 @@ def _render_loot_list(loot_list, players, key_prefix, suffix, pool_key):
         st.caption("No loot generated.")
         return
 
+    # Resolved once per render instead of scanning the item database on every click
+    db_items, missing = get_catalog(ITEM_FILE).resolve(item["name"] for item in loot_list)
+    # Caps are currency, not a database item
+    missing = [name for name in missing if stem(clean_name(name)) != "cap"]
+    if missing:
+        st.caption(f"⚠️ Not in the item database: {', '.join(missing)}")
+
     for i, item in enumerate(loot_list):
         c1, c2, c3 = st.columns([2.5, 1.5, 1], vertical_alignment="center")
         
@@ -827,19 +813,8 @@ def _render_loot_list(loot_list, players, key_prefix, suffix, pool_key):
             # Try to find in DB for weight/desc/type
             new_item = {}
             try:
-                db = load_data(ITEM_FILE)
-                # Simple name match (strip decay info for lookup)
-                clean_name = item['name'].split(' (Decay')[0].strip()
-                # Improved Search
-                # 1. Exact Match
-                db_item = next((x for x in db if x.get("name") == clean_name), None)
-                # 2. Case Insensitive
-                if not db_item:
-                    db_item = next((x for x in db if x.get("name", "").lower() == clean_name.lower()), None)
-                # 3. Plural/Singular check (simple 's' removal)
-                if not db_item and clean_name.lower().endswith('s'):
-                    single_name = clean_name[:-1]
-                    db_item = next((x for x in db if x.get("name", "").lower() == single_name.lower()), None)
+                # Exact, case-insensitive, decay-stripped or singular/plural name match
+                db_item = db_items.get(item["name"])
                 
                 if db_item:
                     # Use the robust converter from character components
@@ -922,16 +897,17 @@ def render_loot_generator(key_prefix, grid_context=None):
     with tab_rand:
         level = st.number_input("Level / CR", min_value=1, value=1, key=f"{key_prefix}_loot_lvl")
         if st.button("Generate Random Loot", key=f"{key_prefix}_gen_rand", use_container_width=True):
-            caps = roll_dice(f"{level}d20")
+            loot_rng = session_rng(st.session_state).stream("loot")
+            caps = roll_dice(f"{level}d20", loot_rng)
             loot = [{"name": "Cap", "qty": caps}]
             
             # Add random items from DB
             try:
-                db_items = load_data(ITEM_FILE)
+                db_items = load_static(ITEM_FILE)
                 if db_items:
-                    num_items = random.randint(1, 3)
+                    num_items = loot_rng.randint(1, 3)
                     for _ in range(num_items):
-                        item = random.choice(db_items)
+                        item = loot_rng.choice(db_items)
                         loot.append({"name": item.get("name", "Unknown"), "qty": 1, "decay": 0})
             except Exception:
                 pass
@@ -1032,15 +1008,14 @@ def render_loot_generator(key_prefix, grid_context=None):
                 dead_monsters = [c for c in combat_data if c.get("hp", 0) <= 0 and not c.get("is_player", False) and c["id"] not in st.session_state[looted_key]]
                 
                 new_loot = []
-                bestiary = load_data(BESTIARY_FILE)
+                loot_rng = session_rng(st.session_state).stream("loot")
                 
                 for m in dead_monsters:
                     source_name = m.get("source_name", m["name"])
-                    b_entry = bestiary.get(source_name)
-                    if b_entry:
-                        loot_table = b_entry.get("loot", [])
-                        for loot_str in loot_table:
-                            name, qty, _, decay_val, _ = parse_and_roll_loot(loot_str)
+                    creature = get_creature(source_name)
+                    if creature:
+                        for loot_str in creature.loot:
+                            name, qty, _, decay_val, _ = parse_and_roll_loot(loot_str, loot_rng)
                             new_loot.append({"name": name, "qty": qty, "decay": decay_val})
                     
                     # Mark as looted
@@ -1130,12 +1105,12 @@ def render_active_turn_manager(key_prefix, grid_context=None):
     else:
         # Load from Bestiary
         try:
-            bestiary = load_data(BESTIARY_FILE)
-            b_data = bestiary.get(current_combatant.get("source_name", current_combatant["name"]))
-            if b_data:
-                stats["ap"] = b_data.get("ap", 10)
-                actions = b_data.get("actions", [])
-                traits = b_data.get("traits", [])
+            creature = get_creature(current_combatant.get("source_name", current_combatant["name"]))
+            if creature:
+                stats["ap"] = creature.data.get("ap", 10)
+                # Parsed once when the bestiary is loaded
+                actions = creature.actions
+                traits = creature.traits
         except:
             pass
 
@@ -1180,9 +1155,7 @@ def render_active_turn_manager(key_prefix, grid_context=None):
             st.caption("No actions available.")
         else:
             for i, act in enumerate(actions):
-                # Handle both string and dict actions (legacy support)
-                act_str = act if isinstance(act, str) else f"{act.get('name')}: {act.get('effect')}"
-                cost, name, hit_mod, damage, description, crit_threshold, crit_mod = _parse_action_string(act_str)
+                act_str, cost, name, hit_mod, damage, description, crit_threshold, crit_mod = act
                 
                 c_info, c_btn = st.columns([3, 1], vertical_alignment="center")
                 with c_info:
@@ -1201,7 +1174,7 @@ def render_active_turn_manager(key_prefix, grid_context=None):
                         
                         # If it's an attack, roll it
                         if hit_mod is not None:
-                            d20 = random.randint(1, 20)
+                            d20 = session_rng(st.session_state).stream("attack").randint(1, 20)
                             total = d20 + hit_mod
                             
                             crit_msg = ""
@@ -1240,6 +1213,7 @@ PANEL_REGISTRY = {
     "Empty": None,
     "Dice Roller": render_dice_roller,
     "Scratchpad": render_scratchpad,
+    "Random Tables": render_random_tables,
     "Quick Ref": render_quick_ref,
     "Combat Sequence": render_combat_sequence_tracker,
     "Active Turn": render_active_turn_manager,
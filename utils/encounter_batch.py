@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from constants import SAVED_FILE
+from utils.data_manager import load_data, save_data
+from utils.dice import roll_encounter_loot
+from utils.encounter_generator import DIFFICULTY_MULTIPLIERS, Candidate, EncounterGenerator
+from utils.encounter_solver import SolverCandidate, solve_budget
+from utils.rng import Stream, derive_seed
+
+# --- BATCH ENCOUNTER GENERATION ---
+# Pre-rolls encounters for campaign prep: one job per biome x site x difficulty, with
+# the budget set from the party CR. Each job is the Scanner's "Generate from Budget"
+# on the creatures found in that biome and site (random or exact fill), with its
+# loot rolled as when logging. Jobs fan out over a process pool in chunks. Each job's
+# seed is derived from the batch seed and the job (utils/rng.py), and its encounter
+# and loot come from that seed's "encounter" and "loot" streams, as for logs from the
+# Scanner. A batch is then the same whatever the worker count or completion order,
+# and its logs replay like any other. Finished encounters stream back and are
+# appended to the encounter log every BATCH_FLUSH entries.
+
+BATCH_FLUSH = 25         # log entries per write
+BUDGET_VARIATION = 0.10  # same ±10% as the Scanner
+OVERFLOW = 0.15
+CHUNKS_PER_WORKER = 8    # smaller chunks stream sooner, larger ones cost less to dispatch
+MAX_WORKERS = 64         # most worker processes Batch Prep offers
+
+class BatchSettings(NamedTuple):
+    weight_bias: bool = True
+    group_multiplier: bool = True
+    role_synergy_tax: bool = False
+    budget_variation: bool = True
+    exact_fill: bool = False
+
+class BatchJob(NamedTuple):
+    biome: str
+    site: str
+    difficulty: str
+    budget: int
+    seed: int
+    candidates: Tuple[str, ...]
+
+class BatchProgress(NamedTuple):
+    done: int
+    total: int
+    elapsed: float
+    entry: Dict  # log entry of the encounter just finished
+
+    @property
+    def rate(self) -> float:
+        """Encounters per second so far."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+# name -> (CR, role, factions, loot)
+Pool = Dict[str, Tuple[int, str, Tuple[str, ...], Tuple[str, ...]]]
+
+def build_pool(creatures: Iterable[Any], use_ap_multiplier: bool = False) -> Pool:
+    """What the workers need of each Creature model (utils/creatures.py)."""
+    return {c.key: (c.cr_for(use_ap_multiplier), c.role, c.factions, c.loot) for c in creatures}
+
+def plan_batch(creatures: Iterable[Any], party_cr: int, batch_seed: int,
+               difficulties: Optional[Sequence[str]] = None, biomes: Optional[Iterable[str]] = None,
+               sites: Optional[Iterable[str]] = None) -> List[BatchJob]:
+    """One job per difficulty (all by default) for every biome and site pair that has creatures."""
+    biomes = set(biomes) if biomes is not None else None
+    sites = set(sites) if sites is not None else None
+    combos: Dict[Tuple[str, str], List[str]] = {}
+    for c in creatures:
+        for biome in c.biomes:
+            if biomes is not None and biome not in biomes:
+                continue
+            for site in c.sites:
+                if sites is None or site in sites:
+                    combos.setdefault((biome, site), []).append(c.key)
+    jobs = []
+    for (biome, site), names in sorted(combos.items()):
+        for difficulty in DIFFICULTY_MULTIPLIERS if difficulties is None else difficulties:
+            budget = int(party_cr * DIFFICULTY_MULTIPLIERS[difficulty])
+            jobs.append(BatchJob(biome, site, difficulty, budget, derive_seed(batch_seed, biome, site, difficulty), tuple(sorted(names))))
+    return jobs
+
+def generate_job(job: BatchJob, pool: Pool, settings: BatchSettings) -> Dict:
+    """The log entry of one job (empty threats when nothing fits the budget)."""
+    rng = Stream(job.seed, "encounter")
+    budget = job.budget
+    if settings.budget_variation:
+        variation = budget * BUDGET_VARIATION
+        budget = rng.randint(int(budget - variation), int(budget + variation))
+    names = [name for name in job.candidates if name in pool]
+    if settings.exact_fill:
+        encounter, remaining = solve_budget(
+            (SolverCandidate(name, pool[name][0], pool[name][1], pool[name][2]) for name in names), budget,
+            group_multiplier=settings.group_multiplier, role_synergy_tax=settings.role_synergy_tax, rng=rng)
+    else:
+        generator = EncounterGenerator(
+            (Candidate(name, pool[name][0], pool[name][1] if settings.role_synergy_tax else "Generic") for name in names),
+            weight_bias=settings.weight_bias, group_multiplier=settings.group_multiplier,
+            role_synergy_tax=settings.role_synergy_tax, rng=rng)
+        encounter, remaining = generator.generate(budget, int(budget * OVERFLOW))
+    return {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "biome": job.biome,
+        "site": job.site,
+        "difficulty": job.difficulty,
+        "threats": {e["name"]: e["count"] for e in encounter},
+        "loot": roll_encounter_loot(encounter, lambda name: pool[name][3], Stream(job.seed, "loot")),
+        "cost": budget - remaining if encounter else 0,
+        "seed": job.seed,
+    }
+
+# --- WORKERS ---
+# Set once per worker process by the pool initializer, so jobs only carry names
+_POOL: Pool = {}
+_SETTINGS = BatchSettings()
+
+def _init_worker(pool: Pool, settings: BatchSettings) -> None:
+    global _POOL, _SETTINGS
+    _POOL, _SETTINGS = pool, settings
+
+def _run_chunk(jobs: List[BatchJob]) -> List[Dict]:
+    return [generate_job(job, _POOL, _SETTINGS) for job in jobs]
+
+def _results(jobs: List[BatchJob], pool: Pool, settings: BatchSettings, workers: int) -> Iterator[Dict]:
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield generate_job(job, pool, settings)
+        return
+    size = max(1, -(-len(jobs) // (workers * CHUNKS_PER_WORKER)))
+    # Spawned, not forked: the server's threads (save queue, cache bus) may hold locks
+    # at fork time, and the initializer already ships everything a worker needs
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(pool, settings)) as executor:
+        futures = [executor.submit(_run_chunk, jobs[i:i + size]) for i in range(0, len(jobs), size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def run_batch(jobs: List[BatchJob], pool: Pool, settings: BatchSettings = BatchSettings(),
+              workers: Optional[int] = None, filepath: Optional[str] = SAVED_FILE,
+              flush_every: int = BATCH_FLUSH) -> Iterator[BatchProgress]:
+    """Generates every job, yielding progress as each encounter completes.
+
+    Runs on `workers` processes (all cores by default; 1 runs in this process).
+    Encounters with threats are appended to the log at `filepath` (None: not saved).
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    start = time.perf_counter()
+    pending: List[Dict] = []
+
+    def flush() -> None:
+        if filepath and pending:
+            logs = load_data(filepath)
+            if not isinstance(logs, list): logs = []
+            logs.extend(pending)
+            save_data(filepath, logs)
+        pending.clear()
+
+    try:
+        for done, entry in enumerate(_results(jobs, pool, settings, workers), 1):
+            if entry["threats"]:
+                pending.append(entry)
+            if len(pending) >= flush_every:
+                flush()
+            yield BatchProgress(done, len(jobs), time.perf_counter() - start, entry)
+    finally:
+        flush()
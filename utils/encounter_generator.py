@@ -0,0 +1,119 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from utils.cr_table import character_cr
+
+# --- BUDGET ENCOUNTER GENERATOR ---
+# Headless version of the Scanner's "Generate from Budget". Candidates are sorted by
+# CR once, so the creatures that still fit the remaining budget are always a prefix
+# of that order (found by bisect) and a pick is one random number: uniform over the
+# prefix, or weighted by CR through a cumulative-weight array. Group size and the
+# roles already present are kept as running totals instead of re-scanning the
+# encounter on every pick.
+
+GROUP_STEP = 0.08    # group multiplier: +8% cost per creature already in the encounter
+SYNERGY_TAX = 1.15   # a Striker joining a Tank (or the reverse) costs 15% more
+FILL_TARGET = 0.70   # stop retrying once this share of the budget is spent
+TRIES = 10
+MAX_PICKS = 50
+
+# Budget presets, as a share of the party CR
+DIFFICULTY_MULTIPLIERS = {"Easy": 0.5, "Medium": 1.0, "Hard": 1.5, "Deadly": 2.0}
+
+def calculate_party_cr(characters: Iterable[Dict[str, Any]], use_ap_multiplier: bool = False,
+                       group_multiplier: bool = True) -> int:
+    """Summed CR of a party, with the same group multiplier as enemy groups."""
+    total = 0
+    for i, char in enumerate(characters):
+        member_cr = character_cr(char, use_ap_multiplier=use_ap_multiplier)
+        if group_multiplier:
+            member_cr *= (1.0 + (i * GROUP_STEP))
+        total += int(member_cr)
+    return total
+
+class Candidate(NamedTuple):
+    name: str
+    cr: int
+    role: str  # "Generic" when the role synergy tax is off
+
+class EncounterGenerator:
+    """Random encounters that fill a CR budget from a fixed pool of candidates."""
+
+    def __init__(self, candidates: Iterable[Candidate], weight_bias: bool = True,
+                 group_multiplier: bool = True, role_synergy_tax: bool = True, rng: Optional[random.Random] = None):
+        pool = sorted(candidates, key=itemgetter(1))
+        self.names: List[str] = [c[0] for c in pool]
+        self.crs: List[int] = [c[1] for c in pool]
+        self.roles: List[str] = [c[2] for c in pool]
+        self.weight_bias = weight_bias
+        self.group_multiplier = group_multiplier
+        self.role_synergy_tax = role_synergy_tax
+        self.rng = rng if rng is not None else random
+        # _cumulative[i]: total pick weight of candidates 0..i (weight = CR)
+        self._cumulative = list(accumulate(cr if cr > 0 else 0 for cr in self.crs))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def affordable(self, limit: float) -> int:
+        """How many candidates (a prefix of the CR order) cost at most `limit`."""
+        return bisect_right(self.crs, limit)
+
+    def pick(self, count: int) -> int:
+        """Index of a random candidate among the first `count`."""
+        if self.weight_bias and self._cumulative[count - 1] > 0:
+            # Biased towards higher CR enemies
+            return bisect_right(self._cumulative, self.rng.random() * self._cumulative[count - 1], 0, count - 1)
+        return self.rng.randrange(count)
+
+    def cost(self, index: int, group_size: int, roles: Dict[str, int]) -> float:
+        """Cost of adding candidate `index` to an encounter of `group_size` creatures."""
+        cost = float(self.crs[index])
+        if self.group_multiplier and group_size > 0:
+            cost *= 1.0 + group_size * GROUP_STEP
+        if self.role_synergy_tax:
+            role = self.roles[index]
+            if (role == "Striker" and roles.get("Tank")) or (role == "Tank" and roles.get("Striker")):
+                cost *= SYNERGY_TAX
+        return cost
+
+    def fill(self, budget: int, overflow: int = 0, max_picks: int = MAX_PICKS) -> Tuple[List[Dict], int]:
+        """One attempt: ([{"name", "count"}], remaining budget)."""
+        remaining = budget
+        counts: Dict[str, int] = {}
+        roles: Dict[str, int] = {}
+        group_size = 0
+        attempts = 0
+        while remaining > 0 and attempts < max_picks:
+            attempts += 1
+            available = self.affordable(remaining + overflow)
+            if not available:
+                break
+            i = self.pick(available)
+            final_cost = self.cost(i, group_size, roles)
+            # Modifiers can push the pick over the limit
+            if final_cost > remaining + overflow:
+                continue
+            name = self.names[i]
+            counts[name] = counts.get(name, 0) + 1
+            roles[self.roles[i]] = roles.get(self.roles[i], 0) + 1
+            group_size += 1
+            remaining -= int(final_cost)
+        return [{"name": name, "count": count} for name, count in counts.items()], remaining
+
+    def generate(self, budget: int, overflow: int = 0, tries: int = TRIES,
+                 fill_target: float = FILL_TARGET) -> Tuple[List[Dict], int]:
+        """Best of up to `tries` fills (stops early past `fill_target`): (encounter, remaining budget)."""
+        best: List[Dict] = []
+        best_remaining = budget
+        if not self.names:
+            return best, best_remaining
+        for _ in range(tries):
+            generated, remaining = self.fill(budget, overflow)
+            if remaining < best_remaining:
+                best, best_remaining = generated, remaining
+            if budget > 0 and (budget - remaining) / budget >= fill_target:
+                break
+        return best, best_remaining
@@ -0,0 +1,297 @@
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from utils.encounter_generator import GROUP_STEP, SYNERGY_TAX
+
+# --- EXACT-FILL BUDGET SOLVER ---
+# Alternative to the random fill of utils/encounter_generator.py: finds encounters
+# whose cost lands within a tolerance of the budget and returns one of them chosen
+# uniformly at random. It is a bounded knapsack over integer CR costs that counts
+# solutions by (creatures, distinct species, cost). Each (creatures, species) row is
+# one Python int holding a count per cost in fixed-width bit fields, so adding a
+# species is a handful of big-int shifts and adds instead of a loop over every cost.
+#
+# Costs do not depend on order. The group multiplier uses the mean position,
+# cost = sum(CR) * (1 + (n - 1) / 2 * GROUP_STEP), which is what the random fill
+# charges on average. With the role synergy tax, Tanks and Strikers cost SYNERGY_TAX
+# more when both roles are present.
+# Faction coherence (every creature shares a faction) and the synergy cases (no
+# Tank, no Striker, both) are solved as separate runs. A draw picks a run and cell
+# in proportion to their counts, then walks the runs' prefix tables back to a
+# concrete encounter. Draws that break a run's rules, or that several runs share,
+# are thinned by rejection, so the final pick stays uniform over the valid
+# encounters. Costs are rounded to a quantum on large budgets and re-checked exactly.
+# Count tables are kept for the last TABLE_CACHE runs, so generating again from the
+# same candidates and budget skips building them.
+
+TOLERANCE = 0.05     # accepted distance from the budget, as a share of it
+MAX_CREATURES = 8
+MAX_SPECIES = 3
+MAX_COST_STEPS = 200  # cost resolution of the tables; larger budgets are quantized
+MAX_DRAWS = 100
+# Upper limits offered by the Scanner: a solve stays under ~100 ms on the whole bestiary
+MAX_CREATURES_LIMIT = 10
+MAX_SPECIES_LIMIT = 4
+TABLE_CACHE = 16
+
+class SolverCandidate(NamedTuple):
+    name: str
+    cr: int
+    role: str
+    factions: Tuple[str, ...] = ()
+
+def encounter_cost(crs: Sequence[float], roles: Sequence[str], counts: Sequence[int],
+                   group_multiplier: bool = True, role_synergy_tax: bool = False) -> float:
+    """Order-free cost of an encounter given per-species CR, role and count."""
+    present = {role for role, count in zip(roles, counts) if count}
+    taxed = role_synergy_tax and "Tank" in present and "Striker" in present
+    total = 0.0
+    for cr, role, count in zip(crs, roles, counts):
+        total += cr * count * (SYNERGY_TAX if taxed and role in ("Tank", "Striker") else 1.0)
+    size = sum(counts)
+    if group_multiplier and size > 1:
+        total *= 1.0 + (size - 1) / 2 * GROUP_STEP
+    return total
+
+class _CountTable:
+    """Counts of species multisets by (creatures, distinct species, quantized cost).
+
+    Species of equal cost are added as one class: j of its m species sharing k copies
+    can be picked in C(m, j) * C(k - 1, j - 1) ways.
+    """
+
+    def __init__(self, costs: List[int], max_n: int, max_d: int, max_s: int):
+        self.max_n, self.max_d = max_n, max_d
+        self.size = len(costs)
+        by_cost: Dict[int, List[int]] = {}
+        for i, cost in enumerate(costs):
+            by_cost.setdefault(cost, []).append(i)
+        self.classes = sorted(by_cost.items())  # [(cost, species indices)]
+        # Wide enough for the number of multisets of up to max_n out of all species
+        self.width = math.comb(len(costs) + max_n, max_n).bit_length() + 1
+        self.field = (1 << self.width) - 1
+        self.full = (1 << (self.width * (max_s + 1))) - 1
+        # rows[n][d]; the empty encounter is the only one of size 0
+        rows = [[0] * (max_d + 1) for _ in range(max_n + 1)]
+        rows[0][0] = 1
+        # Tables before each class, walked back when sampling (a few MB at most:
+        # most cells stay small until the last classes)
+        self.before: List[List[List[int]]] = []
+        for cost, members in self.classes:
+            self.before.append(rows)
+            rows = self._add(rows, cost, len(members))
+        self.rows = rows
+
+    def _spread(self, column: List[int], shift: int) -> List[int]:
+        """Ways to add k >= 1 more copies (k * cost more) to a column indexed by creatures."""
+        spread = [0] * (self.max_n + 1)
+        carry = 0
+        for n in range(1, self.max_n + 1):
+            carry = ((column[n - 1] + carry) << shift) & self.full
+            spread[n] = carry
+        return spread
+
+    def _add(self, rows: List[List[int]], cost: int, size: int) -> List[List[int]]:
+        shift = cost * self.width
+        new = [row[:] for row in rows]
+        for base in range(self.max_d):
+            column = [row[base] for row in rows]
+            # j more distinct species from this class, sharing k >= j copies
+            for j in range(1, min(size, self.max_d - base) + 1):
+                column = self._spread(column, shift)
+                if not any(column):
+                    break
+                ways = math.comb(size, j)
+                for n in range(1, self.max_n + 1):
+                    if column[n]:
+                        new[n][base + j] += ways * column[n]
+        return new
+
+    def count(self, n: int, d: int, s: int, rows: Optional[List[List[int]]] = None) -> int:
+        return ((rows or self.rows)[n][d] >> (s * self.width)) & self.field
+
+    def cells(self, n: int) -> Iterable[Tuple[int, int]]:
+        """(cost, count) of every non-empty cell with n creatures, summed over species counts."""
+        totals: Dict[int, int] = {}
+        for d in range(1, self.max_d + 1):
+            row = self.rows[n][d]
+            s = 0
+            while row:
+                value = row & self.field
+                if value:
+                    totals[s] = totals.get(s, 0) + value
+                row >>= self.width
+                s += 1
+        return totals.items()
+
+    def sample(self, n: int, s: int, rng) -> List[int]:
+        """Copies per species of a uniformly random multiset in cell (n, any d, s)."""
+        d = _weighted([self.count(n, d, s) for d in range(self.max_d + 1)], rng)
+        copies = [0] * self.size
+        for c in range(len(self.classes) - 1, -1, -1):
+            if n == 0:
+                break
+            before = self.before[c]
+            cost, members = self.classes[c]
+            # (j species of the class, k copies between them, ways); j = 0 skips the class
+            options = [(0, 0, self.count(n, d, s, before))]
+            for j in range(1, min(len(members), d) + 1):
+                for k in range(j, n + 1):
+                    if s - k * cost < 0:
+                        break
+                    ways = math.comb(len(members), j) * math.comb(k - 1, j - 1)
+                    options.append((j, k, ways * self.count(n - k, d - j, s - k * cost, before)))
+            j, k, _ = options[_weighted([o[2] for o in options], rng)]
+            if j:
+                # Which species, then a uniform split of the k copies among them
+                cuts = [0] + sorted(rng.sample(range(1, k), j - 1)) + [k]
+                for species, a, b in zip(rng.sample(members, j), cuts, cuts[1:]):
+                    copies[species] = b - a
+                n, d, s = n - k, d - j, s - k * cost
+        return copies
+
+# (costs, max_n, max_d, max_s) -> table, least recently used first
+_TABLES: "OrderedDict[Tuple, _CountTable]" = OrderedDict()
+_LOCK = threading.Lock()
+
+def _count_table(costs: List[int], max_n: int, max_d: int, max_s: int) -> _CountTable:
+    key = (tuple(costs), max_n, max_d, max_s)
+    with _LOCK:
+        table = _TABLES.get(key)
+        if table is not None:
+            _TABLES.move_to_end(key)
+            return table
+    table = _CountTable(costs, max_n, max_d, max_s)
+    with _LOCK:
+        _TABLES[key] = table
+        while len(_TABLES) > TABLE_CACHE:
+            _TABLES.popitem(last=False)
+    return table
+
+def _weighted(weights: List[int], rng) -> int:
+    pick = rng.randrange(sum(weights))
+    for i, weight in enumerate(weights):
+        if pick < weight:
+            return i
+        pick -= weight
+    return len(weights) - 1
+
+class _Run(NamedTuple):
+    members: List[int]      # candidate indices
+    table: _CountTable
+    faction: Optional[str]  # faction every creature must share (None: any)
+    case: str               # synergy case: "any", "no_tank", "no_striker" or "both"
+
+def _valid(run: _Run, picks: Dict[int, int], candidates: List[SolverCandidate]) -> bool:
+    if run.faction is not None and any(run.faction not in candidates[i].factions for i in picks):
+        return False
+    roles = {candidates[i].role for i in picks}
+    if run.case == "no_tank":
+        return "Tank" not in roles
+    if run.case == "no_striker":
+        return "Striker" not in roles
+    if run.case == "both":
+        return "Tank" in roles and "Striker" in roles
+    return True
+
+def solve_budget(candidates: Iterable[SolverCandidate], budget: int, tolerance: float = TOLERANCE,
+                 max_creatures: int = MAX_CREATURES, max_species: int = MAX_SPECIES,
+                 faction_coherence: bool = False, group_multiplier: bool = True,
+                 role_synergy_tax: bool = False, rng=None) -> Tuple[List[Dict], int]:
+    """An encounter costing budget ± tolerance, uniformly chosen among all such encounters.
+
+    Returns ([{"name", "count"}], remaining budget) like EncounterGenerator.generate;
+    when no encounter fits the tolerance, the closest one found under the upper bound.
+    """
+    rng = rng if rng is not None else random
+    pool = [SolverCandidate(*c) for c in candidates]
+    if not pool or budget <= 0:
+        return [], budget
+    slack = max(1.0, budget * tolerance)
+    low, high = budget - slack, budget + slack
+    max_species = max(1, min(max_species, max_creatures))
+    quantum = max(1, math.ceil(high / MAX_COST_STEPS))
+    max_s = int(high // quantum) + max_creatures  # room for rounding
+
+    groups: List[Tuple[Optional[str], List[int]]] = [(None, list(range(len(pool))))]
+    if faction_coherence:
+        by_faction: Dict[str, List[int]] = {}
+        for i, c in enumerate(pool):
+            for faction in c.factions:
+                by_faction.setdefault(faction, []).append(i)
+        groups = sorted(by_faction.items())
+    cases = [("no_tank", 1.0), ("no_striker", 1.0), ("both", SYNERGY_TAX)] if role_synergy_tax else [("any", 1.0)]
+
+    runs: List[_Run] = []
+    for faction, members in groups:
+        for case, tax in cases:
+            excluded = {"no_tank": "Tank", "no_striker": "Striker"}.get(case)
+            chosen, costs = [], []
+            for i in members:
+                cost = pool[i].cr * (tax if pool[i].role in ("Tank", "Striker") else 1.0)
+                if pool[i].role != excluded and 0 <= cost <= high:
+                    chosen.append(i)
+                    costs.append(round(cost / quantum))
+            if not chosen:
+                continue
+            runs.append(_Run(chosen, _count_table(costs, max_creatures, max_species, max_s), faction, case))
+
+    def group_factor(n: int) -> float:
+        return 1.0 + (n - 1) / 2 * GROUP_STEP if group_multiplier and n > 1 else 1.0
+
+    # Cells whose estimated cost is within the tolerance (or, failing that, the closest)
+    cells: List[Tuple[int, int, int, int]] = []  # (run, n, s, count)
+    fallback: List[Tuple[int, int, int, int]] = []
+    best_gap = None
+    for r, run in enumerate(runs):
+        for n in range(1, max_creatures + 1):
+            factor = group_factor(n)
+            # Each rounded cost is off by up to half a quantum; the exact check decides
+            error = n * quantum / 2 * factor
+            for s, count in run.table.cells(n):
+                estimate = s * quantum * factor
+                if low - error <= estimate <= high + error:
+                    cells.append((r, n, s, count))
+                elif estimate < low - error:
+                    gap = low - estimate
+                    if best_gap is None or gap < best_gap:
+                        best_gap, fallback = gap, [(r, n, s, count)]
+                    elif gap == best_gap:
+                        fallback.append((r, n, s, count))
+    exact = bool(cells)
+    cells = cells or fallback
+    if not cells:
+        return [], budget
+
+    def true_cost(picks: Dict[int, int]) -> float:
+        members = list(picks)
+        return encounter_cost([pool[i].cr for i in members], [pool[i].role for i in members],
+                              [picks[i] for i in members], group_multiplier, role_synergy_tax)
+
+    weights = [cell[3] for cell in cells]
+    best: Optional[Tuple[float, Dict[int, int]]] = None
+    for _ in range(MAX_DRAWS):
+        r, n, s, _count = cells[_weighted(weights, rng)]
+        run = runs[r]
+        copies = run.table.sample(n, s, rng)
+        picks = {run.members[j]: k for j, k in enumerate(copies) if k}
+        if not _valid(run, picks, pool):
+            continue
+        cost = true_cost(picks)
+        if best is None or abs(cost - budget) < abs(best[0] - budget):
+            best = (cost, picks)
+        if exact and not low <= cost <= high:
+            continue
+        # Encounters counted by several runs are thinned to keep the choice uniform
+        shared = sum(1 for other in runs if _valid(other, picks, pool))
+        if shared > 1 and rng.randrange(shared):
+            continue
+        best = (cost, picks)
+        break
+    if best is None:
+        return [], budget
+    cost, picks = best
+    encounter = [{"name": pool[i].name, "count": k} for i, k in sorted(picks.items(), key=lambda p: -pool[p[0]].cr)]
+    return encounter, budget - int(cost)
@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+from constants import BESTIARY_FILE
+from utils.creatures import Creature, load_creatures
+
+# --- FACET INDEX ---
+# Shared filter index for the Bestiary, the Scanner and Bulk Tagging. Creatures are
+# numbered in name order and every facet value (source, type, size, subtype, biome,
+# site, faction) keeps a bitset of the creatures that have it, as a Python int. A
+# multi-filter query is an OR within a facet and an AND across facets, the level
+# range is a difference of two cumulative masks over the sorted distinct levels, and
+# "Biome: Desert (42)" is a popcount. The index is built once per bestiary version.
+
+FACETS = ("source", "type", "size", "subtype", "biome", "site", "faction")
+
+# Set bit offsets of every byte value, for decoding a mask into positions
+_BYTE_BITS = tuple(tuple(i for i in range(8) if b >> i & 1) for b in range(256))
+
+def _facet_values(creature: Creature, facet: str) -> Tuple[str, ...]:
+    if facet == "biome":
+        return creature.biomes
+    if facet == "site":
+        return creature.sites
+    if facet == "faction":
+        return creature.factions
+    value = getattr(creature, facet)
+    return (value,) if value else ()
+
+class FacetIndex:
+    """Bitset index over a set of creatures; bit i is `keys[i]` (sorted by name)."""
+
+    def __init__(self, creatures: Dict[str, Creature]):
+        self.keys: List[str] = sorted(creatures)
+        self.all = (1 << len(self.keys)) - 1
+        self._lower = [k.lower() for k in self.keys]
+        self._positions = {key: pos for pos, key in enumerate(self.keys)}
+        self._last_search: Tuple[str, int] = ("", self.all)
+        self._bits: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        by_level: Dict[float, int] = {}
+        for pos, key in enumerate(self.keys):
+            creature = creatures[key]
+            bit = 1 << pos
+            for facet in FACETS:
+                bits = self._bits[facet]
+                for value in _facet_values(creature, facet):
+                    bits[value] = bits.get(value, 0) | bit
+            by_level[creature.level] = by_level.get(creature.level, 0) | bit
+
+        # _below[i]: creatures whose level is below levels[i]
+        self.levels = sorted(by_level)
+        self._below = [0]
+        for level in self.levels:
+            self._below.append(self._below[-1] | by_level[level])
+
+    def values(self, facet: str) -> List[str]:
+        return sorted(self._bits[facet])
+
+    def mask(self, facet: str, selected: Optional[Iterable[str]]) -> int:
+        """Creatures with any of the selected values (all creatures when none are selected)."""
+        if not selected:
+            return self.all
+        bits = self._bits[facet]
+        result = 0
+        for value in selected:
+            result |= bits.get(value, 0)
+        return result
+
+    def level_mask(self, low: float, high: float) -> int:
+        return self._below[bisect_right(self.levels, high)] & ~self._below[bisect_left(self.levels, low)]
+
+    def name_mask(self, search: str) -> int:
+        """Creatures whose name contains `search` (case-insensitive)."""
+        if not search:
+            return self.all
+        needle = search.lower()
+        # Every filter's counts repeat the same search within one rerun
+        cached = self._last_search
+        if cached[0] == needle:
+            return cached[1]
+        result = 0
+        for pos, name in enumerate(self._lower):
+            if needle in name:
+                result |= 1 << pos
+        self._last_search = (needle, result)
+        return result
+
+    def keys_mask(self, keys: Iterable[str]) -> int:
+        """Mask of the given creature keys (e.g. search results); unknown keys are ignored."""
+        positions = self._positions
+        result = 0
+        for key in keys:
+            pos = positions.get(key)
+            if pos is not None:
+                result |= 1 << pos
+        return result
+
+    def query(self, filters: Dict[str, Iterable[str]], level: Optional[Tuple[float, float]] = None,
+              within: Optional[int] = None, exclude: Optional[str] = None) -> int:
+        """AND of every facet filter, the level range and an optional mask (a search).
+
+        `exclude` leaves one facet out, for counting that facet's own values.
+        """
+        result = self.all if within is None else within
+        if level is not None:
+            result &= self.level_mask(*level)
+        for facet, selected in filters.items():
+            if selected and facet != exclude:
+                result &= self.mask(facet, selected)
+        return result
+
+    def counts(self, facet: str, within: int) -> Dict[str, int]:
+        """Creatures per value of a facet among the creatures in `within`."""
+        return {value: (bits & within).bit_count() for value, bits in self._bits[facet].items()}
+
+    def names(self, mask: int, ranked: Optional[List[str]] = None) -> List[str]:
+        """Keys of the creatures in a mask, in name order (or in the order of `ranked`)."""
+        if ranked is not None:
+            positions = self._positions
+            return [key for key in ranked if key in positions and mask >> positions[key] & 1]
+        keys = self.keys
+        result = []
+        for offset, byte in enumerate(mask.to_bytes((len(keys) + 7) // 8 or 1, "little")):
+            if byte:
+                base = offset * 8
+                result.extend(keys[base + i] for i in _BYTE_BITS[byte])
+        return result
+
+def with_counts(counts: Dict[str, int]):
+    """format_func for a facet multiselect: "Desert (42)"."""
+    return lambda value: f"{value} ({counts.get(value, 0)})"
+
+# --- SHARED INDEX ---
+_INDEX: Dict[str, Tuple[Dict[str, Creature], FacetIndex]] = {}
+_LOCK = threading.Lock()
+
+def get_facet_index(filepath: str = BESTIARY_FILE) -> FacetIndex:
+    """The facet index of the current bestiary (rebuilt when the bestiary changes)."""
+    creatures = load_creatures(filepath)
+    entry = _INDEX.get(filepath)
+    if entry is None or entry[0] is not creatures:
+        with _LOCK:
+            entry = _INDEX.get(filepath)
+            if entry is None or entry[0] is not creatures:
+                entry = (creatures, FacetIndex(creatures))
+                _INDEX[filepath] = entry
+    return entry[1]
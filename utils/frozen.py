@@ -0,0 +1,56 @@
+from typing import Any
+
+# --- READ-ONLY CONTAINERS ---
+# Shared game data is handed out as these instead of copies. They are real dict/list
+# subclasses, so isinstance checks, .get(), iteration and json.dumps keep working,
+# but any in-place mutation raises. Editors take a private copy with thaw() or
+# copy.deepcopy(), which both return plain, mutable containers.
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only shared data; call thaw() or copy.deepcopy() before editing")
+
+class FrozenDict(dict):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(obj: Any) -> Any:
+    """Recursively converts dicts/lists into their read-only counterparts."""
+    if isinstance(obj, (FrozenDict, FrozenList)):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return FrozenList([freeze(v) for v in obj])
+    return obj
+
+def thaw(obj: Any) -> Any:
+    """Returns a plain, fully mutable deep copy (copy-on-write for editors)."""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
@@ -0,0 +1,187 @@
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from constants import BESTIARY_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE, SAVED_FILE
+from utils import change_bus
+from utils.codec import dumps
+from utils.creatures import Creature
+from utils.data_manager import load_record, load_static
+from utils.search import SearchIndex, creature_fields
+
+# --- GLOBAL SEARCH ---
+# One search service over every game data file: creatures, items, perks, recipes and
+# the encounter log share a single SearchIndex (utils/search.py), so they share its
+# vocabulary, its sorted term list (prefix lookups are a bisect into it, the flat
+# equivalent of walking a prefix trie) and its trigram typo matching. Hits are typed,
+# so the sidebar and the dialogs can decide how to open them.
+# Nothing is rebuilt after a write: save_data publishes the changed file (and record
+# ids, when known) on change_bus, and the next search re-indexes only those records.
+# Whole-file changes are diffed against the records indexed last time; unchanged
+# records are the same shared objects (or equal to them) and are skipped.
+
+# Data file -> kind of hit
+SOURCES = {
+    BESTIARY_FILE: "creature",
+    ITEM_FILE: "item",
+    PERKS_FILE: "perk",
+    RECIPES_FILE: "recipe",
+    SAVED_FILE: "encounter",
+}
+KIND_ICONS = {"creature": "📖", "item": "🎒", "perk": "⭐", "recipe": "🔧", "encounter": "📜"}
+
+DOC_WEIGHTS = {"name": 4.0, "tags": 2.0, "text": 1.0}
+
+class Hit(NamedTuple):
+    kind: str
+    filepath: str
+    key: str  # bestiary name, item/perk/recipe id, or encounter log fingerprint
+    label: str
+    detail: str
+    score: float
+
+    @property
+    def icon(self) -> str:
+        return KIND_ICONS.get(self.kind, "🔎")
+
+def _join(values: Iterable[Any]) -> str:
+    return " ".join(str(v) for v in values if v)
+
+def log_key(log: Dict) -> str:
+    """Stable key of an encounter log (logs have no id; the tabs identify them by content)."""
+    return hashlib.blake2b(dumps(log).encode(), digest_size=8).hexdigest()
+
+def _records(filepath: str) -> Dict[str, Any]:
+    """Searchable records of a file by key."""
+    data = load_static(filepath)
+    if SOURCES[filepath] == "encounter":
+        return {log_key(log): log for log in data if isinstance(log, dict)} if isinstance(data, list) else {}
+    if isinstance(data, dict):
+        return {key: record for key, record in data.items() if isinstance(record, dict)}
+    if isinstance(data, list):
+        # Same as load_record: the first record with an id wins
+        records: Dict[str, Any] = {}
+        for r in data:
+            if isinstance(r, dict) and "id" in r:
+                records.setdefault(r["id"], r)
+        return records
+    return {}
+
+def _document(kind: str, key: str, record: Dict) -> Tuple[Dict[str, str], str, str]:
+    """(fields, label, detail) of one record."""
+    if kind == "creature":
+        creature = Creature(key, record)
+        fields = creature_fields(creature)
+        return ({
+            "name": fields["name"],
+            "tags": _join((creature.type, creature.subtype, *creature.biomes, *creature.sites, *creature.factions)),
+            "text": _join((fields["description"], fields["traits"], fields["actions"], fields["loot"])),
+        }, creature.name, _join((f"Level {creature.level:g}", creature.type)))
+    if kind == "encounter":
+        threats = list(record.get("threats") or {})
+        label = _join((record.get("date"), record.get("biome")))
+        return ({
+            "name": _join((record.get("biome"), record.get("date"))),
+            "tags": _join(threats),
+            "text": _join(record.get("loot") or {}),
+        }, label, ", ".join(threats))
+    name = str(record.get("name") or key)
+    ingredients = record.get("ingredients") or []
+    return ({
+        "name": name,
+        "tags": _join((record.get("category"), record.get("type"), record.get("item_type"))),
+        "text": _join((record.get("description"), *(i.get("name") for i in ingredients if isinstance(i, dict)))),
+    }, name, str(record.get("category") or kind.title()))
+
+# --- SHARED INDEX ---
+_INDEX = SearchIndex(DOC_WEIGHTS)
+# {filepath: {key: record object last indexed}}
+_INDEXED: Dict[str, Dict[str, Any]] = {}
+# {(filepath, key): (label, detail)}
+_LABELS: Dict[Tuple[str, str], Tuple[str, str]] = {}
+_LOCK = threading.Lock()
+
+# Files changed since the last search: a set of record keys, or None for the whole file
+_DIRTY: Dict[str, Optional[Set[str]]] = {}
+_DIRTY_LOCK = threading.Lock()
+
+def _on_change(filepath: str, keys: Optional[List[str]]) -> None:
+    if filepath not in SOURCES:
+        return
+    with _DIRTY_LOCK:
+        if keys is None or SOURCES[filepath] == "encounter":
+            _DIRTY[filepath] = None
+        elif filepath not in _DIRTY:
+            _DIRTY[filepath] = set(keys)
+        elif _DIRTY[filepath] is not None:
+            _DIRTY[filepath].update(keys)
+
+change_bus.subscribe(_on_change)
+
+def _index_record(filepath: str, key: str, record: Optional[Any]) -> None:
+    indexed = _INDEXED[filepath]
+    if record is None:
+        if indexed.pop(key, None) is not None:
+            _INDEX.remove((filepath, key))
+            _LABELS.pop((filepath, key), None)
+        return
+    fields, label, detail = _document(SOURCES[filepath], key, record)
+    _INDEX.add((filepath, key), fields, label)
+    _LABELS[(filepath, key)] = (label, detail)
+    indexed[key] = record
+
+def _refresh_file(filepath: str, keys: Optional[Set[str]]) -> None:
+    indexed = _INDEXED.setdefault(filepath, {})
+    if keys is not None:
+        for key in keys:
+            record = load_record(filepath, key)
+            _index_record(filepath, key, record if isinstance(record, dict) else None)
+        return
+    records = _records(filepath)
+    for key in [k for k in indexed if k not in records]:
+        _index_record(filepath, key, None)
+    for key, record in records.items():
+        old = indexed.get(key)
+        # Unchanged records are the same shared object (packs) or an equal copy
+        if old is not record and old != record:
+            _index_record(filepath, key, record)
+        elif old is not record:
+            indexed[key] = record
+
+def _refresh() -> None:
+    with _DIRTY_LOCK:
+        dirty = dict(_DIRTY)
+        _DIRTY.clear()
+    for filepath in SOURCES:
+        if filepath not in _INDEXED:
+            _refresh_file(filepath, None)
+        elif filepath in dirty:
+            _refresh_file(filepath, dirty[filepath])
+
+def search(query: str, kinds: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Hit]:
+    """Typed hits for a query across every data file (or only `kinds`), best match first."""
+    with _LOCK:
+        _refresh()
+        ranked = _INDEX.search(query)
+        wanted = set(kinds) if kinds is not None else None
+        hits = []
+        for (filepath, key), score in ranked:
+            kind = SOURCES[filepath]
+            if wanted is not None and kind not in wanted:
+                continue
+            label, detail = _LABELS[(filepath, key)]
+            hits.append(Hit(kind, filepath, key, label, detail, score))
+            if limit and len(hits) >= limit:
+                break
+        return hits
+
+def search_keys(query: str, filepath: str, limit: Optional[int] = None) -> List[str]:
+    """Record keys of one data file matching a query, best match first."""
+    kind = SOURCES.get(filepath)
+    if kind is None:
+        return []
+    return [hit.key for hit in search(query, (kind,), limit)]
+
+def get_hit_record(hit: Hit) -> Optional[Any]:
+    """The read-only record a hit points to, as it was indexed."""
+    with _LOCK:
+        return _INDEXED.get(hit.filepath, {}).get(hit.key)
@@ -0,0 +1,102 @@
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from constants import ITEM_FILE
+from utils.data_manager import load_static
+
+# --- ITEM CATALOG ---
+# Lookup tables over a list file (items, perks, backgrounds): by id, by exact name,
+# by lowercase name and by a singular stem of the name, built once per version of
+# the shared data. Loot names come from the generators and the encounter log
+# ("cloth armor (Decay: 7) [1d6+2 levels of decay]", "10mm rounds [2d8]"), so they
+# are cleaned of decay and dice notes before the name lookups. Where two records
+# share an id or a name, the first one wins, as with the old next(...) scans.
+
+# " (Decay: 7)" and trailing "[2d8]"-style notes on loot names
+_NOTES = re.compile(r"\s*(\(decay[^)]*\)|\[[^\]]*\])", re.I)
+
+def clean_name(name: str) -> str:
+    """Loot name without its decay and dice notes."""
+    return _NOTES.sub("", name).strip()
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+def stem(name: str) -> str:
+    """Lowercase name with its last word made singular ("10mm Rounds" -> "10mm round")."""
+    head, _, last = name.lower().strip().rpartition(" ")
+    return f"{head} {_singular(last)}" if head else _singular(last)
+
+class ItemCatalog:
+    """Id and name lookups over the records of one list file."""
+
+    def __init__(self, records: Iterable[Any]):
+        self._by_id: Dict[str, Dict] = {}
+        self._by_name: Dict[str, Dict] = {}
+        self._by_lower: Dict[str, Dict] = {}
+        self._by_stem: Dict[str, Dict] = {}
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            if "id" in record:
+                self._by_id.setdefault(record["id"], record)
+            name = record.get("name")
+            if isinstance(name, str) and name:
+                self._by_name.setdefault(name, record)
+                self._by_lower.setdefault(name.lower(), record)
+                self._by_stem.setdefault(stem(name), record)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, item_id: Any) -> Optional[Dict]:
+        return self._by_id.get(item_id)
+
+    def find(self, name: str) -> Optional[Dict]:
+        """Record for a name: exact, then case-insensitive, then without notes, then singular/plural."""
+        if not name:
+            return None
+        record = self._by_name.get(name) or self._by_lower.get(name.lower())
+        if record is not None:
+            return record
+        cleaned = clean_name(name)
+        return self._by_lower.get(cleaned.lower()) or self._by_stem.get(stem(cleaned))
+
+    def resolve(self, names: Iterable[str]) -> Tuple[Dict[str, Dict], List[str]]:
+        """({name: record} for the names found, names with no record), in input order."""
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for name in dict.fromkeys(names):
+            record = self.find(name)
+            if record is None:
+                missing.append(name)
+            else:
+                found[name] = record
+        return found, missing
+
+# --- SHARED CATALOGS ---
+# {filepath: (shared data the catalog was built from, catalog)}
+_CATALOGS: Dict[str, Tuple[Any, ItemCatalog]] = {}
+_LOCK = threading.Lock()
+
+def get_catalog(filepath: str = ITEM_FILE) -> ItemCatalog:
+    """The catalog of a list file, rebuilt only when the file changes."""
+    data = load_static(filepath)
+    entry = _CATALOGS.get(filepath)
+    if entry is None or entry[0] is not data:
+        with _LOCK:
+            entry = _CATALOGS.get(filepath)
+            if entry is None or entry[0] is not data:
+                entry = (data, ItemCatalog(data if isinstance(data, list) else []))
+                _CATALOGS[filepath] = entry
+    return entry[1]
+
+def find_item(name: str) -> Optional[Dict]:
+    """Item database record for a loot or inventory name, or None."""
+    return get_catalog(ITEM_FILE).find(name)
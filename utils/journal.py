@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from constants import CHARACTERS_FILE, CHARACTERS_JOURNAL_FILE
+
+# --- WRITE-AHEAD JOURNAL ---
+# A JSON-lines file of field patches for records of a list-shaped data file:
+#   {"seq": 1718000000000000000, "id": "<record id>", "set": {"hp_current": 7}}
+# Appending is O(1) no matter how big the data file is. Records remember the last
+# folded-in patch in `_jseq`, so replaying the journal on top of the snapshot is
+# idempotent and compaction can fold it back and truncate it at any time.
+
+SEQ_FIELD = "_jseq"
+REV_FIELD = "_rev"
+
+class Journal:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_seq = 0
+
+    def append(self, record_id: str, fields: Dict[str, Any]) -> int:
+        """Appends one patch and returns its sequence number.
+
+        Callers that need a total order across processes hold the data file's write lock.
+        """
+        with self._lock:
+            seq = max(time.time_ns(), self._last_seq + 1)
+            self._last_seq = seq
+            line = json.dumps({"seq": seq, "id": record_id, "set": fields}, separators=(",", ":")) + "\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+        return seq
+
+    def entries(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line after a crash
+                    continue
+                if isinstance(entry, dict) and "seq" in entry and "id" in entry:
+                    entries.append(entry)
+        return entries
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def truncate(self, up_to_seq: Optional[int] = None) -> None:
+        """Drops folded patches. Patches newer than `up_to_seq` are kept."""
+        with self._lock:
+            keep = [e for e in self.entries() if up_to_seq is not None and e["seq"] > up_to_seq]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in keep:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+def replay(records: Any, entries: List[Dict[str, Any]]) -> int:
+    """Applies journal patches newer than each record's `_jseq`. Returns how many were applied."""
+    if not entries or not isinstance(records, list):
+        return 0
+    by_id = {r.get("id"): r for r in records if isinstance(r, dict) and r.get("id")}
+    applied = 0
+    for entry in entries:
+        record = by_id.get(entry["id"])
+        if record is None or entry["seq"] <= record.get(SEQ_FIELD, 0):
+            continue
+        record.update(entry.get("set", {}))
+        record[SEQ_FIELD] = entry["seq"]
+        # Each patch is a revision, so compare-and-swap saves notice it
+        record[REV_FIELD] = record.get(REV_FIELD, 0) + 1
+        applied += 1
+    return applied
+
+# Data files that have a journal
+JOURNALS: Dict[str, Journal] = {
+    CHARACTERS_FILE: Journal(CHARACTERS_JOURNAL_FILE),
+}
+
+def get_journal(filepath: str) -> Optional[Journal]:
+    return JOURNALS.get(filepath)
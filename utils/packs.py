@@ -0,0 +1,228 @@
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Union
+from constants import BESTIARY_FILE, ITEM_FILE, PACKS_DIR, PACKS_MANIFEST_FILE
+from utils import codec
+from utils.save_queue import write_atomic
+
+# --- CONTENT PACKS ---
+# The bestiary and the item list are stored as packs: one JSON file per creature
+# `source` / item `category` in data/packs/<collection>/, each shaped like the
+# original file. BESTIARY_FILE and ITEM_FILE stay the names the rest of the app
+# uses: data_manager reads them by merging the enabled packs and saves them by
+# splitting the data again, rewriting only the packs whose records changed.
+# data/packs/manifest.json holds each pack's display name, whether it is enabled,
+# a version bumped on every rewrite and the positions its records had in the data
+# file, so merging the packs gives back the file's original order. A community pack is added by dropping a
+# file named after its source (e.g. "my-dlc.json") into the collection's folder;
+# while it is switched off it is never read.
+# Without a pack folder the flat file is used as before (python -m utils.packs
+# splits it).
+
+PACKED = {
+    BESTIARY_FILE: {"collection": "bestiary", "field": "source", "shape": "dict"},
+    ITEM_FILE: {"collection": "items", "field": "category", "shape": "list"},
+}
+# Pack for records without a source/category (e.g. new homebrew creatures)
+DEFAULT_PACK = "custom"
+
+_LOCK = threading.Lock()
+_MANIFEST: Dict[str, Any] = {"mtime_ns": None, "data": {}}
+
+def pack_dir(filepath: str) -> str:
+    return os.path.join(PACKS_DIR, PACKED[filepath]["collection"])
+
+def is_packed(filepath: str) -> bool:
+    """True when a data file is stored as packs (its pack folder exists)."""
+    return filepath in PACKED and os.path.isdir(pack_dir(filepath))
+
+def empty(filepath: str) -> Union[Dict, List]:
+    return {} if PACKED[filepath]["shape"] == "dict" else []
+
+def pack_id(value: Any) -> str:
+    """File-safe pack id for a source/category, e.g. "Bounty Hunters" -> "bounty-hunters"."""
+    slug = re.sub(r"[^a-z0-9_]+", "-", str(value or "").lower()).strip("-")
+    return slug or DEFAULT_PACK
+
+def pack_path(filepath: str, pid: str) -> str:
+    return os.path.join(pack_dir(filepath), f"{pid}.json")
+
+def parent_of(path: Optional[str]) -> Optional[str]:
+    """The data file a pack file belongs to (None for anything else)."""
+    if not path:
+        return None
+    folder = os.path.dirname(path)
+    for filepath in PACKED:
+        if folder == pack_dir(filepath):
+            return filepath
+    return None
+
+# --- MANIFEST ---
+def _read_manifest() -> Dict[str, Any]:
+    try:
+        mtime_ns = os.stat(PACKS_MANIFEST_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    if _MANIFEST["mtime_ns"] != mtime_ns:
+        try:
+            data = codec.load_file(PACKS_MANIFEST_FILE)
+        except (OSError, ValueError):
+            data = {}
+        _MANIFEST["data"] = data if isinstance(data, dict) else {}
+        _MANIFEST["mtime_ns"] = mtime_ns
+    return _MANIFEST["data"]
+
+def _update_entries(filepath: str, updates: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Applies {pack id: fields} to the manifest in one write (none if nothing changes)."""
+    with _LOCK:
+        _MANIFEST["mtime_ns"] = None  # re-read: another process may have changed it
+        manifest = {k: dict(v) for k, v in _read_manifest().items()}
+        packs = manifest.setdefault(PACKED[filepath]["collection"], {})
+        entries, changed = {}, False
+        for pid, fields in updates.items():
+            entry = dict(packs.get(pid, {}))
+            changed = changed or any(entry.get(k) != v for k, v in fields.items())
+            entry.update(fields)
+            packs[pid] = entries[pid] = entry
+        if changed:
+            os.makedirs(PACKS_DIR, exist_ok=True)
+            write_atomic(PACKS_MANIFEST_FILE, codec.dumps(manifest, indent=True))
+            _MANIFEST["mtime_ns"] = None
+    return entries
+
+def _update_manifest(filepath: str, pid: str, **fields: Any) -> Dict[str, Any]:
+    return _update_entries(filepath, {pid: fields})[pid]
+
+def list_packs(filepath: str) -> List[Dict[str, Any]]:
+    """Every pack of a data file: id, name, enabled, version and path (sorted by id)."""
+    try:
+        names = sorted(f for f in os.listdir(pack_dir(filepath)) if f.endswith(".json"))
+    except OSError:
+        return []
+    meta = _read_manifest().get(PACKED[filepath]["collection"], {})
+    result = []
+    for file_name in names:
+        pid = file_name[:-len(".json")]
+        entry = meta.get(pid, {})
+        result.append({
+            "id": pid,
+            "name": entry.get("name", pid),
+            "enabled": entry.get("enabled", True),
+            "version": entry.get("version", 0),
+            "path": os.path.join(pack_dir(filepath), file_name),
+        })
+    return result
+
+def enabled_paths(filepath: str) -> List[str]:
+    return [p["path"] for p in list_packs(filepath) if p["enabled"]]
+
+def all_paths(filepath: Optional[str] = None) -> List[str]:
+    """Pack files of one data file, or of every packed file."""
+    files = [filepath] if filepath else list(PACKED)
+    return [p["path"] for f in files if is_packed(f) for p in list_packs(f)]
+
+def set_enabled(filepath: str, pid: str, enabled: bool) -> None:
+    _update_manifest(filepath, pid, enabled=bool(enabled))
+
+def bump_version(filepath: str, pid: str, content: Union[Dict, List]) -> int:
+    """Records a rewrite of a pack. New packs are named after their records' source."""
+    entry = _read_manifest().get(PACKED[filepath]["collection"], {}).get(pid, {})
+    fields = {"version": entry.get("version", 0) + 1}
+    if "name" not in entry:
+        records = content.values() if isinstance(content, dict) else content
+        field = PACKED[filepath]["field"]
+        first = next((r.get(field) for r in records if isinstance(r, dict) and r.get(field)), None)
+        fields["name"] = str(first) if first else pid.replace("-", " ").title()
+    return _update_manifest(filepath, pid, **fields)["version"]
+
+# --- SPLIT / MERGE ---
+def positions(filepath: str, data: Union[Dict, List]) -> Dict[str, List[int]]:
+    """Where the records of each pack sit in `data`, in the pack's own order."""
+    field = PACKED[filepath]["field"]
+    records = data.values() if isinstance(data, dict) else data
+    result: Dict[str, List[int]] = {}
+    for position, record in enumerate(records):
+        pid = pack_id(record.get(field) if isinstance(record, dict) else None)
+        result.setdefault(pid, []).append(position)
+    return result
+
+def set_positions(filepath: str, pack_positions: Dict[str, List[int]]) -> bool:
+    """Records the positions from positions() in the manifest. True if any changed."""
+    meta = _read_manifest().get(PACKED[filepath]["collection"], {})
+    updates = {pid: {"positions": pos} for pid, pos in pack_positions.items()
+               if meta.get(pid, {}).get("positions") != pos}
+    if updates:
+        _update_entries(filepath, updates)
+    return bool(updates)
+
+def split(filepath: str, data: Union[Dict, List]) -> Dict[str, Union[Dict, List]]:
+    """Groups the records of a data file by the pack they belong to."""
+    field = PACKED[filepath]["field"]
+    parts: Dict[str, Union[Dict, List]] = {}
+    if isinstance(data, dict):
+        for key, record in data.items():
+            pid = pack_id(record.get(field) if isinstance(record, dict) else None)
+            parts.setdefault(pid, {})[key] = record
+    elif isinstance(data, list):
+        for record in data:
+            pid = pack_id(record.get(field) if isinstance(record, dict) else None)
+            parts.setdefault(pid, []).append(record)
+    else:
+        raise TypeError(f"Cannot split {type(data).__name__} into packs")
+    return parts
+
+def merge(filepath: str, parts: List[Union[Dict, List]], paths: Optional[List[str]] = None) -> Union[Dict, List]:
+    """Combines pack contents in order (for dicts, later packs win on duplicate keys).
+
+    Given the packs' `paths`, records go back to the positions they had in the data
+    file (see positions()); records without one, e.g. from a community pack, follow
+    in pack order.
+    """
+    merged = empty(filepath)
+    order: Dict[Any, tuple] = {}
+    meta = _read_manifest().get(PACKED[filepath]["collection"], {}) if paths else {}
+    # (position in the data file, then pack order) per merged key / list index
+    for i, part in enumerate(parts):
+        known = meta.get(os.path.basename(paths[i])[:-len(".json")], {}).get("positions") or [] if meta else []
+        if isinstance(merged, dict) and isinstance(part, dict):
+            merged.update(part)
+            for j, key in enumerate(part):
+                order[key] = (known[j] if j < len(known) else float("inf"), len(order))
+        elif isinstance(merged, list) and isinstance(part, list):
+            for j in range(len(part)):
+                order[len(order)] = (known[j] if j < len(known) else float("inf"), len(order))
+            merged.extend(part)
+    if not meta:
+        return merged
+    if isinstance(merged, dict):
+        return {key: merged[key] for key in sorted(merged, key=order.__getitem__)}
+    return [merged[i] for i in sorted(range(len(merged)), key=order.__getitem__)]
+
+def read_all(filepath: str) -> Union[Dict, List]:
+    """Every pack, enabled or not, straight from disk (imports and exports)."""
+    paths = all_paths(filepath)
+    return merge(filepath, [codec.load_file(path) for path in paths], paths)
+
+def migrate(filepath: str) -> Dict[str, int]:
+    """Splits a flat data file into packs and removes it. Returns records per pack."""
+    if is_packed(filepath) or not os.path.exists(filepath):
+        return {}
+    data = codec.load_file(filepath)
+    parts = split(filepath, data)
+    os.makedirs(pack_dir(filepath), exist_ok=True)
+    for pid, content in parts.items():
+        write_atomic(pack_path(filepath, pid), codec.dumps(content, indent=True))
+        bump_version(filepath, pid, content)
+    set_positions(filepath, positions(filepath, data))
+    os.remove(filepath)
+    return {pid: len(content) for pid, content in parts.items()}
+
+if __name__ == "__main__":
+    # python -m utils.packs: splits the flat bestiary/items files into packs
+    for path in PACKED:
+        counts = migrate(path)
+        if not counts:
+            print(f"{path}: already split (or missing)")
+        for pid, count in sorted(counts.items()):
+            print(f"{path} -> {pack_path(path, pid)}: {count} records")
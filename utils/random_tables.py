@@ -0,0 +1,169 @@
+import random
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from constants import ENCOUNTER_TABLES_FILE, LOOT_TABLES_FILE
+from utils.data_manager import load_static
+from utils.dice import roll_dice
+
+# --- WEIGHTED RANDOM TABLES ---
+# Roll tables by biome (data/encounters.json, data/loot.json): each table is a list of
+# {"name", "count", "weight", "cost"} rows, "count" in dice notation. A table may also
+# be a dict of tables ("Urban Ruins": {"Day": [...], "Night": [...]}), addressed as
+# "Urban Ruins/Night". Instead of a name, a row can roll on another table "count"
+# times: "table": "Old Vault" names a table of the same file, and "table": [rows...]
+# is an inline sub-table. Every table is compiled into a Vose alias table, so a draw
+# is one random number whatever the table's size. Compiled tables are built once per
+# version of the file, as the item catalog.
+
+MAX_DEPTH = 8       # sub-table levels followed; deeper rolls (e.g. a table rolling on itself) are dropped
+MAX_DRAWS = 10000   # draws per roll, however the counts multiply through sub-tables
+
+# Sources offered by the Scanner and the DM screen
+TABLE_FILES = {"Encounters": ENCOUNTER_TABLES_FILE, "Loot": LOOT_TABLES_FILE}
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw."""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights] if total > 0 else []
+        self._prob = [1.0] * len(scaled)
+        self._alias = list(range(len(scaled)))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        # Each column holds a light row topped up by a heavy one
+        while small and large:
+            light, heavy = small.pop(), large.pop()
+            self._prob[light] = scaled[light]
+            self._alias[light] = heavy
+            scaled[heavy] -= 1.0 - scaled[light]
+            (small if scaled[heavy] < 1.0 else large).append(heavy)
+        # Whatever is left is 1.0 up to rounding, and keeps its full column
+
+    def __len__(self) -> int:
+        return len(self._prob)
+
+    def draw(self, rng=random) -> int:
+        # One uniform number picks the column and, from its fraction, the side of it
+        u = rng.random() * len(self._prob)
+        column = int(u)
+        return column if u - column < self._prob[column] else self._alias[column]
+
+class TableRow(NamedTuple):
+    name: str
+    count: str  # dice notation
+    cost: int   # per unit
+    table: Union[str, "RandomTable", None] = None  # sub-table rolled instead of a result
+
+class RandomTable:
+    """One compiled table: its rows with a positive weight and their alias table."""
+
+    def __init__(self, rows: Sequence[TableRow], weights: Sequence[float]):
+        self.rows = tuple(rows)
+        self._sampler = AliasTable(weights)
+
+    def draw(self, rng=random) -> Optional[TableRow]:
+        return self.rows[self._sampler.draw(rng)] if self.rows else None
+
+class TableSet:
+    """The compiled tables of one file, by name."""
+
+    def __init__(self, data: Any):
+        self.tables: Dict[str, RandomTable] = {}
+        self.errors: List[str] = []
+        if isinstance(data, dict):
+            for name, value in data.items():
+                self._add(str(name), value)
+        for name, table in self.tables.items():
+            self._check(name, table)
+
+    def _add(self, name: str, value: Any) -> None:
+        if isinstance(value, dict):
+            for child, sub in value.items():
+                self._add(f"{name}/{child}", sub)
+        elif isinstance(value, list):
+            self.tables[name] = self._compile(name, value)
+        else:
+            self.errors.append(f"{name}: not a table")
+
+    def _compile(self, name: str, entries: List[Any]) -> RandomTable:
+        rows, weights = [], []
+        for i, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                self.errors.append(f"{name} #{i + 1}: not a row")
+                continue
+            try:
+                weight = float(entry.get("weight", 1))
+                cost = int(entry.get("cost", 0))
+            except (TypeError, ValueError):
+                self.errors.append(f"{name} #{i + 1}: weight and cost must be numbers")
+                continue
+            if weight <= 0:
+                continue
+            table = entry.get("table")
+            if isinstance(table, list):
+                table = self._compile(f"{name} #{i + 1}", table)
+            elif table is not None:
+                table = str(table)
+            label = entry.get("name") or (table if isinstance(table, str) else f"{name} #{i + 1}")
+            rows.append(TableRow(str(label), str(entry.get("count", "1")), cost, table))
+            weights.append(weight)
+        return RandomTable(rows, weights)
+
+    def _check(self, name: str, table: RandomTable) -> None:
+        for row in table.rows:
+            if isinstance(row.table, RandomTable):
+                self._check(name, row.table)
+            elif row.table is not None and row.table not in self.tables:
+                self.errors.append(f"{name}: unknown sub-table '{row.table}'")
+
+    def names(self) -> List[str]:
+        return list(self.tables)
+
+    def roll(self, table: str, n: int = 1, rng=random) -> List[Dict]:
+        """`n` rolls on `table`, sub-tables followed, as [{"name", "count", "cost"}] merged by name."""
+        results: Dict[str, List[int]] = {}
+        start = self.tables.get(table)
+        pending: List[Tuple[RandomTable, int, int]] = [(start, n, 0)] if start else []
+        draws = 0
+        while pending and draws < MAX_DRAWS:
+            current, times, depth = pending.pop()
+            for _ in range(min(times, MAX_DRAWS - draws)):
+                draws += 1
+                row = current.draw(rng)
+                if row is None:
+                    break
+                count = roll_dice(row.count, rng)
+                if count <= 0:
+                    continue
+                if row.table is None:
+                    totals = results.setdefault(row.name, [0, 0])
+                    totals[0] += count
+                    totals[1] += count * row.cost
+                    continue
+                sub = row.table if isinstance(row.table, RandomTable) else self.tables.get(row.table)
+                if sub is not None and depth < MAX_DEPTH:
+                    pending.append((sub, count, depth + 1))
+        return [{"name": name, "count": count, "cost": cost} for name, (count, cost) in results.items()]
+
+# --- CACHE ---
+# filepath -> (shared data it was compiled from, tables)
+_TABLES: Dict[str, Tuple[Any, TableSet]] = {}
+_LOCK = threading.Lock()
+
+def get_tables(filepath: str = ENCOUNTER_TABLES_FILE) -> TableSet:
+    """The compiled tables of a file, rebuilt only when the file changes."""
+    data = load_static(filepath)
+    entry = _TABLES.get(filepath)
+    if entry is None or entry[0] is not data:
+        with _LOCK:
+            entry = _TABLES.get(filepath)
+            if entry is None or entry[0] is not data:
+                entry = (data, TableSet(data))
+                _TABLES[filepath] = entry
+    return entry[1]
+
+def roll_table(filepath: str, table: str, n: int = 1, rng=random) -> List[Dict]:
+    """`n` rolls on one table of a file (see TableSet.roll)."""
+    return get_tables(filepath).roll(table, n, rng)
@@ -0,0 +1,177 @@
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from constants import BESTIARY_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE
+from utils import codec
+from utils import packs
+
+# --- RECORD OFFSET INDEX ---
+# A sidecar "<file>.idx" maps each record key to the byte offset and length of its
+# JSON text inside the data file (dict files: the key; list files: the record's id).
+# A single creature or item is then read by slicing a memory map and decoding just
+# those bytes, no matter how large the file grows. The index stores the source's
+# size and mtime and is rebuilt whenever the data file changes. Content packs are
+# indexed file by file.
+
+INDEXED_FILES = [BESTIARY_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE]
+
+# Strings (with escapes) and brackets; everything else is skipped by the scanner
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+_COLON = re.compile(rb"\s*:")
+
+def _signature(filepath: str) -> Tuple[int, int]:
+    st = os.stat(filepath)
+    return st.st_size, st.st_mtime_ns
+
+def scan_offsets(raw: bytes) -> Dict[str, Tuple[int, int]]:
+    """Finds the byte span of every top-level record of a JSON object or array.
+
+    Only object/array records are indexed; anything else is left to the full loader.
+    """
+    spans: Dict[str, Tuple[int, int]] = {}
+    depth = 0
+    root = None
+    key = None
+    start = 0
+    list_index = 0
+    for m in _TOKEN.finditer(raw):
+        tok = m.group()
+        if tok[0] == 0x22:  # string
+            if depth == 1 and root == "{" and _COLON.match(raw, m.end()):
+                key = json.loads(tok)
+            continue
+        if tok in (b"{", b"["):
+            if depth == 0:
+                root = tok.decode()
+            elif depth == 1:
+                start = m.start()
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1:
+                span = (start, m.end() - start)
+                if root == "{" and key is not None:
+                    spans[key] = span
+                    key = None
+                elif root == "[":
+                    spans[f"@{list_index}"] = span
+                    list_index += 1
+    return spans
+
+def _key_list_records(raw: bytes, spans: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    """Re-keys the records of a list file by their `id` field."""
+    keyed = {}
+    for offset, length in spans.values():
+        record = codec.loads(raw[offset:offset + length])
+        rid = record.get("id") if isinstance(record, dict) else None
+        if isinstance(rid, str) and rid and rid not in keyed:
+            keyed[rid] = (offset, length)
+    return keyed
+
+def build_index(filepath: str) -> Dict[str, Any]:
+    """Scans a data file and writes its sidecar index. Returns the index."""
+    signature = _signature(filepath)
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    spans = scan_offsets(raw)
+    if raw.lstrip()[:1] == b"[":
+        spans = _key_list_records(raw, spans)
+    index = {"size": signature[0], "mtime_ns": signature[1], "records": spans}
+    # A temp file of its own, so processes rebuilding the same index do not collide
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile("w", delete=False, dir=os.path.dirname(filepath) or None,
+                                         prefix=f"{os.path.basename(filepath)}.", suffix=".idx.tmp",
+                                         encoding="utf-8") as f:
+            tmp_path = f.name
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, f"{filepath}.idx")
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return index
+
+class _IndexedFile:
+    def __init__(self, filepath: str, index: Dict[str, Any]):
+        self.signature = (index["size"], index["mtime_ns"])
+        self.records: Dict[str, List[int]] = index["records"]
+        with open(filepath, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if index["size"] else None
+
+    def close(self) -> None:
+        # A reader still slicing it gets ValueError and falls back to a full load
+        if self.mm is not None:
+            self.mm.close()
+
+    def read(self, key: str) -> Optional[Any]:
+        span = self.records.get(key)
+        if span is None or self.mm is None:
+            return None
+        offset, length = span
+        return codec.loads(self.mm[offset:offset + length])
+
+_OPEN: Dict[str, _IndexedFile] = {}
+_LOCK = threading.Lock()
+
+def _get(filepath: str) -> Optional[_IndexedFile]:
+    try:
+        signature = _signature(filepath)
+    except OSError:
+        return None
+    current = _OPEN.get(filepath)
+    if current is not None and current.signature == signature:
+        return current
+
+    with _LOCK:
+        index = None
+        try:
+            with open(f"{filepath}.idx", "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if (index.get("size"), index.get("mtime_ns")) != signature:
+                index = None
+        except (OSError, ValueError):
+            index = None
+        if index is None:
+            try:
+                index = build_index(filepath)
+            except (OSError, ValueError):
+                return None
+            if (index["size"], index["mtime_ns"]) != signature:
+                # File changed while it was being scanned
+                return None
+        current = _IndexedFile(filepath, index)
+        replaced = _OPEN.get(filepath)
+        _OPEN[filepath] = current
+        if replaced is not None:
+            # Maps the file's previous inode: keeping it would leak one map per edit
+            replaced.close()
+    return current
+
+def covers(filepath: str) -> bool:
+    return filepath in INDEXED_FILES or packs.parent_of(filepath) is not None
+
+def read_record(filepath: str, key: str) -> Tuple[bool, Optional[Any]]:
+    """Reads one record through the offset index.
+
+    Returns (True, record or None if the key does not exist) when the index could
+    answer, or (False, None) when the caller should fall back to a full load.
+    """
+    indexed = _get(filepath)
+    if indexed is None:
+        return False, None
+    try:
+        return True, indexed.read(key)
+    except ValueError:
+        # Span no longer matches the file (rewritten in place): answer from a full load
+        return False, None
+
+if __name__ == "__main__":
+    # python -m utils.record_index: rebuilds the sidecar indexes
+    for path in INDEXED_FILES + packs.all_paths():
+        if os.path.exists(path):
+            print(f"{path}: {len(build_index(path)['records'])} records indexed")
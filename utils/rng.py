@@ -0,0 +1,127 @@
+import hashlib
+import random
+import secrets
+from typing import Any, List, MutableMapping, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- SEEDED RANDOM STREAMS ---
+# Rolls come from a Stream: the random.Random API (randint, choice, sample...) over a
+# PCG64 generator. The generator is NumPy's PCG64, read in buffered blocks, when NumPy
+# is installed; otherwise it is the same algorithm in plain Python, so a seed replays
+# the same rolls either way. A stream is named by a seed plus substream names
+# ("loot", "initiative"...), hashed into the generator's state and increment.
+# Substreams of one seed, and seeds derived for batch jobs in other processes, never
+# share draws. Storing an operation's seed (e.g. on an encounter log) is enough to
+# replay it.
+
+_MULTIPLIER = 0x2360ED051FC65DA44385DF649FCCF645  # PCG64 128-bit LCG multiplier
+_MASK64 = (1 << 64) - 1
+_MASK128 = (1 << 128) - 1
+_BLOCK = 256  # 64-bit outputs generated at a time (plain Python: growing from 8 up to this)
+
+def new_seed() -> int:
+    """A fresh 63-bit seed (fits a signed 64-bit column)."""
+    return secrets.randbits(63)
+
+def derive_seed(seed: int, *names: Any) -> int:
+    """Seed of a named child of `seed`, e.g. one batch job."""
+    digest = hashlib.blake2b("/".join(map(str, (seed, *names))).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+class Stream(random.Random):
+    """random.Random over the PCG64 stream of (seed, *names)."""
+
+    def __init__(self, seed: Optional[int] = None, *names: str):
+        self.names = names
+        super().__init__(seed)
+
+    def seed(self, a: Optional[int] = None, version: int = 2) -> None:
+        self.seed_value = new_seed() if a is None else int(a)
+        digest = hashlib.blake2b("/".join(map(str, (self.seed_value, *self.names))).encode(), digest_size=32).digest()
+        self._state = int.from_bytes(digest[:16], "big")
+        self._inc = int.from_bytes(digest[16:], "big") | 1
+        self._block: List[int] = []
+        self._block_size = 8
+        self._bits = None
+        if np is not None:
+            self._bits = np.random.PCG64()
+            self._bits.state = {"bit_generator": "PCG64", "state": {"state": self._state, "inc": self._inc},
+                                "has_uint32": 0, "uinteger": 0}
+        self.gauss_next = None
+
+    def substream(self, *names: str) -> "Stream":
+        """Independent stream under this one's seed."""
+        return Stream(self.seed_value, *self.names, *names)
+
+    def _refill(self) -> None:
+        # Kept reversed, so the next output is a pop() from the end
+        if self._bits is not None:
+            self._block = self._bits.random_raw(_BLOCK).tolist()[::-1]
+            return
+        state, inc = self._state, self._inc
+        block = []
+        # Short-lived streams (a few dice) only pay for the outputs they use
+        size, self._block_size = self._block_size, min(_BLOCK, self._block_size * 2)
+        for _ in range(size):
+            # Step the 128-bit LCG, then XSL-RR: fold to 64 bits, rotate by the top 6 bits
+            state = (state * _MULTIPLIER + inc) & _MASK128
+            word = ((state >> 64) ^ state) & _MASK64
+            rot = state >> 122
+            block.append(((word >> rot) | (word << (64 - rot))) & _MASK64)
+        self._state = state
+        self._block = block[::-1]
+
+    def _next64(self) -> int:
+        if not self._block:
+            self._refill()
+        return self._block.pop()
+
+    def random(self) -> float:
+        return (self._next64() >> 11) * (1.0 / 9007199254740992.0)
+
+    def getrandbits(self, k: int) -> int:
+        if k <= 64:
+            return self._next64() >> (64 - k) if k > 0 else 0
+        words = -(-k // 64)
+        value = 0
+        for _ in range(words):
+            value = (value << 64) | self._next64()
+        return value >> (words * 64 - k)
+
+    def getstate(self) -> Tuple:
+        state = self._bits.state["state"] if self._bits is not None else {"state": self._state, "inc": self._inc}
+        return (self.seed_value, self.names, state["state"], state["inc"], tuple(self._block), self.gauss_next)
+
+    def setstate(self, state: Tuple) -> None:
+        self.seed_value, self.names, self._state, self._inc, block, self.gauss_next = state
+        self._block = list(block)
+        if self._bits is not None:
+            self._bits.state = {"bit_generator": "PCG64", "state": {"state": self._state, "inc": self._inc},
+                                "has_uint32": 0, "uinteger": 0}
+
+# --- SESSION SERVICE ---
+class RNGService:
+    """Seeds and streams of one session: each operation gets its own seed."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = new_seed() if seed is None else seed
+        # Operation seeds are drawn from the session seed, so it replays the whole session
+        self._operations = Stream(self.seed, "operations")
+
+    def operation_seed(self) -> int:
+        return self._operations.getrandbits(63)
+
+    def stream(self, name: str, seed: Optional[int] = None) -> Stream:
+        """Stream `name` of an operation: a new one, or a replay of `seed`."""
+        return Stream(self.operation_seed() if seed is None else seed, name)
+
+def session_rng(state: MutableMapping) -> RNGService:
+    """The RNGService kept in a session state mapping (st.session_state)."""
+    service = state.get("rng_service")
+    if service is None:
+        service = state["rng_service"] = RNGService()
+    return service
@@ -0,0 +1,144 @@
+import atexit
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+from constants import SAVE_DEBOUNCE_SECONDS
+
+# --- COALESCING SAVE QUEUE ---
+# One background writer per data file. save_data hands over the already-serialized
+# JSON and returns immediately; a burst of saves inside the debounce window (auto
+# save, rads overflow, caps, equip toggles in one rerun) becomes a single atomic,
+# fsynced write of the latest content. Until then, reads are served from the
+# pending content so nothing ever sees older data than was saved.
+
+def write_atomic(filepath: str, json_str: str) -> None:
+    """Writes to a temp file in the same directory, fsyncs it and swaps it in."""
+    tmp_path = None
+    try:
+        dir_name = os.path.dirname(filepath)
+        with tempfile.NamedTemporaryFile("w", delete=False, dir=dir_name, encoding="utf-8") as tmp_file:
+            tmp_path = tmp_file.name
+            tmp_file.write(json_str)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class FileWriter:
+    def __init__(self, filepath: str, debounce: float = SAVE_DEBOUNCE_SECONDS,
+                 on_written: Optional[Callable[[str, Optional[List[str]]], None]] = None):
+        self.filepath = filepath
+        self.debounce = debounce
+        self.on_written = on_written
+        self.submitted = 0
+        self.written = 0
+        self.error: Optional[Exception] = None
+        self._cond = threading.Condition()
+        self._pending: Optional[str] = None
+        # Record keys changed by the pending saves (None: unknown / whole file)
+        self._pending_keys: Optional[Set[str]] = set()
+        self._in_flight: Optional[str] = None
+        self._burst_start = 0.0
+        self._flush_requested = False
+        self._thread = threading.Thread(target=self._run, name=f"writer-{os.path.basename(filepath)}", daemon=True)
+        self._thread.start()
+
+    def submit(self, json_str: str, keys: Optional[List[str]] = None) -> None:
+        with self._cond:
+            if self._pending is None:
+                self._burst_start = time.monotonic()
+                self._pending_keys = set()
+            if keys is None:
+                self._pending_keys = None
+            elif self._pending_keys is not None:
+                self._pending_keys.update(keys)
+            self._pending = json_str
+            self.submitted += 1
+            self._cond.notify_all()
+
+    def current(self) -> Optional[str]:
+        """Content saved but not yet on disk, if any."""
+        with self._cond:
+            return self._pending if self._pending is not None else self._in_flight
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Writes pending content now and waits for it. False on timeout."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._pending is None and self._in_flight is None, timeout)
+            self._flush_requested = False
+            return done
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                # Let the burst settle, unless someone is waiting on a flush
+                while not self._flush_requested:
+                    remaining = self._burst_start + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                json_str, self._pending, self._in_flight = self._pending, None, self._pending
+                keys = sorted(self._pending_keys) if self._pending_keys is not None else None
+
+            try:
+                write_atomic(self.filepath, json_str)
+                error = None
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._in_flight = None
+                if error is None:
+                    self.written += 1
+                else:
+                    # Keep the data and retry after another debounce window
+                    self.error = error
+                    if self._pending is None:
+                        self._pending = json_str
+                        self._pending_keys = set(keys) if keys is not None else None
+                        self._burst_start = time.monotonic()
+                self._cond.notify_all()
+
+            if error is None and self.on_written:
+                self.on_written(self.filepath, keys)
+            elif error is not None:
+                time.sleep(max(self.debounce, 0.05))
+
+_WRITERS: Dict[str, FileWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+def get_writer(filepath: str, on_written: Optional[Callable[[str, Optional[List[str]]], None]] = None) -> FileWriter:
+    writer = _WRITERS.get(filepath)
+    if writer is None:
+        with _WRITERS_LOCK:
+            writer = _WRITERS.get(filepath)
+            if writer is None:
+                writer = FileWriter(filepath, on_written=on_written)
+                _WRITERS[filepath] = writer
+    return writer
+
+def pending_content(filepath: str) -> Optional[str]:
+    writer = _WRITERS.get(filepath)
+    return writer.current() if writer else None
+
+def flush(filepath: str, timeout: Optional[float] = None) -> bool:
+    writer = _WRITERS.get(filepath)
+    return writer.flush(timeout) if writer else True
+
+def flush_all(timeout: Optional[float] = 10) -> List[str]:
+    """Flushes every writer (shutdown, tests). Returns the files that did not finish."""
+    return [path for path, writer in list(_WRITERS.items()) if not writer.flush(timeout)]
+
+def writer_stats(filepath: str) -> Dict[str, int]:
+    writer = _WRITERS.get(filepath)
+    return {"saves": writer.submitted, "writes": writer.written} if writer else {"saves": 0, "writes": 0}
+
+atexit.register(flush_all)
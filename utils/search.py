@@ -0,0 +1,211 @@
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+from constants import BESTIARY_FILE
+from utils.creatures import Creature, load_creatures
+
+# --- FUZZY BESTIARY SEARCH ---
+# Full-text search over creature names, descriptions, traits, actions and loot.
+# Every word of a creature is a term with a posting list {creature key: field weight};
+# every term is itself indexed by its trigrams (padded, "  d", " de", "dea", ...).
+# A query word is matched against the vocabulary through those trigrams: exact
+# terms score highest, then terms it is a prefix of (search-as-you-type), then
+# terms containing it, then terms within typo distance (Dice similarity of the
+# trigram sets, so "deathclw" still finds "deathclaw"). A creature must match every
+# query word; its score adds up the best match of each word, times the weight of the
+# field it was found in. Words shorter than SHORT_WORD (the first keystrokes) only
+# match names, which keeps them fast and as precise as the old name search.
+# Editing one creature only re-indexes that creature. SearchIndex itself indexes any
+# document given as {field: text}; utils/global_search.py uses it for every data file.
+
+FIELD_WEIGHTS = {"name": 4.0, "actions": 2.0, "traits": 1.5, "loot": 1.5, "description": 1.0}
+EXACT, PREFIX, INFIX = 1.0, 0.9, 0.7
+# Minimum trigram similarity for a typo match, and the weight it gets
+FUZZY_MIN, FUZZY_WEIGHT = 0.5, 0.8
+SHORT_WORD = 4
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def creature_fields(creature: Creature) -> Dict[str, str]:
+    data = creature.data
+    return {
+        "name": creature.name if creature.name == creature.key else f"{creature.key} {creature.name}",
+        "description": str(data.get("description") or ""),
+        "traits": " ".join(creature.traits),
+        "actions": " ".join(a.text for a in creature.actions),
+        "loot": " ".join(creature.loot),
+    }
+
+class SearchIndex:
+    """Inverted index of document words plus a trigram index of the vocabulary.
+
+    Documents are {field: text} dicts weighted by `weights`; `weights["name"]` marks
+    the terms that short query words may match.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self._weights = weights or FIELD_WEIGHTS
+        self._postings: Dict[str, Dict[Hashable, float]] = {}
+        self._name_postings: Dict[str, Set[Hashable]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._terms: List[str] = []  # sorted vocabulary, for prefix lookups
+        self._doc_terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._names: Dict[Hashable, str] = {}
+        # Updates run while other sessions search
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._doc_terms
+
+    def add(self, key: Hashable, fields: Dict[str, str], name: str) -> None:
+        """Indexes (or re-indexes) one document; `name` breaks ties between equal scores."""
+        with self._lock:
+            self._add(key, fields, name)
+
+    def _add(self, key: Hashable, fields: Dict[str, str], name: str) -> None:
+        if key in self._doc_terms:
+            self._remove(key)
+        name_weight = self._weights["name"]
+        weights: Dict[str, float] = {}
+        for field, text in fields.items():
+            weight = self._weights[field]
+            for word in words(text):
+                if weights.get(word, 0.0) < weight:
+                    weights[word] = weight
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms.insert(bisect_left(self._terms, term), term)
+                for gram in trigrams(term):
+                    self._grams.setdefault(gram, set()).add(term)
+            postings[key] = weight
+            if weight == name_weight:
+                self._name_postings.setdefault(term, set()).add(key)
+        self._doc_terms[key] = tuple(weights)
+        self._names[key] = name
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        for term in self._doc_terms.pop(key, ()):
+            postings = self._postings[term]
+            postings.pop(key, None)
+            named = self._name_postings.get(term)
+            if named is not None:
+                named.discard(key)
+                if not named:
+                    del self._name_postings[term]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+                for gram in trigrams(term):
+                    terms = self._grams[gram]
+                    terms.discard(term)
+                    if not terms:
+                        del self._grams[gram]
+        self._names.pop(key, None)
+
+    def _term_matches(self, word: str) -> Dict[str, float]:
+        """Vocabulary terms matching one query word, with their match quality."""
+        matches: Dict[str, float] = {}
+        # Prefix: a contiguous run of the sorted vocabulary
+        i = bisect_left(self._terms, word)
+        while i < len(self._terms) and self._terms[i].startswith(word):
+            term = self._terms[i]
+            matches[term] = EXACT if term == word else PREFIX
+            i += 1
+
+        grams = trigrams(word)
+        overlap: Dict[str, int] = {}
+        for gram in grams:
+            for term in self._grams.get(gram, ()):
+                overlap[term] = overlap.get(term, 0) + 1
+        for term, shared in overlap.items():
+            if term in matches:
+                continue
+            if len(word) >= 3 and word in term:
+                matches[term] = INFIX
+            elif len(word) >= 4:
+                similarity = 2 * shared / (len(grams) + len(term) + 1)
+                if similarity >= FUZZY_MIN:
+                    matches[term] = FUZZY_WEIGHT * similarity
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """(document key, score) pairs for a query, best match first."""
+        query_words = words(query)
+        if not query_words:
+            return []
+        with self._lock:
+            return self._search(query_words, limit)
+
+    def _search(self, query_words: List[str], limit: Optional[int]) -> List[Tuple[Hashable, float]]:
+        name_weight = self._weights["name"]
+        scores: Optional[Dict[Hashable, float]] = None
+        for word in dict.fromkeys(query_words):
+            best: Dict[Hashable, float] = {}
+            short = len(word) < SHORT_WORD
+            for term, quality in self._term_matches(word).items():
+                if short:
+                    postings = dict.fromkeys(self._name_postings.get(term, ()), name_weight)
+                else:
+                    postings = self._postings[term]
+                for key, weight in postings.items():
+                    score = quality * weight
+                    if score > best.get(key, 0.0):
+                        best[key] = score
+            if scores is None:
+                scores = best
+            else:
+                scores = {key: score + best[key] for key, score in scores.items() if key in best}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._names[item[0]].lower()))
+        return ranked[:limit] if limit else ranked
+
+# --- SHARED INDEX ---
+# {filepath: (creature models the index reflects, index)}
+_INDEX: Dict[str, Tuple[Dict[str, Creature], SearchIndex]] = {}
+_LOCK = threading.Lock()
+
+def get_search_index(filepath: str = BESTIARY_FILE) -> SearchIndex:
+    """The search index of the current bestiary, updated only for changed creatures."""
+    creatures = load_creatures(filepath)
+    entry = _INDEX.get(filepath)
+    if entry is not None and entry[0] is creatures:
+        return entry[1]
+    with _LOCK:
+        entry = _INDEX.get(filepath)
+        if entry is None:
+            index, previous = SearchIndex(), {}
+        elif entry[0] is creatures:
+            return entry[1]
+        else:
+            index, previous = entry[1], entry[0]
+        for key in previous:
+            if key not in creatures:
+                index.remove(key)
+        for key, creature in creatures.items():
+            # Unchanged creatures keep their model object (see utils/creatures.py)
+            if previous.get(key) is not creature:
+                index.add(key, creature_fields(creature), creature.name)
+        _INDEX[filepath] = (creatures, index)
+    return index
+
+def search_creatures(query: str, filepath: str = BESTIARY_FILE, limit: Optional[int] = None) -> List[str]:
+    """Creature keys matching a query, best match first (typos and partial words allowed)."""
+    return [key for key, _ in get_search_index(filepath).search(query, limit)]
@@ -1,8 +1,11 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import urllib.parse
 from utils.character_logic import calculate_stats
+# CR mechanics live in utils/cr_table.py; re-exported for the tabs that import calculate_cr from here
+from utils.cr_table import calculate_cr
+from utils.creatures import Creature
 
 def convert_character_to_statblock(char: Dict[str, Any]) -> Dict[str, Any]:
     """Converts a player character dictionary into a monster statblock format."""
@@ -78,8 +81,9 @@ def convert_character_to_statblock(char: Dict[str, Any]) -> Dict[str, Any]:
     return sb
 
 # --- UI: STATBLOCK DISPLAY ---
-def render_statblock(name: str, data: Dict[str, Any], container: Any = st) -> None:
+def render_statblock(name: str, data: Dict[str, Any], container: Any = st, creature: Optional[Creature] = None) -> None:
     # Renders a creature's statblock into a given Streamlit container.
+    # `creature` is the bestiary model of `data`, when the caller has it: its CR is already rated.
     
     if not data:
         container.warning(f"No statblock data found for **{name}**.")
@@ -349,8 +353,12 @@ def render_statblock(name: str, data: Dict[str, Any], container: Any = st) -> No
 
     container.markdown(statblock_css + full_html, unsafe_allow_html=True)
 
-    base_cr = calculate_cr(data, use_ap_multiplier=False)
-    advanced_cr = calculate_cr(data, use_ap_multiplier=True)
+    # Bestiary creatures are already rated (utils/creatures.py); anything else is rated here
+    if creature is not None and creature.data is data:
+        base_cr, advanced_cr = creature.cr, creature.cr_ap
+    else:
+        base_cr = calculate_cr(data, use_ap_multiplier=False)
+        advanced_cr = calculate_cr(data, use_ap_multiplier=True)
 
     if base_cr == advanced_cr:
         container.caption(f"**Combat Rating:** {base_cr}")
@@ -362,7 +370,7 @@ def render_statblock(name: str, data: Dict[str, Any], container: Any = st) -> No
 
 # --- DIALOG WRAPPER ---
 @st.dialog("Creature Intel")
-def view_statblock_dialog(name: str, data: Dict[str, Any]) -> None:
+def view_statblock_dialog(name: str, data: Dict[str, Any], creature: Optional[Creature] = None) -> None:
     safe_name = urllib.parse.quote(name)
     
     primary = st.session_state.get("theme_primary", "#00ff00")
@@ -413,63 +421,4 @@ def view_statblock_dialog(name: str, data: Dict[str, Any]) -> None:
     """
     components.html(html_code, height=50)
     
-    render_statblock(name, data)
-
-# --- MECHANICS ---
-def calculate_cr(data: Dict[str, Any], use_ap_multiplier: bool = False) -> int:
-    """Calculates the Combat Rating (CR) based on creature stats."""
-    # 1. Base Score (Level * 5)
-    level = data.get("level", 1)
-    base_score = level * 5
-
-    # 2. Durability Score
-    hp = data.get("hp", 0)
-    sp = data.get("sp", 0)
-    dt = data.get("dt", 0)
-    ac = data.get("ac", 10)
-    durability_score = ((hp + sp) / 2) + (dt * 4) + ((ac - 10) * 2)
-
-    # 3. Capability Score
-    ap = data.get("ap", 0)
-    special = data.get("special", {})
-    if not isinstance(special, dict):
-        special = {}
-    
-    # Sum SPECIAL stats (defaulting to 5 if missing)
-    special_sum = sum(special.get(k, special.get("LUC" if k == "LCK" else k, 5)) for k in ["STR", "PER", "END", "CHA", "INT", "AGI", "LCK"])
-    capability_score = (ap * 2) + (special_sum / 2)
-
-    total = base_score + durability_score + capability_score
-
-    # 4. Action Economy Multiplier
-    if use_ap_multiplier:
-        # Baseline AP is 10. +5% per point above, -5% per point below.
-        multiplier = 1.0 + ((ap - 10) * 0.05)
-        total *= multiplier
-
-    return int(total)
-
-def get_creature_role(data: Dict[str, Any]) -> str:
-    """Determines the combat role of a creature based on stats and actions."""
-    # 1. Check for Controller (Status Effects)
-    actions = data.get("actions", [])
-    keywords = ["Stunned", "Prone", "Blinded", "Fatigue", "Paralyzed", "Unconscious", "Grappled", "Restrained"]
-    for act in actions:
-        text = ""
-        if isinstance(act, str): text = act
-        elif isinstance(act, dict): text = f"{act.get('name','')} {act.get('effect','')}"
-        
-        if any(k in text for k in keywords):
-            return "Controller"
-
-    # 2. Tank vs Striker (Stat Weighting)
-    hp = data.get("hp", 0)
-    sp = data.get("sp", 0)
-    dt = data.get("dt", 0)
-    level = data.get("level", 1)
-    ap = data.get("ap", 0)
-
-    tank_score = (hp + sp) + (dt * 10)
-    striker_score = (level * 5) + (ap * 5)
-
-    return "Tank" if tank_score > striker_score else "Striker"
\ No newline at end of file
+    render_statblock(name, data, creature=creature)
@@ -0,0 +1,299 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+from constants import (
+    DB_FILE, BESTIARY_FILE, ITEM_FILE, PERKS_FILE, RECIPES_FILE,
+    CHARACTERS_FILE, SAVED_FILE, DM_SCREEN_FILE
+)
+from utils import codec
+from utils import packs
+
+# Data files that can live in the record store, mapped to their collection name.
+COLLECTIONS = {
+    BESTIARY_FILE: "bestiary",
+    ITEM_FILE: "items",
+    PERKS_FILE: "perks",
+    RECIPES_FILE: "recipes",
+    CHARACTERS_FILE: "characters",
+    SAVED_FILE: "saved_encounters",
+    DM_SCREEN_FILE: "dm_screen",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS collections (
+    name TEXT PRIMARY KEY,
+    shape TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (collection, key)
+) WITHOUT ROWID;
+"""
+
+def _encode(record: Any) -> str:
+    return codec.dumps(record)
+
+def list_record_keys(records: List[Any]) -> List[str]:
+    """Builds a stable key for every record of a list-shaped file.
+
+    Records with a unique `id` (items, perks, recipes, characters) are keyed by it,
+    so editing one record only touches its own row. Anything else (saved encounters,
+    legacy characters without an id, duplicates) falls back to its position.
+    """
+    ids = [r.get("id") if isinstance(r, dict) else None for r in records]
+    seen = {}
+    for rid in ids:
+        if isinstance(rid, str) and rid:
+            seen[rid] = seen.get(rid, 0) + 1
+
+    keys = []
+    for index, rid in enumerate(ids):
+        if isinstance(rid, str) and rid and seen[rid] == 1:
+            keys.append(rid)
+        else:
+            keys.append(f"@{index}")
+    return keys
+
+class RecordStore:
+    """SQLite (WAL mode) store holding one row per record of each data file."""
+
+    def __init__(self, db_path: str = DB_FILE):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        # Autocommit mode; write paths open explicit transactions.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- COLLECTIONS ---
+    def has_collection(self, collection: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM collections WHERE name = ?", (collection,)).fetchone()
+        return row is not None
+
+    def version(self, collection: str) -> int:
+        """Monotonic counter bumped on every write to the collection."""
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM collections WHERE name = ?", (collection,)).fetchone()
+        return row[0] if row else 0
+
+    def keys(self, collection: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM records WHERE collection = ? ORDER BY position", (collection,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def _ensure_collection(self, collection: str, shape: str) -> None:
+        self._conn.execute(
+            "INSERT INTO collections (name, shape, version) VALUES (?, ?, 0) "
+            "ON CONFLICT(name) DO UPDATE SET shape = excluded.shape",
+            (collection, shape)
+        )
+
+    def _bump(self, collection: str) -> None:
+        self._conn.execute("UPDATE collections SET version = version + 1 WHERE name = ?", (collection,))
+
+    # --- SINGLE RECORDS ---
+    def get(self, collection: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM records WHERE collection = ? AND key = ?", (collection, key)
+            ).fetchone()
+        return codec.loads(row[0]) if row else None
+
+    def upsert(self, collection: str, key: str, record: Any, position: Optional[int] = None) -> None:
+        """Inserts or replaces a single record. New records are appended at the end."""
+        body = _encode(record)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if not self.has_collection(collection):
+                    self._ensure_collection(collection, "dict")
+                if position is None:
+                    row = self._conn.execute(
+                        "SELECT position FROM records WHERE collection = ? AND key = ?", (collection, key)
+                    ).fetchone()
+                    if row:
+                        position = row[0]
+                    else:
+                        row = self._conn.execute(
+                            "SELECT COALESCE(MAX(position) + 1, 0) FROM records WHERE collection = ?", (collection,)
+                        ).fetchone()
+                        position = row[0]
+                self._conn.execute(
+                    "INSERT INTO records (collection, key, position, body) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(collection, key) DO UPDATE SET position = excluded.position, body = excluded.body",
+                    (collection, key, position, body)
+                )
+                self._bump(collection)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, collection: str, key: str) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.execute("DELETE FROM records WHERE collection = ? AND key = ?", (collection, key))
+                if cur.rowcount:
+                    self._bump(collection)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cur.rowcount > 0
+
+    # --- WHOLE COLLECTIONS (load_data / save_data shim) ---
+    def load_collection(self, collection: str) -> Optional[Union[Dict, List]]:
+        """Rebuilds the original file structure (dict or list) from the stored rows."""
+        with self._lock:
+            meta = self._conn.execute("SELECT shape FROM collections WHERE name = ?", (collection,)).fetchone()
+            if not meta:
+                return None
+            rows = self._conn.execute(
+                "SELECT key, body FROM records WHERE collection = ? ORDER BY position", (collection,)
+            ).fetchall()
+
+        if meta[0] == "list":
+            return [codec.loads(body) for _, body in rows]
+        return {key: codec.loads(body) for key, body in rows}
+
+    def save_collection(self, collection: str, data: Union[Dict, List]) -> int:
+        """Diffs `data` against the stored rows and writes only what changed.
+
+        Returns the number of rows inserted, updated or deleted.
+        """
+        if isinstance(data, list):
+            shape = "list"
+            new_rows = {key: (pos, _encode(rec)) for pos, (key, rec) in enumerate(zip(list_record_keys(data), data))}
+        elif isinstance(data, dict):
+            shape = "dict"
+            new_rows = {str(key): (pos, _encode(rec)) for pos, (key, rec) in enumerate(data.items())}
+        else:
+            raise TypeError(f"Cannot store {type(data).__name__} in collection '{collection}'")
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._ensure_collection(collection, shape)
+                old_rows = {
+                    key: (pos, body) for key, pos, body in self._conn.execute(
+                        "SELECT key, position, body FROM records WHERE collection = ?", (collection,)
+                    )
+                }
+
+                changed: List[Tuple[str, str, int, str]] = [
+                    (collection, key, pos, body)
+                    for key, (pos, body) in new_rows.items()
+                    if old_rows.get(key) != (pos, body)
+                ]
+                removed = [(collection, key) for key in old_rows if key not in new_rows]
+
+                if changed:
+                    self._conn.executemany(
+                        "INSERT INTO records (collection, key, position, body) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(collection, key) DO UPDATE SET position = excluded.position, body = excluded.body",
+                        changed
+                    )
+                if removed:
+                    self._conn.executemany("DELETE FROM records WHERE collection = ? AND key = ?", removed)
+                if changed or removed:
+                    self._bump(collection)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(changed) + len(removed)
+
+    def save_records(self, collection: str, data: Union[Dict, List], keys: List[str]) -> int:
+        """Writes only the records named by `keys` (dict keys, or `id` for lists) from `data`.
+
+        Keys no longer in `data` are deleted; new records are appended at the end. When
+        a key does not name exactly one row (new collection, duplicate or missing ids)
+        the whole collection is diffed with save_collection instead.
+        Returns the number of rows written or deleted.
+        """
+        with self._lock:
+            meta = self._conn.execute("SELECT shape FROM collections WHERE name = ?", (collection,)).fetchone()
+        if isinstance(data, dict) and meta and meta[0] == "dict":
+            found = {key: data[key] for key in keys if key in data}
+        elif isinstance(data, list) and meta and meta[0] == "list":
+            wanted = set(keys)
+            ids = {r.get("id") for r in data if isinstance(r, dict)}
+            found = {key: rec for key, rec in zip(list_record_keys(data), data) if key in wanted}
+            if any(key.startswith("@") or (key in ids and key not in found) for key in keys):
+                return self.save_collection(collection, data)
+        else:
+            return self.save_collection(collection, data)
+
+        written = 0
+        for key in dict.fromkeys(keys):
+            if key in found:
+                self.upsert(collection, key, found[key])
+                written += 1
+            elif self.delete(collection, key):
+                written += 1
+        return written
+
+    # --- IMPORT ---
+    def import_json_files(self, files: Optional[Dict[str, str]] = None, overwrite: bool = False) -> Dict[str, int]:
+        """One-shot import of the flat JSON files into the store.
+
+        Collections that already exist are skipped unless `overwrite` is set.
+        Returns the number of records imported per collection.
+        """
+        files = files or COLLECTIONS
+        imported = {}
+        for filepath, collection in files.items():
+            is_packed = packs.is_packed(filepath)
+            if not is_packed and not os.path.exists(filepath):
+                continue
+            if self.has_collection(collection) and not overwrite:
+                continue
+            # Packed files are imported whole, disabled packs included
+            data = packs.read_all(filepath) if is_packed else codec.load_file(filepath)
+            if not isinstance(data, (dict, list)):
+                continue
+            self.save_collection(collection, data)
+            imported[collection] = len(data)
+        return imported
+
+_STORE: Optional[RecordStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_store() -> RecordStore:
+    """Process-wide store. Imports the JSON files the first time the database is created."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                is_new = not os.path.exists(DB_FILE)
+                store = RecordStore(DB_FILE)
+                if is_new:
+                    store.import_json_files()
+                _STORE = store
+    return _STORE
+
+if __name__ == "__main__":
+    # python -m utils.storage [--overwrite]
+    import sys
+    result = RecordStore(DB_FILE).import_json_files(overwrite="--overwrite" in sys.argv)
+    if not result:
+        print(f"Nothing imported into {DB_FILE} (collections already exist, use --overwrite).")
+    for name, count in result.items():
+        print(f"Imported {count} records into '{name}'")